@@ -0,0 +1,87 @@
+"""
+Perft benchmark: counts the leaf nodes of the legal move tree to a given depth and compares
+them with the published reference counts, which validates move generation (castling,
+en passant, promotions, pins, checks). Reports nodes per second for each depth.
+
+Run from lecopain/chess/backend:
+    python -m benchmarks.perft
+    python -m benchmarks.perft --max-depth 5 --position startpos
+    python -m benchmarks.perft --divide 2 --position kiwipete
+"""
+import argparse
+import sys
+import time
+
+from src.features.chess.position import START_FEN, Position, move_to_uci
+
+# Reference counts from the Chess Programming Wiki perft results
+POSITIONS = {
+    "startpos": (START_FEN, [20, 400, 8902, 197281, 4865609]),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    "position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+}
+# Depths run by default: each takes a few seconds at most
+DEFAULT_MAX_DEPTH = {"startpos": 4, "kiwipete": 3, "position3": 4, "position4": 3, "position5": 3}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Chess move generation perft benchmark")
+    parser.add_argument("--position", choices=sorted(POSITIONS), action="append", help="Positions to run (all by default)")
+    parser.add_argument("--max-depth", type=int, default=None, help="Deepest depth to run (per-position defaults otherwise)")
+    parser.add_argument("--divide", type=int, default=None, help="Print the node count under each root move at this depth")
+    return parser.parse_args()
+
+
+def perft(position: Position, depth: int) -> int:
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in position.generate_moves():
+        position.make_move(move)
+        if position.king_safe():
+            nodes += perft(position, depth - 1) if depth > 1 else 1
+        position.unmake_move()
+    return nodes
+
+
+def divide(position: Position, depth: int):
+    total = 0
+    for move in sorted(position.legal_moves(), key=move_to_uci):
+        position.make_move(move)
+        nodes = perft(position, depth - 1)
+        position.unmake_move()
+        total += nodes
+        print(f"  {move_to_uci(move)}: {nodes}")
+    print(f"  total: {total}")
+
+
+def main() -> int:
+    args = parse_args()
+    failures = 0
+    for name in args.position or POSITIONS:
+        fen, expected = POSITIONS[name]
+        position = Position(fen)
+        print(f"{name}: {fen}")
+        if args.divide is not None:
+            divide(position, args.divide)
+            continue
+        max_depth = min(args.max_depth or DEFAULT_MAX_DEPTH[name], len(expected))
+        for depth in range(1, max_depth + 1):
+            start = time.perf_counter()
+            nodes = perft(position, depth)
+            elapsed = time.perf_counter() - start
+            ok = nodes == expected[depth - 1]
+            failures += not ok
+            nps = nodes / elapsed if elapsed else 0
+            print(f"  depth {depth}: {nodes:>9} nodes  {elapsed:7.2f} s  {nps:>9.0f} nps  "
+                  f"{'ok' if ok else f'FAIL (expected {expected[depth - 1]})'}")
+        if position.fen() != Position(fen).fen():
+            print("  FAIL: make/unmake did not restore the position")
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
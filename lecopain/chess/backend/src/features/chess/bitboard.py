@@ -0,0 +1,122 @@
+# src/features/chess/bitboard.py
+"""
+Bitboard helpers: one Python int per set of squares, a1 = bit 0, h1 = bit 7, h8 = bit 63.
+
+Leaper attacks (pawn, knight, king) are precomputed per square. Slider attacks use the
+classical ray approach: the ray in a direction is cut at its first blocker, found with a
+bit scan (lowest set bit for directions that increase the square index, highest otherwise).
+"""
+FULL = (1 << 64) - 1
+
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+SQUARE_NAMES = [f"{'abcdefgh'[sq % 8]}{sq // 8 + 1}" for sq in range(64)]
+SQUARES = {name: sq for sq, name in enumerate(SQUARE_NAMES)}
+
+
+def lsb(bb: int) -> int:
+    """Index of the lowest set bit."""
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb: int) -> int:
+    """Index of the highest set bit."""
+    return bb.bit_length() - 1
+
+
+def squares(bb: int):
+    """Yields the index of every set bit, lowest first."""
+    while bb:
+        bit = bb & -bb
+        yield bit.bit_length() - 1
+        bb ^= bit
+
+
+def popcount(bb: int) -> int:
+    return bb.bit_count()
+
+
+def _leaper_attacks(sq: int, deltas) -> int:
+    rank, file = divmod(sq, 8)
+    bb = 0
+    for d_rank, d_file in deltas:
+        r, f = rank + d_rank, file + d_file
+        if 0 <= r < 8 and 0 <= f < 8:
+            bb |= 1 << (r * 8 + f)
+    return bb
+
+
+def _ray(sq: int, d_rank: int, d_file: int) -> int:
+    rank, file = divmod(sq, 8)
+    bb = 0
+    r, f = rank + d_rank, file + d_file
+    while 0 <= r < 8 and 0 <= f < 8:
+        bb |= 1 << (r * 8 + f)
+        r, f = r + d_rank, f + d_file
+    return bb
+
+
+KNIGHT_DELTAS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+KING_DELTAS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+KNIGHT_ATTACKS = [_leaper_attacks(sq, KNIGHT_DELTAS) for sq in range(64)]
+KING_ATTACKS = [_leaper_attacks(sq, KING_DELTAS) for sq in range(64)]
+# PAWN_ATTACKS[color][sq]: squares attacked by a pawn of `color` standing on sq
+PAWN_ATTACKS = [
+    [_leaper_attacks(sq, ((1, -1), (1, 1))) for sq in range(64)],
+    [_leaper_attacks(sq, ((-1, -1), (-1, 1))) for sq in range(64)],
+]
+
+# Rays towards increasing square indices (first blocker = lowest bit) ...
+RAY_N = [_ray(sq, 1, 0) for sq in range(64)]
+RAY_E = [_ray(sq, 0, 1) for sq in range(64)]
+RAY_NE = [_ray(sq, 1, 1) for sq in range(64)]
+RAY_NW = [_ray(sq, 1, -1) for sq in range(64)]
+# ... and towards decreasing ones (first blocker = highest bit)
+RAY_S = [_ray(sq, -1, 0) for sq in range(64)]
+RAY_W = [_ray(sq, 0, -1) for sq in range(64)]
+RAY_SE = [_ray(sq, -1, 1) for sq in range(64)]
+RAY_SW = [_ray(sq, -1, -1) for sq in range(64)]
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    attacks = 0
+    for rays in (RAY_N, RAY_E):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (RAY_S, RAY_W):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    attacks = 0
+    for rays in (RAY_NE, RAY_NW):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (RAY_SE, RAY_SW):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
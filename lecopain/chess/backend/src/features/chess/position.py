@@ -0,0 +1,457 @@
+# src/features/chess/position.py
+"""
+Board state, bitboard move generation and make/unmake.
+
+A position keeps one bitboard per (color, piece type), the occupancy of each color, a
+mailbox of the 64 squares (to find the captured piece in O(1)) and an incremental Zobrist
+hash used by the transposition table and repetition detection.
+
+Moves are packed in an int: from square (bits 0-5), to square (6-11), promotion piece
+type (12-14, 0 if none) and a flag (15-16): normal, double pawn push, en passant, castling.
+Move generation is pseudo-legal; a move is legal if the mover's king is not attacked
+after make_move (see king_safe()).
+"""
+import random
+
+from .bitboard import (
+    FULL, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, RANK_1, RANK_3, RANK_6, RANK_8,
+    SQUARE_NAMES, SQUARES, bishop_attacks, lsb, rook_attacks, squares,
+)
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+NO_PIECE = -1
+
+PIECE_LETTERS = "PNBRQKpnbrqk"  # index = color * 6 + piece type
+
+NORMAL, DOUBLE_PUSH, EN_PASSANT, CASTLE = range(4)
+NULL_MOVE = 0
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+E1, F1, G1, D1, C1, B1, H1, A1 = (SQUARES[s] for s in ("e1", "f1", "g1", "d1", "c1", "b1", "h1", "a1"))
+E8, F8, G8, D8, C8, B8, H8, A8 = (SQUARES[s] for s in ("e8", "f8", "g8", "d8", "c8", "b8", "h8", "a8"))
+
+# King destination -> (rook from, rook to)
+CASTLE_ROOK = {G1: (H1, F1), C1: (A1, D1), G8: (H8, F8), C8: (A8, D8)}
+
+# Rights kept when a piece moves from or to a square (king and rook squares clear theirs)
+CASTLE_MASK = [15] * 64
+CASTLE_MASK[E1] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLE_MASK[H1] &= ~WHITE_KINGSIDE
+CASTLE_MASK[A1] &= ~WHITE_QUEENSIDE
+CASTLE_MASK[E8] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLE_MASK[H8] &= ~BLACK_KINGSIDE
+CASTLE_MASK[A8] &= ~BLACK_QUEENSIDE
+
+# --- Zobrist keys (fixed seed: hashes are stable across runs) ---
+_rng = random.Random(0x5EED)
+ZOBRIST_PIECE = [[_rng.getrandbits(64) for _ in range(64)] for _ in range(12)]
+ZOBRIST_SIDE = _rng.getrandbits(64)
+ZOBRIST_CASTLING = [_rng.getrandbits(64) for _ in range(16)]
+ZOBRIST_EP = [_rng.getrandbits(64) for _ in range(8)]
+
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+
+def make_move_code(frm: int, to: int, promotion: int = 0, flag: int = NORMAL) -> int:
+    return frm | (to << 6) | (promotion << 12) | (flag << 15)
+
+
+def move_from(move: int) -> int:
+    return move & 63
+
+
+def move_to(move: int) -> int:
+    return (move >> 6) & 63
+
+
+def move_promotion(move: int) -> int:
+    return (move >> 12) & 7
+
+
+def move_flag(move: int) -> int:
+    return move >> 15
+
+
+def move_to_uci(move: int) -> str:
+    uci = SQUARE_NAMES[move & 63] + SQUARE_NAMES[(move >> 6) & 63]
+    promotion = (move >> 12) & 7
+    return uci + "nbrq"[promotion - 1] if promotion else uci
+
+
+class Position:
+    __slots__ = ("pieces", "occupancy", "board", "side", "castling", "ep", "halfmove", "fullmove", "hash", "_stack", "_history")
+
+    def __init__(self, fen: str = START_FEN):
+        self.pieces = [0] * 12
+        self.occupancy = [0, 0]
+        self.board = [NO_PIECE] * 64
+        self._stack = []
+        self._history = []  # hashes of the previous positions, for repetitions
+        self._load_fen(fen)
+
+    # --- FEN ---
+
+    def _load_fen(self, fen: str):
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"FEN needs at least 4 fields, got {len(fields)}")
+        ranks = fields[0].split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"FEN board needs 8 ranks, got {len(ranks)}")
+        for i, rank in enumerate(ranks):
+            file = 0
+            for char in rank:
+                if char.isdigit():
+                    file += int(char)
+                elif char in PIECE_LETTERS and file < 8:
+                    self._put(PIECE_LETTERS.index(char), (7 - i) * 8 + file)
+                    file += 1
+                else:
+                    raise ValueError(f"Invalid FEN rank: {rank!r}")
+            if file != 8:
+                raise ValueError(f"FEN rank {rank!r} does not have 8 squares")
+        for color in (WHITE, BLACK):
+            if self.pieces[color * 6 + KING].bit_count() != 1:
+                raise ValueError("Each side needs exactly one king")
+
+        if fields[1] not in ("w", "b"):
+            raise ValueError(f"Invalid side to move: {fields[1]!r}")
+        self.side = WHITE if fields[1] == "w" else BLACK
+        self.castling = 0
+        if fields[2] != "-":
+            for char in fields[2]:
+                index = "KQkq".find(char)
+                if index < 0:
+                    raise ValueError(f"Invalid castling rights: {fields[2]!r}")
+                self.castling |= 1 << index
+        if fields[3] == "-":
+            self.ep = -1
+        elif fields[3] in SQUARES:
+            self.ep = SQUARES[fields[3]]
+        else:
+            raise ValueError(f"Invalid en passant square: {fields[3]!r}")
+        self.halfmove = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove = int(fields[5]) if len(fields) > 5 else 1
+        self.hash = self._compute_hash()
+        if self.is_attacked(lsb(self.pieces[(self.side ^ 1) * 6 + KING]), self.side):
+            raise ValueError("The side not to move is in check")
+
+    def _put(self, piece: int, sq: int):
+        self.pieces[piece] |= 1 << sq
+        self.occupancy[piece // 6] |= 1 << sq
+        self.board[sq] = piece
+
+    def _compute_hash(self) -> int:
+        h = 0
+        for sq, piece in enumerate(self.board):
+            if piece != NO_PIECE:
+                h ^= ZOBRIST_PIECE[piece][sq]
+        if self.side == BLACK:
+            h ^= ZOBRIST_SIDE
+        h ^= ZOBRIST_CASTLING[self.castling]
+        if self.ep >= 0:
+            h ^= ZOBRIST_EP[self.ep & 7]
+        return h
+
+    def fen(self) -> str:
+        rows = []
+        for rank in range(7, -1, -1):
+            row, empty = "", 0
+            for file in range(8):
+                piece = self.board[rank * 8 + file]
+                if piece == NO_PIECE:
+                    empty += 1
+                    continue
+                if empty:
+                    row, empty = row + str(empty), 0
+                row += PIECE_LETTERS[piece]
+            rows.append(row + (str(empty) if empty else ""))
+        castling = "".join(c for i, c in enumerate("KQkq") if self.castling & (1 << i)) or "-"
+        ep = SQUARE_NAMES[self.ep] if self.ep >= 0 else "-"
+        return f"{'/'.join(rows)} {'wb'[self.side]} {castling} {ep} {self.halfmove} {self.fullmove}"
+
+    # --- Attacks ---
+
+    def is_attacked(self, sq: int, by: int) -> bool:
+        """Whether side `by` attacks square `sq`."""
+        pieces = self.pieces
+        base = by * 6
+        if PAWN_ATTACKS[by ^ 1][sq] & pieces[base + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & pieces[base + KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & pieces[base + KING]:
+            return True
+        occupied = self.occupancy[0] | self.occupancy[1]
+        diagonal = pieces[base + BISHOP] | pieces[base + QUEEN]
+        if diagonal and bishop_attacks(sq, occupied) & diagonal:
+            return True
+        straight = pieces[base + ROOK] | pieces[base + QUEEN]
+        return bool(straight and rook_attacks(sq, occupied) & straight)
+
+    def in_check(self) -> bool:
+        return self.is_attacked(lsb(self.pieces[self.side * 6 + KING]), self.side ^ 1)
+
+    def king_safe(self) -> bool:
+        """After make_move: the side that just moved did not leave its king in check."""
+        return not self.is_attacked(lsb(self.pieces[(self.side ^ 1) * 6 + KING]), self.side)
+
+    # --- Move generation ---
+
+    def generate_moves(self, captures_only: bool = False) -> list[int]:
+        """
+        Pseudo-legal moves. With `captures_only`, captures and queen promotions
+        (the moves searched by quiescence).
+        """
+        moves = []
+        append = moves.append
+        us = self.side
+        base = us * 6
+        pieces = self.pieces
+        own = self.occupancy[us]
+        enemy = self.occupancy[us ^ 1]
+        occupied = own | enemy
+        empty = ~occupied & FULL
+        targets = enemy if captures_only else ~own & FULL
+
+        # Pawns
+        pawns = pieces[base + PAWN]
+        if us == WHITE:
+            single = (pawns << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+            push, promotion_rank = 8, RANK_8
+        else:
+            single = (pawns >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+            push, promotion_rank = -8, RANK_1
+        for to in squares(single & promotion_rank):
+            for promotion in (PROMOTIONS[:1] if captures_only else PROMOTIONS):
+                append((to - push) | (to << 6) | (promotion << 12))
+        if not captures_only:
+            for to in squares(single & ~promotion_rank):
+                append((to - push) | (to << 6))
+            for to in squares(double):
+                append((to - 2 * push) | (to << 6) | (DOUBLE_PUSH << 15))
+        pawn_attacks = PAWN_ATTACKS[us]
+        ep_bit = 1 << self.ep if self.ep >= 0 else 0
+        for frm in squares(pawns):
+            attacks = pawn_attacks[frm]
+            for to in squares(attacks & enemy):
+                if (1 << to) & promotion_rank:
+                    for promotion in PROMOTIONS:
+                        append(frm | (to << 6) | (promotion << 12))
+                else:
+                    append(frm | (to << 6))
+            if attacks & ep_bit:
+                append(frm | (self.ep << 6) | (EN_PASSANT << 15))
+
+        # Pieces
+        for frm in squares(pieces[base + KNIGHT]):
+            for to in squares(KNIGHT_ATTACKS[frm] & targets):
+                append(frm | (to << 6))
+        for frm in squares(pieces[base + BISHOP]):
+            for to in squares(bishop_attacks(frm, occupied) & targets):
+                append(frm | (to << 6))
+        for frm in squares(pieces[base + ROOK]):
+            for to in squares(rook_attacks(frm, occupied) & targets):
+                append(frm | (to << 6))
+        for frm in squares(pieces[base + QUEEN]):
+            for to in squares((rook_attacks(frm, occupied) | bishop_attacks(frm, occupied)) & targets):
+                append(frm | (to << 6))
+        king = lsb(pieces[base + KING])
+        for to in squares(KING_ATTACKS[king] & targets):
+            append(king | (to << 6))
+
+        # Castling: path empty, and the king does not start in, cross or land on an attacked square
+        if not captures_only and self.castling:
+            them = us ^ 1
+            rooks = pieces[base + ROOK]
+            if us == WHITE:
+                if (self.castling & WHITE_KINGSIDE and rooks >> H1 & 1 and not occupied & (1 << F1 | 1 << G1)
+                        and not any(self.is_attacked(sq, them) for sq in (E1, F1, G1))):
+                    append(E1 | (G1 << 6) | (CASTLE << 15))
+                if (self.castling & WHITE_QUEENSIDE and rooks >> A1 & 1 and not occupied & (1 << B1 | 1 << C1 | 1 << D1)
+                        and not any(self.is_attacked(sq, them) for sq in (E1, D1, C1))):
+                    append(E1 | (C1 << 6) | (CASTLE << 15))
+            else:
+                if (self.castling & BLACK_KINGSIDE and rooks >> H8 & 1 and not occupied & (1 << F8 | 1 << G8)
+                        and not any(self.is_attacked(sq, them) for sq in (E8, F8, G8))):
+                    append(E8 | (G8 << 6) | (CASTLE << 15))
+                if (self.castling & BLACK_QUEENSIDE and rooks >> A8 & 1 and not occupied & (1 << B8 | 1 << C8 | 1 << D8)
+                        and not any(self.is_attacked(sq, them) for sq in (E8, D8, C8))):
+                    append(E8 | (C8 << 6) | (CASTLE << 15))
+        return moves
+
+    def legal_moves(self) -> list[int]:
+        legal = []
+        for move in self.generate_moves():
+            self.make_move(move)
+            if self.king_safe():
+                legal.append(move)
+            self.unmake_move()
+        return legal
+
+    def parse_uci(self, uci: str) -> int:
+        """The legal move written `uci` (e.g. 'e2e4', 'e7e8q'); ValueError if there is none."""
+        for move in self.legal_moves():
+            if move_to_uci(move) == uci.strip().lower():
+                return move
+        raise ValueError(f"Illegal move {uci!r} in {self.fen()}")
+
+    # --- Make / unmake ---
+
+    def make_move(self, move: int):
+        frm = move & 63
+        to = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        flag = move >> 15
+        board = self.board
+        pieces = self.pieces
+        occupancy = self.occupancy
+        us = self.side
+        them = us ^ 1
+        piece = board[frm]
+        captured = board[to]
+        h = self.hash
+
+        self._stack.append((move, captured, self.castling, self.ep, self.halfmove, h))
+        self._history.append(h)
+        if self.ep >= 0:
+            h ^= ZOBRIST_EP[self.ep & 7]
+
+        from_to = (1 << frm) | (1 << to)
+        pieces[piece] ^= from_to
+        occupancy[us] ^= from_to
+        board[frm] = NO_PIECE
+        board[to] = piece
+        h ^= ZOBRIST_PIECE[piece][frm] ^ ZOBRIST_PIECE[piece][to]
+        if captured != NO_PIECE:
+            pieces[captured] ^= 1 << to
+            occupancy[them] ^= 1 << to
+            h ^= ZOBRIST_PIECE[captured][to]
+            self.halfmove = 0
+        elif piece == us * 6 + PAWN:
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+
+        self.ep = -1
+        if flag == DOUBLE_PUSH:
+            self.ep = (frm + to) >> 1
+            h ^= ZOBRIST_EP[self.ep & 7]
+        elif flag == EN_PASSANT:
+            captured_sq = to - 8 if us == WHITE else to + 8
+            captured_pawn = them * 6 + PAWN
+            pieces[captured_pawn] ^= 1 << captured_sq
+            occupancy[them] ^= 1 << captured_sq
+            board[captured_sq] = NO_PIECE
+            h ^= ZOBRIST_PIECE[captured_pawn][captured_sq]
+        elif flag == CASTLE:
+            rook_from, rook_to = CASTLE_ROOK[to]
+            rook = us * 6 + ROOK
+            pieces[rook] ^= (1 << rook_from) | (1 << rook_to)
+            occupancy[us] ^= (1 << rook_from) | (1 << rook_to)
+            board[rook_from] = NO_PIECE
+            board[rook_to] = rook
+            h ^= ZOBRIST_PIECE[rook][rook_from] ^ ZOBRIST_PIECE[rook][rook_to]
+
+        if promotion:
+            promoted = us * 6 + promotion
+            pieces[piece] ^= 1 << to
+            pieces[promoted] ^= 1 << to
+            board[to] = promoted
+            h ^= ZOBRIST_PIECE[piece][to] ^ ZOBRIST_PIECE[promoted][to]
+
+        castling = self.castling & CASTLE_MASK[frm] & CASTLE_MASK[to]
+        if castling != self.castling:
+            h ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+            self.castling = castling
+
+        if us == BLACK:
+            self.fullmove += 1
+        self.side = them
+        self.hash = h ^ ZOBRIST_SIDE
+
+    def unmake_move(self):
+        move, captured, self.castling, self.ep, self.halfmove, self.hash = self._stack.pop()
+        self._history.pop()
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 15
+        board = self.board
+        pieces = self.pieces
+        occupancy = self.occupancy
+        self.side ^= 1
+        us = self.side
+        them = us ^ 1
+        if us == BLACK:
+            self.fullmove -= 1
+
+        piece = board[to]
+        if move >> 12 & 7:
+            pawn = us * 6 + PAWN
+            pieces[piece] ^= 1 << to
+            pieces[pawn] ^= 1 << to
+            piece = pawn
+        from_to = (1 << frm) | (1 << to)
+        pieces[piece] ^= from_to
+        occupancy[us] ^= from_to
+        board[frm] = piece
+        board[to] = captured
+        if captured != NO_PIECE:
+            pieces[captured] ^= 1 << to
+            occupancy[them] ^= 1 << to
+
+        if flag == EN_PASSANT:
+            captured_sq = to - 8 if us == WHITE else to + 8
+            captured_pawn = them * 6 + PAWN
+            pieces[captured_pawn] ^= 1 << captured_sq
+            occupancy[them] ^= 1 << captured_sq
+            board[captured_sq] = captured_pawn
+        elif flag == CASTLE:
+            rook_from, rook_to = CASTLE_ROOK[to]
+            rook = us * 6 + ROOK
+            pieces[rook] ^= (1 << rook_from) | (1 << rook_to)
+            occupancy[us] ^= (1 << rook_from) | (1 << rook_to)
+            board[rook_to] = NO_PIECE
+            board[rook_from] = rook
+
+    # --- Draws ---
+
+    def is_repetition(self) -> bool:
+        """The position occurred before (since the last capture or pawn move)."""
+        history = self._history
+        # Only positions with the same side to move, within the reversible moves
+        for i in range(len(history) - 2, max(len(history) - self.halfmove, 0) - 1, -2):
+            if history[i] == self.hash:
+                return True
+        return False
+
+    def repetition_count(self) -> int:
+        return 1 + sum(1 for h in self._history[-self.halfmove:] if h == self.hash) if self.halfmove else 1
+
+    def insufficient_material(self) -> bool:
+        """Only kings, plus at most one minor piece on the board."""
+        pieces = self.pieces
+        for color in (WHITE, BLACK):
+            base = color * 6
+            if pieces[base + PAWN] or pieces[base + ROOK] or pieces[base + QUEEN]:
+                return False
+        minors = pieces[KNIGHT] | pieces[BISHOP] | pieces[6 + KNIGHT] | pieces[6 + BISHOP]
+        return minors & (minors - 1) == 0
+
+    def status(self) -> str:
+        """'checkmate', 'stalemate', 'fifty_moves', 'threefold_repetition', 'insufficient_material' or 'in_progress'."""
+        if not self.legal_moves():
+            return "checkmate" if self.in_check() else "stalemate"
+        if self.halfmove >= 100:
+            return "fifty_moves"
+        if self.repetition_count() >= 3:
+            return "threefold_repetition"
+        if self.insufficient_material():
+            return "insufficient_material"
+        return "in_progress"
@@ -0,0 +1,50 @@
+# src/features/chess/router.py
+import logging
+from fastapi import APIRouter, HTTPException, Body
+
+from .schema import LegalMovesResponse, MoveRequest, MoveResponse, PositionRequest
+from .services import choose_move, legal_moves
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post(
+    "/move",
+    response_model=MoveResponse,
+    summary="Get the Engine's Move",
+    description="Searches the position within the time budget and returns the best move found.",
+)
+async def http_move(
+    request_data: MoveRequest = Body(...)
+):
+    """
+    Endpoint for the robot's turn. The search never exceeds `time_ms`.
+    """
+    try:
+        result = await choose_move(request_data.fen, request_data.moves, request_data.time_ms)
+        return MoveResponse(**result)
+    except HTTPException as e:
+        # Re-raise HTTP exceptions (400 for invalid positions or finished games)
+        raise e
+    except Exception as e:
+        logger.exception("Unexpected error while searching a move.")
+        return MoveResponse(error=f"An unexpected server error occurred: {type(e).__name__}")
+
+
+@router.post(
+    "/legal_moves",
+    response_model=LegalMovesResponse,
+    summary="List Legal Moves",
+    description="Legal moves and game status of a position, to validate the player's move.",
+)
+async def http_legal_moves(
+    request_data: PositionRequest = Body(...)
+):
+    try:
+        return LegalMovesResponse(**legal_moves(request_data.fen, request_data.moves))
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.exception("Unexpected error while listing legal moves.")
+        return LegalMovesResponse(error=f"An unexpected server error occurred: {type(e).__name__}")
@@ -0,0 +1,36 @@
+# src/features/chess/schema.py
+from pydantic import BaseModel, Field
+from typing import List
+
+class PositionRequest(BaseModel):
+    """A position: a FEN, then moves played from it."""
+    fen: str | None = Field(None, description="Starting FEN (the initial position if omitted).")
+    moves: List[str] = Field(default_factory=list, description="Moves played since `fen`, in UCI notation (e.g. 'e2e4', 'e7e8q').")
+
+class MoveRequest(PositionRequest):
+    """Request model for asking the engine's move."""
+    time_ms: int | None = Field(None, description="Hard time budget for the search in milliseconds (server default if omitted).")
+
+class MoveResponse(BaseModel):
+    """Response model for the engine's move."""
+    move: str = Field("", description="The move in UCI notation.")
+    from_square: str = ""
+    to_square: str = ""
+    promotion: str | None = None
+    score_cp: int | None = Field(None, description="Evaluation in centipawns for the side that moved (None when a mate was found).")
+    mate_in: int | None = Field(None, description="Moves to mate, negative if the engine gets mated.")
+    depth: int = Field(0, description="Last fully searched depth.")
+    nodes: int = 0
+    time_ms: float = 0.0
+    pv: List[str] = Field(default_factory=list, description="Expected continuation, starting with the move.")
+    fen: str = Field("", description="The position after the move.")
+    status: str = Field("", description="Game status after the move.")
+    error: str | None = None
+
+class LegalMovesResponse(BaseModel):
+    """Response model for the legal moves of a position."""
+    moves: List[str] = Field(default_factory=list)
+    fen: str = ""
+    status: str = ""
+    in_check: bool = False
+    error: str | None = None
@@ -0,0 +1,379 @@
+# src/features/chess/search.py
+"""
+Iterative deepening alpha-beta (principal variation search) under a hard time budget.
+
+- Transposition table: fixed-size list indexed by the low bits of the Zobrist hash
+  (always-replace), storing depth, score, bound type and best move. It is kept between
+  searches, so the next move of a game starts with a warm table.
+- Move ordering: table move, captures by MVV-LVA, killer moves, history heuristic.
+- Quiescence search on captures and queen promotions, check extension.
+- The clock is checked every few hundred nodes; when the deadline passes, the running
+  iteration is abandoned and the best move of the last completed depth is played. A new
+  depth is not started when it would most likely not finish in the remaining time.
+"""
+import os
+import time
+from dataclasses import dataclass, field
+
+from .bitboard import squares
+from .position import BISHOP, KING, KNIGHT, NO_PIECE, PAWN, QUEEN, ROOK, WHITE, Position, move_to_uci
+
+MATE = 30000
+MATE_BOUND = MATE - 1000  # scores beyond are mates, stored relative to the node in the table
+INFINITY = MATE + 1
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Nodes between two clock checks (mask): about 10 ms of search in CPython
+CLOCK_CHECK_MASK = 255
+# A new depth costs several times the previous one: only start it if this fraction of the budget is left
+NEXT_DEPTH_BUDGET_FRACTION = 0.5
+
+CHESS_TT_BITS = int(os.getenv("CHESS_TT_BITS", "20"))  # 2^20 entries, about 100 MB once full
+
+# --- Evaluation: material + piece-square tables, tapered king safety ---
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+
+# From white's point of view, rank 8 first (as printed on a diagram)
+_PST = {
+    PAWN: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ),
+    KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    ROOK: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ),
+    QUEEN: (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ),
+}
+_KING_MIDDLEGAME = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+)
+_KING_ENDGAME = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+)
+
+
+def _by_square(table, color: int) -> list[int]:
+    """Diagram-ordered table -> per square (a1 = 0) for `color`."""
+    if color == WHITE:
+        return [table[(7 - sq // 8) * 8 + sq % 8] for sq in range(64)]
+    return [table[(sq // 8) * 8 + sq % 8] for sq in range(64)]
+
+
+# PIECE_SQUARE[piece][sq]: material + placement, from white's point of view (black pieces negative)
+PIECE_SQUARE = [[0] * 64 for _ in range(12)]
+KING_SQUARE = [None, None]  # (middlegame, endgame) per color, same sign convention
+for _color, _sign in ((0, 1), (1, -1)):
+    for _piece, _table in _PST.items():
+        PIECE_SQUARE[_color * 6 + _piece] = [_sign * (PIECE_VALUES[_piece] + v) for v in _by_square(_table, _color)]
+    KING_SQUARE[_color] = (
+        [_sign * v for v in _by_square(_KING_MIDDLEGAME, _color)],
+        [_sign * v for v in _by_square(_KING_ENDGAME, _color)],
+    )
+
+# Game phase from the remaining pieces: 24 at the start, 0 with kings and pawns only
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+
+def evaluate(pos: Position) -> int:
+    """Static evaluation in centipawns, from the point of view of the side to move."""
+    pieces = pos.pieces
+    score = 0
+    phase = 0
+    for piece in range(12):
+        bb = pieces[piece]
+        if not bb or piece % 6 == KING:
+            continue
+        table = PIECE_SQUARE[piece]
+        for sq in squares(bb):
+            score += table[sq]
+        phase += PHASE_WEIGHTS[piece % 6] * bb.bit_count()
+    phase = min(phase, MAX_PHASE)
+    for color in (0, 1):
+        king = (pieces[color * 6 + KING]).bit_length() - 1
+        middlegame, endgame = KING_SQUARE[color]
+        score += (middlegame[king] * phase + endgame[king] * (MAX_PHASE - phase)) // MAX_PHASE
+    return score if pos.side == WHITE else -score
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@dataclass
+class SearchResult:
+    move: int  # 0 if there is no legal move
+    score: int  # centipawns, side to move; beyond MATE_BOUND, a mate
+    depth: int  # last completed depth
+    nodes: int
+    elapsed_s: float
+    pv: list[int] = field(default_factory=list)
+
+    @property
+    def mate_in(self) -> int | None:
+        """Moves to mate (negative if the side to move gets mated), None if no mate was found."""
+        if abs(self.score) < MATE_BOUND:
+            return None
+        plies = MATE - abs(self.score)
+        return (plies + 1) // 2 if self.score > 0 else -(plies // 2)
+
+
+class Searcher:
+    """Not thread-safe: one search at a time per instance (the table is shared between searches)."""
+
+    def __init__(self, tt_bits: int = CHESS_TT_BITS, max_ply: int = 128):
+        self.tt_mask = (1 << tt_bits) - 1
+        self.tt = [None] * (1 << tt_bits)
+        self.max_ply = max_ply
+        self.nodes = 0
+        self.deadline = 0.0
+        self.root_move = 0
+        self.killers = [[0, 0] for _ in range(max_ply)]
+        self.history = [[0] * 64 for _ in range(12)]
+
+    def clear(self):
+        self.tt = [None] * (self.tt_mask + 1)
+
+    # --- Public API ---
+
+    def search(self, pos: Position, time_budget_s: float, max_depth: int = 64) -> SearchResult:
+        """Best move within `time_budget_s` (hard limit). `pos` is restored before returning."""
+        start = time.perf_counter()
+        self.deadline = start + time_budget_s
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(self.max_ply)]
+        self.history = [[0] * 64 for _ in range(12)]
+
+        legal = pos.legal_moves()
+        if not legal:
+            return SearchResult(0, -MATE if pos.in_check() else 0, 0, 0, time.perf_counter() - start)
+        best = SearchResult(self._order(pos, legal, 0, 0)[0], 0, 0, 0, 0.0)
+        if len(legal) == 1:
+            best.elapsed_s = time.perf_counter() - start
+            best.pv = [best.move]
+            return best
+
+        for depth in range(1, max_depth + 1):
+            stack_depth = len(pos._stack)
+            try:
+                score = self._negamax(pos, depth, -INFINITY, INFINITY, 0)
+            except SearchTimeout:
+                # Unwind the moves the interrupted iteration left on the board
+                while len(pos._stack) > stack_depth:
+                    pos.unmake_move()
+                break
+            best = SearchResult(self.root_move, score, depth, self.nodes, 0.0)
+            elapsed = time.perf_counter() - start
+            if abs(score) >= MATE_BOUND or elapsed > time_budget_s * NEXT_DEPTH_BUDGET_FRACTION:
+                break
+
+        best.nodes = self.nodes
+        best.elapsed_s = time.perf_counter() - start
+        best.pv = self.principal_variation(pos, best.move, best.depth)
+        return best
+
+    def principal_variation(self, pos: Position, first_move: int, max_length: int) -> list[int]:
+        """The expected line, followed through the table from `first_move`."""
+        pv = []
+        move = first_move
+        while move and len(pv) < max(max_length, 1) and move in pos.legal_moves():
+            pv.append(move)
+            pos.make_move(move)
+            entry = self.tt[pos.hash & self.tt_mask]
+            move = entry[4] if entry is not None and entry[0] == pos.hash else 0
+        for _ in pv:
+            pos.unmake_move()
+        return pv
+
+    # --- Search ---
+
+    def _negamax(self, pos: Position, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & CLOCK_CHECK_MASK and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        if ply and (pos.halfmove >= 100 or pos.is_repetition()):
+            return 0
+        if ply >= self.max_ply - 1:
+            return evaluate(pos)
+
+        in_check = pos.in_check()
+        if in_check:
+            depth += 1
+        if depth <= 0:
+            return self._quiesce(pos, alpha, beta, ply)
+
+        h = pos.hash
+        index = h & self.tt_mask
+        entry = self.tt[index]
+        tt_move = 0
+        if entry is not None and entry[0] == h:
+            tt_move = entry[4]
+            if ply and entry[1] >= depth:
+                score = _score_from_tt(entry[2], ply)
+                bound = entry[3]
+                if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                    return score
+
+        alpha_start = alpha
+        best_score = -INFINITY
+        best_move = 0
+        legal = 0
+        for move in self._order(pos, pos.generate_moves(), tt_move, ply):
+            pos.make_move(move)
+            if not pos.king_safe():
+                pos.unmake_move()
+                continue
+            legal += 1
+            if legal == 1:
+                score = -self._negamax(pos, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Null window first: most later moves only need to be proven worse
+                score = -self._negamax(pos, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self._negamax(pos, depth - 1, -beta, -alpha, ply + 1)
+            pos.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if pos.board[(move >> 6) & 63] == NO_PIECE and not move >> 12 & 7:
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1], killers[0] = killers[0], move
+                            self.history[pos.board[move & 63]][(move >> 6) & 63] += depth * depth
+                        break
+
+        if not legal:
+            return -MATE + ply if in_check else 0
+
+        if not ply:
+            self.root_move = best_move
+        bound = LOWER if best_score >= beta else EXACT if best_score > alpha_start else UPPER
+        self.tt[index] = (h, depth, _score_to_tt(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiesce(self, pos: Position, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & CLOCK_CHECK_MASK and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        stand_pat = evaluate(pos)
+        if stand_pat >= beta or ply >= self.max_ply - 1:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        for move in self._order(pos, pos.generate_moves(captures_only=True), 0, ply):
+            pos.make_move(move)
+            if not pos.king_safe():
+                pos.unmake_move()
+                continue
+            score = -self._quiesce(pos, -beta, -alpha, ply + 1)
+            pos.unmake_move()
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def _order(self, pos: Position, moves: list[int], tt_move: int, ply: int) -> list[int]:
+        board = pos.board
+        killers = self.killers[ply] if ply < self.max_ply else (0, 0)
+        history = self.history
+
+        def priority(move: int) -> int:
+            if move == tt_move:
+                return 1 << 30
+            victim = board[(move >> 6) & 63]
+            if victim != NO_PIECE:
+                # MVV-LVA: most valuable victim first, then least valuable attacker
+                return (1 << 28) + PIECE_VALUES[victim % 6] * 16 - PIECE_VALUES[board[move & 63] % 6] // 16
+            if move >> 12 & 7:
+                return (1 << 27) + (move >> 12 & 7)
+            if move == killers[0]:
+                return 1 << 26
+            if move == killers[1]:
+                return (1 << 26) - 1
+            return history[board[move & 63]][(move >> 6) & 63]
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    # Mates are stored as distance from the node, not from the root
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def format_pv(pv: list[int]) -> list[str]:
+    return [move_to_uci(move) for move in pv]
@@ -0,0 +1,95 @@
+# src/features/chess/services.py
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from fastapi import HTTPException
+
+from .bitboard import SQUARE_NAMES
+from .position import START_FEN, Position, move_from, move_promotion, move_to, move_to_uci
+from .search import Searcher, format_pv
+
+logger = logging.getLogger(__name__)
+
+# --- Time budget ---
+CHESS_MOVE_TIME_MS = int(os.getenv("CHESS_MOVE_TIME_MS", "1000"))  # default per-move budget
+CHESS_MAX_MOVE_TIME_MS = int(os.getenv("CHESS_MAX_MOVE_TIME_MS", "10000"))  # cap on a requested budget
+CHESS_MAX_DEPTH = int(os.getenv("CHESS_MAX_DEPTH", "64"))
+MIN_MOVE_TIME_MS = 10
+
+# One search at a time: the searcher and its transposition table are shared between
+# requests, and a single worker keeps each search's budget from being eaten by another one
+searcher = Searcher()
+search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chess-search")
+
+
+def load_position(fen: str | None, moves: List[str]) -> Position:
+    """
+    Position after playing `moves` (UCI) from `fen` (the initial position if None).
+
+    Raises:
+        HTTPException 400 if the FEN or a move is invalid.
+    """
+    try:
+        position = Position(fen or START_FEN)
+        for uci in moves:
+            position.make_move(position.parse_uci(uci))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return position
+
+
+def _search(position: Position, time_ms: int) -> dict:
+    result = searcher.search(position, time_ms / 1000, CHESS_MAX_DEPTH)
+    move = result.move
+    position.make_move(move)
+    status = position.status()
+    fen_after = position.fen()
+    logger.info(
+        "Played %s (depth %s, score %s, %s nodes in %.0f ms, %.0f nps)",
+        move_to_uci(move), result.depth, result.score, result.nodes, result.elapsed_s * 1000,
+        result.nodes / result.elapsed_s if result.elapsed_s else 0,
+    )
+    promotion = move_promotion(move)
+    return {
+        "move": move_to_uci(move),
+        "from_square": SQUARE_NAMES[move_from(move)],
+        "to_square": SQUARE_NAMES[move_to(move)],
+        "promotion": "nbrq"[promotion - 1] if promotion else None,
+        "score_cp": None if result.mate_in is not None else result.score,
+        "mate_in": result.mate_in,
+        "depth": result.depth,
+        "nodes": result.nodes,
+        "time_ms": round(result.elapsed_s * 1000, 1),
+        "pv": format_pv(result.pv),
+        "fen": fen_after,
+        "status": status,
+    }
+
+
+async def choose_move(fen: str | None, moves: List[str], time_ms: int | None) -> dict:
+    """
+    Engine move for the side to move, found within `time_ms` (CHESS_MOVE_TIME_MS by default).
+
+    Raises:
+        HTTPException 400 if the position is invalid or the game is already over.
+    """
+    position = load_position(fen, moves)
+    status = position.status()
+    if status != "in_progress":
+        raise HTTPException(status_code=400, detail=f"The game is over ({status}).")
+    budget_ms = min(max(time_ms or CHESS_MOVE_TIME_MS, MIN_MOVE_TIME_MS), CHESS_MAX_MOVE_TIME_MS)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor, _search, position, budget_ms)
+
+
+def legal_moves(fen: str | None, moves: List[str]) -> dict:
+    position = load_position(fen, moves)
+    return {
+        "moves": sorted(move_to_uci(move) for move in position.legal_moves()),
+        "fen": position.fen(),
+        "status": position.status(),
+        "in_check": position.in_check(),
+    }
@@ -0,0 +1,53 @@
+# src/main.py
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+from src.features.chess.services import CHESS_MOVE_TIME_MS, search_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    search_executor.shutdown(wait=True, cancel_futures=True)
+
+
+# --- FastAPI and CORS configuration ---
+app = FastAPI(title="Chess API", lifespan=lifespan)
+
+origins = [
+    "http://localhost",
+    "http://localhost:5173",
+    "http://127.0.0.1:5173",
+]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+# --- Include Routers ---
+from src.features.chess.router import router as chess_router
+app.include_router(chess_router, prefix="/api/chess", tags=["Chess"])
+
+
+# --- Health Check / Root Endpoint ---
+@app.get("/", tags=["Health Check"])
+async def read_root():
+    return {"message": "Chess API is running.", "move_time_ms": CHESS_MOVE_TIME_MS}
+
+
+# --- Uvicorn Startup (if running directly) ---
+if __name__ == "__main__":
+    print(f"Chess API Endpoints available under /api/chess (default budget {CHESS_MOVE_TIME_MS} ms per move)")
+    print(f"Allowed Origins: {origins}")
+    print("\nRun with: uvicorn src.main:app --host 0.0.0.0 --port 8002 --reload\n")
@@ -0,0 +1,29 @@
+"""
+Move generation checked with perft against the reference counts of benchmarks/perft.py.
+Run from lecopain/chess/backend:
+    python -m pytest tests
+"""
+import pytest
+
+from benchmarks.perft import POSITIONS, perft
+from src.features.chess.position import START_FEN, Position
+
+
+def test_startpos_depth_3():
+    assert perft(Position(START_FEN), 3) == 8902
+
+
+# Depth 2 covers castling, en passant, promotions and pins in a fraction of a second
+@pytest.mark.parametrize("name", sorted(set(POSITIONS) - {"startpos"}))
+def test_reference_positions_depth_2(name):
+    fen, counts = POSITIONS[name]
+    assert perft(Position(fen), 2) == counts[1]
+
+
+@pytest.mark.parametrize("name", sorted(POSITIONS))
+def test_unmake_restores_the_position(name):
+    fen, _ = POSITIONS[name]
+    position = Position(fen)
+    before = position.fen()
+    perft(position, 2)
+    assert position.fen() == before
@@ -0,0 +1,82 @@
+"""
+Helpers shared by the STT benchmarks: loading a local corpus of game utterances and scoring transcripts.
+
+A corpus is a directory of audio files with a `metadata.csv` file (`file,text` header)
+giving the reference transcript of each clip.
+"""
+import csv
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.features.guess_who.constants import ALL_CHARACTERS
+from src.features.stt.audio import SAMPLE_RATE
+from src.features.stt.decoding import decode_in_process
+
+
+@dataclass
+class Utterance:
+    path: Path
+    text: str
+    audio: np.ndarray # 16 kHz mono float32
+
+    @property
+    def duration_s(self) -> float:
+        return self.audio.shape[0] / SAMPLE_RATE
+
+
+def load_corpus(corpus_dir: str | Path, pad_silence_s: float = 0.0) -> list[Utterance]:
+    """
+    Loads every clip listed in `metadata.csv`. `pad_silence_s` adds silence on both
+    sides, to mimic push-to-talk recordings that start and stop late.
+    """
+    corpus_dir = Path(corpus_dir)
+    pad = np.zeros(int(pad_silence_s * SAMPLE_RATE), dtype=np.float32)
+    utterances = []
+    with open(corpus_dir / "metadata.csv", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            path = corpus_dir / row["file"]
+            audio = decode_in_process(path.read_bytes())
+            if pad.size:
+                audio = np.concatenate([pad, audio, pad])
+            utterances.append(Utterance(path=path, text=row["text"], audio=audio))
+    return utterances
+
+
+def normalize(text: str) -> list[str]:
+    """Lowercases, strips accents and punctuation; hyphenated names become separate words."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9' ]+", " ", text).split()
+
+
+def word_accuracy(reference: str, hypothesis: str) -> float:
+    """1 - word error rate (Levenshtein distance over normalized words), floored at 0."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return 1.0 if not hyp else 0.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return max(0.0, 1.0 - previous[-1] / len(ref))
+
+
+_ANIMAL_WORDS = {name: " ".join(normalize(name)) for name in ALL_CHARACTERS}
+
+
+def animal_hits(reference: str, hypothesis: str) -> tuple[int, int]:
+    """Returns (animal names of the reference found in the hypothesis, animal names in the reference)."""
+    ref = " " + " ".join(normalize(reference)) + " "
+    hyp = " " + " ".join(normalize(hypothesis)) + " "
+    expected = [words for words in _ANIMAL_WORDS.values() if f" {words} " in ref]
+    return sum(f" {words} " in hyp for words in expected), len(expected)
+
+
+def percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
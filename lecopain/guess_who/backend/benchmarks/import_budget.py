@@ -0,0 +1,106 @@
+"""
+Import-time budget check for the API: importing `src.main` must stay fast and light, so
+that uvicorn workers (and workers without a robot) boot in well under a second.
+
+Each run imports the app in a fresh interpreter and reports the wall time of the import,
+the peak RSS, and the slowest top-level modules (from `python -X importtime`). The check
+fails (exit code 1) if the median import time exceeds the budget, or if a module of the
+robot stack (torch, rerun, lerobot) was imported: those are loaded in the background by
+the model registry, never at import.
+
+The same check runs in the test suite (tests/test_import_budget.py); this script adds the
+per-module report. Run from lecopain/guess_who/backend:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-s 0.8 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Never imported by `import src.main`
+FORBIDDEN_MODULES = ("torch", "rerun", "lerobot", "cv2")
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_s": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--budget-s", type=float, default=1.0, help="Maximum median import time of src.main")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    return parser.parse_args()
+
+
+def probe(extra_args: tuple[str, ...] = ()) -> subprocess.CompletedProcess:
+    # The robot stack must not load even when enabled: it is deferred to the registry
+    env = {**os.environ, "GUESS_WHO_ROBOT": "1"}
+    return subprocess.run(
+        [sys.executable, *extra_args, "-c", _PROBE], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def slowest_imports(stderr: str, top: int) -> list[tuple[float, str]]:
+    """Third-party and app packages by cumulative import time, from `-X importtime` output."""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        # A package is imported once: its first (outermost) line holds its whole cost
+        package = name if name.startswith("src.") else name.split(".")[0]
+        totals[package] = max(totals.get(package, 0), int(cumulative))
+    totals.pop("src.main", None)
+    return sorted(((us / 1e6, name) for name, us in totals.items()), reverse=True)[:top]
+
+
+def measure(repeat: int) -> dict:
+    """Median import time, peak RSS and robot stack modules loaded, over `repeat` fresh interpreters."""
+    runs = [json.loads(probe().stdout.splitlines()[-1]) for _ in range(repeat)]
+    return {
+        "import_s": statistics.median(run["import_s"] for run in runs),
+        "max_rss_mb": max(run["max_rss_mb"] for run in runs),
+        "forbidden": sorted({
+            module.split(".")[0] for run in runs for module in run["modules"] if module.split(".")[0] in FORBIDDEN_MODULES
+        }),
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    result = measure(args.repeat)
+    import_s, max_rss_mb, forbidden = result["import_s"], result["max_rss_mb"], result["forbidden"]
+    print(f"import src.main: median {import_s * 1000:.0f} ms over {args.repeat} runs (budget {args.budget_s * 1000:.0f} ms), "
+          f"peak RSS {max_rss_mb:.0f} MB")
+
+    print("Slowest top-level imports:")
+    for seconds, name in slowest_imports(probe(("-X", "importtime")).stderr, args.top):
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    failures = 0
+    if forbidden:
+        print(f"FAIL: the robot stack was imported: {', '.join(forbidden)}")
+        failures += 1
+    if import_s > args.budget_s:
+        print(f"FAIL: import time over budget ({import_s * 1000:.0f} ms > {args.budget_s * 1000:.0f} ms)")
+        failures += 1
+    if not failures:
+        print("ok")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,526 @@
+"""
+Headless self-play: how many questions the AI needs to find an animal, and what each game costs.
+
+Each game draws a secret animal with `select_random_animal`, then loops over the services the
+front calls during a game: the guessing AI asks `generate_ai_question`, the answering AI replies
+with `answer_question`, and `filter_list` narrows the candidates. The game is won when a single
+candidate is left and it is the secret (the final guess counts as a turn). The robot is disabled
+(GUESS_WHO_ROBOT=0), and games run concurrently on one event loop through the real services.
+Admission control, executors and prompt building are therefore exercised too.
+
+The LLM behind the services is pluggable (--backend):
+    fake      rule-based player answering perfectly (bisecting questions), with simulated token
+              counts and latencies, and optional injected mistakes (--error-rate). Runs thousands
+              of games in seconds.
+    recorded  replays the responses of a --recording made with --record (matched by prompt);
+              prompts never recorded fall back to the fake player and are counted as misses.
+    local     an OpenAI-compatible server (llama.cpp, vLLM, Ollama) at --local-url.
+    mistral   the Mistral API (MISTRAL_API_KEY), as in production.
+
+The report gives the distribution of turns to win, LLM calls, tokens and LLM latency per game,
+and filter-consistency errors. Each of those errors is a filter that dropped the secret although
+the answer was about that secret, which makes the game unwinnable.
+
+Run from lecopain/guess_who/backend:
+    python -m benchmarks.self_play --games 2000 --backend fake
+    python -m benchmarks.self_play --games 2000 --backend fake --error-rate 0.02 --json self_play.json
+    python -m benchmarks.self_play --games 50 --backend mistral --record /tmp/llm_calls.jsonl
+    python -m benchmarks.self_play --games 50 --backend recorded --recording /tmp/llm_calls.jsonl
+    python -m benchmarks.self_play --games 200 --backend local --local-url http://localhost:8080/v1 --local-model qwen2.5
+"""
+import argparse
+import ast
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from types import SimpleNamespace
+
+from .corpus import percentile
+
+BACKENDS = ("fake", "recorded", "local", "mistral")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Guess Who self-play benchmark")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64, help="Games played at once")
+    parser.add_argument("--max-turns", type=int, default=24, help="Turns after which a game is abandoned")
+    parser.add_argument("--backend", choices=BACKENDS, default="fake")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake: probability of a wrong answer or filter")
+    parser.add_argument("--time-scale", type=float, default=0.0,
+                        help="fake/recorded: fraction of the simulated latency actually slept (0 = as fast as possible)")
+    parser.add_argument("--recording", help="recorded: JSONL of LLM calls written by --record")
+    parser.add_argument("--record", help="Append every LLM call (prompt, response, tokens, latency) to this JSONL")
+    parser.add_argument("--local-url", default="http://localhost:8080/v1", help="local: OpenAI-compatible base URL")
+    parser.add_argument("--local-model", default="local", help="local: model name sent to the server")
+    parser.add_argument("--json", help="Write the per-game results and the summary to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the services' INFO logs")
+    return parser.parse_args()
+
+
+# --- LLM call accounting ---
+@dataclass
+class CallRecord:
+    call_site: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_s: float
+
+
+@dataclass
+class GameResult:
+    game: int
+    secret: str = ""
+    outcome: str = "" # won | lost_secret | max_turns | error
+    turns: int = 0
+    stalled_turns: int = 0 # Filters that removed no candidate
+    consistency_errors: int = 0
+    error: str | None = None
+    wall_s: float = 0.0
+    calls: list[CallRecord] = field(default_factory=list)
+
+
+# The game whose services are running (copied into the LLM executor threads with the context)
+_current_game: contextvars.ContextVar[GameResult | None] = contextvars.ContextVar("self_play_game", default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / 4))
+
+
+def call_site(prompt: str, structured: bool) -> str:
+    if structured:
+        return "generate_ai_question"
+    return "filter_list" if "kept_characters" in prompt else "answer_question"
+
+
+def _response(content: str, parsed=None, prompt_tokens: int = 0, completion_tokens: int = 0):
+    """The parts of a Mistral chat response the services read."""
+    message = SimpleNamespace(content=content, parsed=parsed)
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class SelfPlayClient:
+    """
+    Stands in for the Mistral client: the services call `client.chat.complete(...)` and
+    `client.chat.parse(...)` from the LLM executor. Subclasses implement `generate`, returning
+    (content, prompt tokens, completion tokens, latency in s or None to use the measured one).
+    """
+
+    def __init__(self, record_path: str | None = None):
+        self.chat = self
+        self._record_file = open(record_path, "a") if record_path else None
+        self._record_lock = threading.Lock()
+
+    def generate(self, prompt: str, structured: bool) -> tuple[str, int, int, float | None]:
+        raise NotImplementedError
+
+    def _call(self, messages: list[dict], structured: bool) -> tuple[str, int, int]:
+        prompt = messages[-1]["content"]
+        start = time.perf_counter()
+        content, prompt_tokens, completion_tokens, latency_s = self.generate(prompt, structured)
+        if latency_s is None:
+            latency_s = time.perf_counter() - start
+        game = _current_game.get()
+        if game is not None:
+            game.calls.append(CallRecord(call_site(prompt, structured), prompt_tokens, completion_tokens, latency_s))
+        if self._record_file is not None:
+            entry = {
+                "prompt_sha1": hashlib.sha1(prompt.encode()).hexdigest(), "structured": structured, "content": content,
+                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "latency_s": latency_s,
+            }
+            with self._record_lock:
+                self._record_file.write(json.dumps(entry) + "\n")
+                self._record_file.flush()
+        return content, prompt_tokens, completion_tokens
+
+    def complete(self, *, messages: list[dict], **kwargs):
+        content, prompt_tokens, completion_tokens = self._call(messages, structured=False)
+        return _response(content, None, prompt_tokens, completion_tokens)
+
+    def parse(self, *, messages: list[dict], response_format, **kwargs):
+        content, prompt_tokens, completion_tokens = self._call(messages, structured=True)
+        try:
+            parsed = response_format.model_validate(_json_object(content))
+        except ValueError:
+            # Not the requested JSON: the whole reply is taken as the question
+            parsed = response_format(resonning="", question=content.strip())
+        return _response(content, parsed, prompt_tokens, completion_tokens)
+
+
+def _json_object(text: str) -> dict:
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object in the reply")
+    return json.loads(text[start:end + 1])
+
+
+class FakeClient(SelfPlayClient):
+    """
+    A rule-based player reading the game state back from the prompts. It asks bisecting questions
+    ("Is it one of: A, B, C?"), answers them truthfully and filters exactly, except for mistakes
+    injected with probability `error_rate`. Latencies are simulated from the token counts.
+    """
+
+    # Simulated latency: fixed overhead plus decoding time per completion token (log-normal jitter)
+    BASE_LATENCY_S = 0.25
+    LATENCY_PER_TOKEN_S = 0.015
+    # Tokens the model would spend reasoning before its JSON question
+    REASONING_TOKENS = 120
+
+    _CANDIDATES = re.compile(r"possible animals for the opponent is: (\[.*?\])\.", re.S)
+    _SECRET = re.compile(r"You are secretly the character '(.+?)'\.")
+    _ASKED = re.compile(r"(?:asks you the following question|Your opponent asked): \"(.*?)\"\n", re.S)
+    _ANSWER = re.compile(r"The answer was: \"(yes|no)\"")
+    _REMAINING = re.compile(r"list of possible characters remaining: (\[.*?\])\n", re.S)
+
+    def __init__(self, seed: int, error_rate: float = 0.0, time_scale: float = 0.0, record_path: str | None = None):
+        super().__init__(record_path)
+        self.error_rate = error_rate
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    @staticmethod
+    def question_names(question: str) -> list[str]:
+        if question.startswith("Is it one of: "):
+            return question[len("Is it one of: "):].rstrip("?").split(", ")
+        if question.startswith("Is it the "):
+            return [question[len("Is it the "):].rstrip("?")]
+        return []
+
+    def _ask(self, prompt: str) -> str:
+        candidates = ast.literal_eval(self._CANDIDATES.search(prompt).group(1))
+        if len(candidates) == 1:
+            question = f"Is it the {candidates[0]}?"
+        else:
+            with self._rng_lock:
+                half = self._rng.sample(candidates, len(candidates) // 2)
+            question = f"Is it one of: {', '.join(half)}?"
+        return json.dumps({"resonning": "Splitting the remaining candidates in half.", "question": question})
+
+    def _answer(self, prompt: str) -> str:
+        secret = self._SECRET.search(prompt).group(1)
+        question = self._ASKED.search(prompt).group(1)
+        truth = secret in self.question_names(question)
+        if self._random() < self.error_rate:
+            truth = not truth
+        return "yes" if truth else "no"
+
+    def _filter(self, prompt: str) -> str:
+        question = self._ASKED.search(prompt).group(1)
+        answer = self._ANSWER.search(prompt).group(1)
+        remaining = ast.literal_eval(self._REMAINING.search(prompt).group(1))
+        names = set(self.question_names(question))
+        kept = [name for name in remaining if (name in names) == (answer == "yes")]
+        if kept and self._random() < self.error_rate:
+            with self._rng_lock:
+                kept.remove(self._rng.choice(kept))
+        return json.dumps({"kept_characters": kept, "reasoning": f"Kept the animals matching '{answer}'."})
+
+    def generate(self, prompt: str, structured: bool):
+        site = call_site(prompt, structured)
+        if site == "generate_ai_question":
+            content = self._ask(prompt)
+        elif site == "filter_list":
+            content = self._filter(prompt)
+        else:
+            content = self._answer(prompt)
+        completion_tokens = estimate_tokens(content) + (self.REASONING_TOKENS if structured else 0)
+        with self._rng_lock:
+            jitter = self._rng.lognormvariate(0, 0.3)
+        latency_s = (self.BASE_LATENCY_S + self.LATENCY_PER_TOKEN_S * completion_tokens) * jitter
+        if self.time_scale > 0:
+            time.sleep(latency_s * self.time_scale)
+        return content, estimate_tokens(prompt), completion_tokens, latency_s
+
+
+class RecordedClient(SelfPlayClient):
+    """Replays recorded responses by prompt; unknown prompts go to `fallback` and are counted as misses."""
+
+    def __init__(self, recording: str, fallback: SelfPlayClient, time_scale: float = 0.0, seed: int = 0,
+                 record_path: str | None = None):
+        super().__init__(record_path)
+        self.fallback = fallback
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._entries: dict[str, list[dict]] = defaultdict(list)
+        with open(recording) as f:
+            for line in f:
+                entry = json.loads(line)
+                self._entries[entry["prompt_sha1"]].append(entry)
+        self.hits = 0
+        self.misses = 0
+
+    def generate(self, prompt: str, structured: bool):
+        entries = self._entries.get(hashlib.sha1(prompt.encode()).hexdigest())
+        if not entries:
+            self.misses += 1
+            return self.fallback.generate(prompt, structured)
+        self.hits += 1
+        entry = self._rng.choice(entries)
+        if self.time_scale > 0:
+            time.sleep(entry["latency_s"] * self.time_scale)
+        return entry["content"], entry["prompt_tokens"], entry["completion_tokens"], entry["latency_s"]
+
+
+class LocalClient(SelfPlayClient):
+    """An OpenAI-compatible chat completions server."""
+
+    def __init__(self, base_url: str, model: str, seed: int, record_path: str | None = None):
+        super().__init__(record_path)
+        import httpx # Installed with the Mistral SDK
+
+        self.model = model
+        self._seed = seed
+        self._http = httpx.Client(base_url=base_url, timeout=120)
+
+    def generate(self, prompt: str, structured: bool):
+        body = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "temperature": 1.0, "seed": self._seed}
+        if structured:
+            body["response_format"] = {"type": "json_object"}
+        response = self._http.post("/chat/completions", json=body)
+        response.raise_for_status()
+        data = response.json()
+        content = data["choices"][0]["message"]["content"] or ""
+        usage = data.get("usage") or {}
+        return (
+            content, usage.get("prompt_tokens", estimate_tokens(prompt)),
+            usage.get("completion_tokens", estimate_tokens(content)), None,
+        )
+
+
+class MistralClient(SelfPlayClient):
+    """The Mistral API, as used in production (tokens from the API's usage report)."""
+
+    def __init__(self, api_key: str, model: str, record_path: str | None = None):
+        super().__init__(record_path)
+        from mistralai import Mistral
+
+        self.model = model
+        self._client = Mistral(api_key=api_key)
+
+    def generate(self, prompt: str, structured: bool):
+        messages = [{"role": "user", "content": prompt}]
+        if structured:
+            from src.features.guess_who.services import Response
+            response = self._client.chat.parse(model=self.model, messages=messages, temperature=1.0, response_format=Response)
+        else:
+            response = self._client.chat.complete(model=self.model, messages=messages, temperature=1.0)
+        content = response.choices[0].message.content or ""
+        return content, response.usage.prompt_tokens, response.usage.completion_tokens, None
+
+
+def make_client(args) -> SelfPlayClient:
+    if args.backend == "fake":
+        return FakeClient(args.seed, args.error_rate, args.time_scale, args.record)
+    if args.backend == "recorded":
+        if not args.recording:
+            sys.exit("--backend recorded needs --recording (written by a run with --record).")
+        return RecordedClient(args.recording, FakeClient(args.seed, args.error_rate), args.time_scale, args.seed, args.record)
+    if args.backend == "local":
+        return LocalClient(args.local_url, args.local_model, args.seed, args.record)
+    from src.features.guess_who.services import MISTRAL_API_KEY, MODEL_NAME
+    return MistralClient(MISTRAL_API_KEY, MODEL_NAME, args.record)
+
+
+# --- Games ---
+async def play_game(game_id: int, max_turns: int) -> GameResult:
+    from fastapi import HTTPException
+
+    from src.features.guess_who.services import (
+        ALL_CHARACTERS, answer_question, filter_list, generate_ai_question, select_random_animal,
+    )
+
+    result = GameResult(game=game_id)
+    _current_game.set(result)
+    start = time.perf_counter()
+    try:
+        result.secret = await select_random_animal()
+        candidates, previous_questions = list(ALL_CHARACTERS), []
+        while result.turns < max_turns:
+            if len(candidates) == 1:
+                # The final guess
+                result.turns += 1
+                result.outcome = "won" if candidates[0] == result.secret else "lost_secret"
+                break
+            question = await generate_ai_question(candidates, previous_questions)
+            answer = await answer_question(question, result.secret)
+            kept, _ = await filter_list(question, answer, candidates)
+            result.turns += 1
+            previous_questions.append(question)
+            if result.secret not in kept:
+                result.consistency_errors += 1
+                result.outcome = "lost_secret"
+                break
+            if len(kept) == len(candidates):
+                result.stalled_turns += 1
+            candidates = kept
+        else:
+            result.outcome = "max_turns"
+    except HTTPException as e:
+        result.outcome, result.error = "error", f"{e.status_code}: {e.detail}"
+    except Exception as e:
+        result.outcome, result.error = "error", f"{type(e).__name__}: {e}"
+    result.wall_s = time.perf_counter() - start
+    return result
+
+
+async def play_games(args) -> tuple[list[GameResult], float]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    finished = 0
+
+    async def bounded(game_id: int) -> GameResult:
+        nonlocal finished
+        async with semaphore:
+            result = await play_game(game_id, args.max_turns)
+        finished += 1
+        if finished % max(1, args.games // 10) == 0:
+            print(f"  {finished}/{args.games} games", file=sys.stderr)
+        return result
+
+    start = time.perf_counter()
+    # Each game in its own task, hence its own copy of the context (_current_game)
+    results = await asyncio.gather(*(asyncio.create_task(bounded(i)) for i in range(args.games)))
+    return results, time.perf_counter() - start
+
+
+# --- Report ---
+def _distribution(values: list[float]) -> dict:
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "mean": sum(values) / len(values), "p50": percentile(values, 50), "p90": percentile(values, 90),
+        "p99": percentile(values, 99), "max": float(max(values)),
+    }
+
+
+def summarize(results: list[GameResult], wall_s: float) -> dict:
+    outcomes = Counter(r.outcome for r in results)
+    won = [r for r in results if r.outcome == "won"]
+    calls = [c for r in results for c in r.calls]
+    filters = sum(1 for c in calls if c.call_site == "filter_list")
+    sites = defaultdict(list)
+    for c in calls:
+        sites[c.call_site].append(c)
+    return {
+        "games": len(results),
+        "outcomes": dict(outcomes),
+        "win_rate": len(won) / len(results) if results else 0.0,
+        "turns_to_win": _distribution([r.turns for r in won]),
+        "turns_histogram": dict(sorted(Counter(r.turns for r in won).items())),
+        "llm_calls_per_game": _distribution([len(r.calls) for r in results]),
+        "prompt_tokens_per_game": _distribution([sum(c.prompt_tokens for c in r.calls) for r in results]),
+        "completion_tokens_per_game": _distribution([sum(c.completion_tokens for c in r.calls) for r in results]),
+        # LLM calls of a game are sequential: their latencies add up to the player's waiting time
+        "llm_latency_per_game_s": _distribution([sum(c.latency_s for c in r.calls) for r in results]),
+        "call_sites": {
+            site: {
+                "calls": len(site_calls),
+                "latency_s": _distribution([c.latency_s for c in site_calls]),
+                "completion_tokens": _distribution([c.completion_tokens for c in site_calls]),
+            }
+            for site, site_calls in sorted(sites.items())
+        },
+        "consistency_errors": sum(r.consistency_errors for r in results),
+        "consistency_error_rate": sum(r.consistency_errors for r in results) / filters if filters else 0.0,
+        "stalled_turns": sum(r.stalled_turns for r in results),
+        "errors": dict(Counter(r.error for r in results if r.error).most_common(5)),
+        "wall_s": wall_s,
+        "games_per_s": len(results) / wall_s if wall_s else 0.0,
+    }
+
+
+def print_report(summary: dict):
+    def line(name: str, d: dict, unit: str = "", scale: float = 1.0, digits: int = 1):
+        print(f"  {name:<28} mean {d['mean'] * scale:8.{digits}f}{unit}  p50 {d['p50'] * scale:8.{digits}f}{unit}  "
+              f"p90 {d['p90'] * scale:8.{digits}f}{unit}  p99 {d['p99'] * scale:8.{digits}f}{unit}  max {d['max'] * scale:8.{digits}f}{unit}")
+
+    print(f"{summary['games']} games in {summary['wall_s']:.1f}s ({summary['games_per_s']:.1f} games/s), "
+          f"win rate {summary['win_rate']:.1%}, outcomes {summary['outcomes']}")
+    print("Per won game:")
+    line("turns to win", summary["turns_to_win"])
+    histogram = summary["turns_histogram"]
+    if histogram:
+        top = max(histogram.values())
+        for turns, count in histogram.items():
+            print(f"    {turns:>3} turns {count:>7}  {'#' * max(1, round(40 * count / top))}")
+    print("Per game:")
+    line("LLM calls", summary["llm_calls_per_game"])
+    line("prompt tokens", summary["prompt_tokens_per_game"], digits=0)
+    line("completion tokens", summary["completion_tokens_per_game"], digits=0)
+    line("LLM latency", summary["llm_latency_per_game_s"], "s", digits=2)
+    print("Per call:")
+    for site, stats in summary["call_sites"].items():
+        line(f"{site} latency", stats["latency_s"], "ms", 1000, 0)
+    print(f"Filter consistency errors: {summary['consistency_errors']} "
+          f"({summary['consistency_error_rate']:.2%} of filters), stalled turns: {summary['stalled_turns']}")
+    if summary["errors"]:
+        print(f"Most frequent errors: {summary['errors']}")
+
+
+def configure_environment(args):
+    """Set before the services are imported: they read their configuration at import."""
+    os.environ["GUESS_WHO_ROBOT"] = "0"
+    if args.backend != "mistral":
+        # The services only call the client if a key is configured; the client is replaced below
+        os.environ["MISTRAL_API_KEY"] = "self-play"
+    elif not os.getenv("MISTRAL_API_KEY"):
+        sys.exit("--backend mistral needs MISTRAL_API_KEY.")
+    # Every game waits on at most one LLM call: size the executor and admission for all of them
+    os.environ["LLM_MAX_WORKERS"] = str(args.concurrency)
+    os.environ["LLM_MAX_CONCURRENT"] = str(args.concurrency)
+    os.environ["LLM_MAX_QUEUE"] = str(args.concurrency)
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    random.seed(args.seed) # select_random_animal
+
+    from src.core.executors import shutdown_executors
+    from src.core.registry import model_registry
+    from src.features.guess_who.services import MISTRAL_REGISTRY_KEY
+
+    if not args.verbose:
+        # Keep the services quiet (their loggers may have been configured at import)
+        logging.getLogger("src").setLevel(logging.WARNING)
+    client = make_client(args)
+    model_registry.provide(MISTRAL_REGISTRY_KEY, client)
+    print(f"Playing {args.games} games ({args.concurrency} at once) with the '{args.backend}' LLM backend...", file=sys.stderr)
+    try:
+        results, wall_s = asyncio.run(play_games(args))
+    finally:
+        shutdown_executors()
+
+    summary = summarize(results, wall_s)
+    if isinstance(client, RecordedClient):
+        summary["replay"] = {"hits": client.hits, "misses": client.misses}
+    print_report(summary)
+    if "replay" in summary:
+        print(f"Replay: {summary['replay']['hits']} recorded responses, {summary['replay']['misses']} prompts not recorded (fake player)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "summary": summary, "games": [asdict(r) for r in results]}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
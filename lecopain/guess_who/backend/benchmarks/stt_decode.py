@@ -0,0 +1,79 @@
+"""
+Benchmark of the STT decoding step: in-process libsndfile decoding vs. one ffmpeg subprocess per request.
+
+Run from lecopain/guess_who/backend:
+    python -m benchmarks.stt_decode --duration 3 --repeat 50
+"""
+import argparse
+import asyncio
+import io
+import shutil
+import statistics
+import time
+
+import numpy as np
+import soundfile as sf
+
+from src.features.stt.decoding import FFMPEG_PATH, decode_in_process, decode_with_ffmpeg
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="STT decoding benchmark")
+    parser.add_argument("--duration", type=float, default=3.0, help="Clip duration in seconds")
+    parser.add_argument("--repeat", type=int, default=50, help="Requests per configuration")
+    return parser.parse_args()
+
+
+def make_clip(duration: float, sample_rate: int, channels: int, file_format: str, subtype: str) -> bytes:
+    """Synthesizes a speech-like clip (modulated harmonics) and encodes it in memory."""
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 180 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    signal = np.repeat(signal[:, None], channels, axis=1)
+    buffer = io.BytesIO()
+    sf.write(buffer, signal, sample_rate, format=file_format, subtype=subtype)
+    return buffer.getvalue()
+
+
+def report(name: str, timings: list[float]):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[int(0.95 * (len(timings_ms) - 1))]
+    print(f"  {name:<12} mean {statistics.mean(timings_ms):7.2f} ms   p50 {statistics.median(timings_ms):7.2f} ms   p95 {p95:7.2f} ms")
+    return statistics.mean(timings_ms)
+
+
+async def main():
+    args = parse_args()
+    has_ffmpeg = shutil.which(FFMPEG_PATH) is not None
+    if not has_ffmpeg:
+        print(f"ffmpeg ('{FFMPEG_PATH}') not found, only the in-process path is measured.")
+
+    configurations = [
+        ("wav 16k mono s16", 16000, 1, "WAV", "PCM_16"),
+        ("wav 16k mono f32", 16000, 1, "WAV", "FLOAT"),
+        ("wav 48k stereo s16", 48000, 2, "WAV", "PCM_16"),
+        ("flac 44.1k mono", 44100, 1, "FLAC", "PCM_16"),
+        ("ogg vorbis 48k", 48000, 1, "OGG", "VORBIS"),
+    ]
+    for label, sample_rate, channels, file_format, subtype in configurations:
+        clip = make_clip(args.duration, sample_rate, channels, file_format, subtype)
+        print(f"{label} ({len(clip) / 1024:.0f} KiB, {args.duration:.1f} s)")
+
+        in_process = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            decode_in_process(clip)
+            in_process.append(time.perf_counter() - start)
+        fast_ms = report("in-process", in_process)
+
+        if has_ffmpeg:
+            subprocess_timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                await decode_with_ffmpeg(clip)
+                subprocess_timings.append(time.perf_counter() - start)
+            slow_ms = report("ffmpeg", subprocess_timings)
+            print(f"  saved per request: {slow_ms - fast_ms:.2f} ms ({slow_ms / fast_ms:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,164 @@
+"""
+Offline STT benchmark across Whisper models, compute types, beam sizes and thread counts.
+
+Every clip of a corpus of short game utterances is sent through `transcribe_audio_file`
+(decoding, adaptive policy and inference pool included). Each configuration reports
+real-time factor, latency percentiles, peak RSS and word accuracy. Configurations run in
+separate processes so that peak RSS is measured per model.
+
+The corpus is a directory of audio clips with a `metadata.csv` (`file,text`), see corpus.py.
+`--synthesize` renders one from the game phrases with a local TTS (espeak-ng / espeak).
+
+Run from lecopain/guess_who/backend:
+    python -m benchmarks.stt_models --synthesize /tmp/stt_corpus
+    python -m benchmarks.stt_models --corpus /tmp/stt_corpus \
+        --models ctranslate2-4you/whisper-base.en-ct2-int8_bfloat16,tiny.en \
+        --compute-types int8,float32 --beam-sizes 1,5 --threads 2,4 --json results.json
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import multiprocessing
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from src.features.guess_who.constants import ALL_CHARACTERS
+from src.features.stt.services import COMPUTE_TYPE, DEVICE, MODEL_NAME
+from .corpus import load_corpus, percentile, word_accuracy
+
+# Typical things players say: answers, questions and guesses
+GAME_PHRASES = [
+    "yes", "no", "yes it is", "no it is not",
+    "Does it have four legs?", "Can it fly?", "Does it live in the water?",
+    "Is it bigger than a cat?", "Does it have fur?", "Is it a farm animal?",
+    *(f"Is it the {name}?" for name in ALL_CHARACTERS),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="STT model / compute type benchmark")
+    parser.add_argument("--corpus", help="Directory with audio clips and metadata.csv")
+    parser.add_argument("--synthesize", metavar="DIR", help="Render the game phrases into DIR with a local TTS and exit")
+    parser.add_argument("--models", default=MODEL_NAME, help="Comma-separated Whisper models")
+    parser.add_argument("--device", default=DEVICE)
+    parser.add_argument("--compute-types", default=COMPUTE_TYPE, help="Comma-separated CTranslate2 compute types")
+    parser.add_argument("--beam-sizes", default="1,5", help="Comma-separated beam sizes ('adaptive' for the policy)")
+    parser.add_argument("--threads", default="0", help="Comma-separated threads per replica (0 = all cores)")
+    parser.add_argument("--json", help="Write the results to this file")
+    return parser.parse_args()
+
+
+def synthesize_corpus(out_dir: str):
+    """Renders GAME_PHRASES to wav files with espeak-ng (or espeak) and writes metadata.csv."""
+    tts = shutil.which("espeak-ng") or shutil.which("espeak")
+    if tts is None:
+        sys.exit("No local TTS found (install espeak-ng), or record a corpus and pass --corpus.")
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / "metadata.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "text"])
+        for i, phrase in enumerate(GAME_PHRASES):
+            name = f"utt_{i:03d}.wav"
+            subprocess.run([tts, "-v", "en", "-w", str(out / name), phrase], check=True)
+            writer.writerow([name, phrase])
+    print(f"Wrote {len(GAME_PHRASES)} clips to {out}")
+
+
+def run_configuration(config: dict, corpus_dir: str) -> dict:
+    """Runs in a fresh process: loads one model configuration and transcribes the corpus."""
+    from faster_whisper import WhisperModel
+
+    from src.core.registry import model_registry
+    from src.features.stt.scheduler import TranscriptionScheduler
+    from src.features.stt.services import WHISPER_REGISTRY_KEY, transcribe_audio_file
+
+    utterances = load_corpus(corpus_dir)
+    clips = [u.path.read_bytes() for u in utterances]
+
+    start = time.perf_counter()
+    scheduler = TranscriptionScheduler(
+        lambda cpu_threads: WhisperModel(
+            config["model"], device=config["device"], compute_type=config["compute_type"], cpu_threads=cpu_threads
+        ),
+        replicas=1,
+        threads_per_replica=config["threads"],
+    )
+    scheduler.load()
+    load_s = time.perf_counter() - start
+    model_registry.provide(WHISPER_REGISTRY_KEY, scheduler)
+    beam_size = None if config["beam_size"] == "adaptive" else int(config["beam_size"])
+
+    async def transcribe_all():
+        await transcribe_audio_file(clips[0], beam_size=beam_size) # Warm-up
+        latencies, accuracies = [], []
+        for utterance, clip in zip(utterances, clips):
+            t0 = time.perf_counter()
+            text = await transcribe_audio_file(clip, beam_size=beam_size)
+            latencies.append(time.perf_counter() - t0)
+            accuracies.append(word_accuracy(utterance.text, text))
+        return latencies, accuracies
+
+    latencies, accuracies = asyncio.run(transcribe_all())
+    audio_s = sum(u.duration_s for u in utterances)
+    latencies_ms = [t * 1000 for t in latencies]
+    return {
+        **config,
+        "threads": scheduler.threads_per_replica,
+        "clips": len(utterances),
+        "load_s": load_s,
+        "rtf": sum(latencies) / audio_s,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p90_ms": percentile(latencies_ms, 90),
+        "p99_ms": percentile(latencies_ms, 99),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "word_accuracy": sum(accuracies) / len(accuracies),
+    }
+
+
+def main():
+    args = parse_args()
+    if args.synthesize:
+        synthesize_corpus(args.synthesize)
+        return
+    if not args.corpus:
+        sys.exit("Pass --corpus DIR (or --synthesize DIR first).")
+
+    configurations = [
+        {"model": model, "device": args.device, "compute_type": compute_type, "beam_size": beam_size, "threads": int(threads)}
+        for model, compute_type, beam_size, threads in itertools.product(
+            args.models.split(","), args.compute_types.split(","), args.beam_sizes.split(","), args.threads.split(",")
+        )
+    ]
+
+    results = []
+    print(f"{'model':<45} {'compute':<14} {'beam':>8} {'thr':>4} {'RTF':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'word acc':>9}")
+    context = multiprocessing.get_context("spawn")
+    for config in configurations:
+        with context.Pool(1) as pool:
+            try:
+                result = pool.apply(run_configuration, (config, args.corpus))
+            except Exception as e:
+                print(f"{config['model']:<45} {config['compute_type']:<14} failed: {type(e).__name__}: {e}")
+                continue
+        results.append(result)
+        print(
+            f"{result['model']:<45} {result['compute_type']:<14} {result['beam_size']:>8} {result['threads']:>4} "
+            f"{result['rtf']:7.3f} {result['p50_ms']:8.1f} {result['p90_ms']:8.1f} {result['p99_ms']:8.1f} "
+            f"{result['peak_rss_mb']:8.0f} {result['word_accuracy']:9.3f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark of the adaptive decoding policy (src/features/stt/policy.py) against the previous
+fixed `beam_size=5` decoding of the full clip, on a local corpus of game utterances.
+
+Reports decode time (trimming included) and accuracy, overall and on animal names.
+
+Run from lecopain/guess_who/backend:
+    python -m benchmarks.stt_policy --corpus path/to/corpus --pad-silence 0.5
+"""
+import argparse
+import time
+
+from src.features.stt.policy import prepare_audio
+from src.features.stt.services import COMPUTE_TYPE, DEVICE, MODEL_NAME
+from .corpus import animal_hits, load_corpus, percentile, word_accuracy
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Adaptive STT decoding benchmark")
+    parser.add_argument("--corpus", required=True, help="Directory with audio clips and metadata.csv")
+    parser.add_argument("--model", default=MODEL_NAME, help="Whisper model name or path")
+    parser.add_argument("--device", default=DEVICE)
+    parser.add_argument("--compute-type", default=COMPUTE_TYPE)
+    parser.add_argument("--pad-silence", type=float, default=0.5, help="Silence added on both sides of each clip (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Decodes per clip (the fastest one is kept)")
+    return parser.parse_args()
+
+
+def run_fixed(model, audio):
+    segments, _ = model.transcribe(audio, beam_size=5)
+    return " ".join(seg.text.strip() for seg in segments)
+
+
+def run_adaptive(model, audio):
+    trimmed, options = prepare_audio(audio)
+    if trimmed.size == 0:
+        return ""
+    segments, _ = model.transcribe(trimmed, **options)
+    return " ".join(seg.text.strip() for seg in segments)
+
+
+def main():
+    args = parse_args()
+    from faster_whisper import WhisperModel
+
+    utterances = load_corpus(args.corpus, pad_silence_s=args.pad_silence)
+    model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type)
+    run_adaptive(model, utterances[0].audio) # Warm-up (also loads the VAD model)
+
+    print(f"{len(utterances)} clips, model {args.model} ({args.device}, {args.compute_type})")
+    for name, decode in (("fixed beam 5", run_fixed), ("adaptive", run_adaptive)):
+        timings, accuracies = [], []
+        animals_found = animals_total = 0
+        for utterance in utterances:
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                text = decode(model, utterance.audio)
+                best = min(best, time.perf_counter() - start)
+            timings.append(best * 1000)
+            accuracies.append(word_accuracy(utterance.text, text))
+            found, total = animal_hits(utterance.text, text)
+            animals_found += found
+            animals_total += total
+
+        animal_accuracy = animals_found / animals_total if animals_total else float("nan")
+        print(
+            f"  {name:<13} decode mean {sum(timings) / len(timings):7.1f} ms  p50 {percentile(timings, 50):7.1f} ms  "
+            f"p95 {percentile(timings, 95):7.1f} ms | word acc {sum(accuracies) / len(accuracies):.3f} | "
+            f"animal names {animals_found}/{animals_total} ({animal_accuracy:.3f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# src/core/admission.py
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from src.core.metrics import counter, gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_REJECTIONS = counter("admission_rejections", "Requests turned away by admission control.", ["resource", "reason"])
+ADMISSION_WAIT = histogram(
+    "admission_wait_seconds", "Time spent waiting for a slot before being admitted.", ["resource"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# Weight of the latest hold time in the moving average used for Retry-After
+HOLD_TIME_SMOOTHING = 0.2
+MAX_RETRY_AFTER_S = 120
+
+
+class AdmissionController:
+    """
+    Bounded concurrency for one scarce resource (LLM calls, transcriptions, the arm).
+
+    Up to `max_concurrent` holders run at once; up to `max_queue` more wait in FIFO order, each
+    for at most `max_wait_s`. Beyond that, requests are rejected right away instead of piling
+    up: 429 when the queue is full, 503 when the wait deadline passes. Both carry a Retry-After
+    estimated from the recent hold times, so overload shows up as fast refusals rather than
+    latency growing without bound.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_s: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_s = max_wait_s
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._mean_hold_s: float | None = None
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after_s(self) -> int:
+        """Seconds until a slot is likely free for a new request: the queue ahead of it, drained at the recent pace."""
+        mean_hold_s = self._mean_hold_s if self._mean_hold_s is not None else 1.0
+        ahead = self.in_flight + self.waiting - self.max_concurrent + 1
+        return min(MAX_RETRY_AFTER_S, max(1, math.ceil(mean_hold_s * max(1, ahead) / self.max_concurrent)))
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> HTTPException:
+        self.rejected[reason] += 1
+        ADMISSION_REJECTIONS.labels(self.name, reason).inc()
+        logger.warning("Admission '%s': %s (in flight: %s, waiting: %s)", self.name, detail, self.in_flight, self.waiting)
+        return HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(self.retry_after_s())})
+
+    def check(self):
+        """Raises the 429 a new request would get now, so that callers can fail before doing costly work first."""
+        if self.in_flight >= self.max_concurrent and self.waiting >= self.max_queue:
+            raise self._reject(429, "queue_full", f"Too many pending '{self.name}' requests, try again later.")
+
+    async def acquire(self):
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            ADMISSION_WAIT.labels(self.name).observe(0.0)
+            return
+        self.check()
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot over by resolving the future: in_flight is unchanged
+            await asyncio.wait_for(waiter, self.max_wait_s)
+        except asyncio.TimeoutError:
+            raise self._reject(503, "timeout", f"'{self.name}' is saturated, no slot freed within {self.max_wait_s:g}s.")
+        except asyncio.CancelledError:
+            # The client went away: give the slot back if it was handed over in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+        ADMISSION_WAIT.labels(self.name).observe(time.perf_counter() - start)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _held(self, start: float):
+        hold_s = time.perf_counter() - start
+        if self._mean_hold_s is None:
+            self._mean_hold_s = hold_s
+        else:
+            self._mean_hold_s += HOLD_TIME_SMOOTHING * (hold_s - self._mean_hold_s)
+        self.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds a slot for the duration of the block (429/503 HTTPException if not admitted)."""
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._held(start)
+
+    @asynccontextmanager
+    async def try_slot(self):
+        """
+        Holds a slot for the block only if one is free right now, without queueing; yields whether
+        it did. For work that can be skipped under load (e.g. partial transcripts).
+        """
+        if self.in_flight >= self.max_concurrent or self._waiters:
+            yield False
+            return
+        self.in_flight += 1
+        self.admitted += 1
+        start = time.perf_counter()
+        try:
+            yield True
+        finally:
+            self._held(start)
+
+    def status(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait_s,
+            "mean_hold_s": round(self._mean_hold_s, 3) if self._mean_hold_s is not None else None,
+            "retry_after_s": self.retry_after_s(),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+# Every controller of the process, by resource name
+admission_controllers: dict[str, AdmissionController] = {}
+
+
+def admission_controller(name: str, max_concurrent: int, max_queue: int, max_wait_s: float) -> AdmissionController:
+    if name in admission_controllers:
+        raise ValueError(f"Admission controller '{name}' is already registered.")
+    controller = AdmissionController(name, max_concurrent, max_queue, max_wait_s)
+    admission_controllers[name] = controller
+    return controller
+
+
+def admission_status() -> dict:
+    return {name: controller.status() for name, controller in admission_controllers.items()}
+
+
+gauge(
+    "admission_in_flight", "Requests holding a slot of the resource.", ["resource"],
+    callback=lambda: {(name,): c.in_flight for name, c in admission_controllers.items()},
+)
+gauge(
+    "admission_waiting", "Requests queued for a slot of the resource.", ["resource"],
+    callback=lambda: {(name,): c.waiting for name, c in admission_controllers.items()},
+)
@@ -0,0 +1,70 @@
+# src/core/executors.py
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.core.metrics import gauge
+
+# Concurrent blocking LLM client calls
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "8"))
+# Audio decoding and voice activity detection ahead of Whisper (milliseconds per request)
+STT_PREPROCESS_WORKERS = int(os.getenv("STT_PREPROCESS_WORKERS", "2"))
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """A ThreadPoolExecutor that counts the tasks waiting for a worker and those running."""
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._lock:
+            self._submitted += 1
+
+        def run():
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._submitted -= 1
+
+        return super().submit(run)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._submitted - self._running
+
+    @property
+    def in_flight(self) -> int:
+        return self._running
+
+
+# Blocking LLM client calls
+llm_executor = InstrumentedExecutor("llm", LLM_MAX_WORKERS)
+# The arm performs one motion at a time: a single worker serializes them off the event loop
+robot_executor = InstrumentedExecutor("robot", 1)
+# STT preprocessing, kept off the default executor and the Whisper replicas' pool
+stt_executor = InstrumentedExecutor("stt", STT_PREPROCESS_WORKERS)
+
+EXECUTORS = [llm_executor, robot_executor, stt_executor]
+
+gauge(
+    "executor_queue_depth", "Tasks waiting for a worker thread.", ["executor"],
+    callback=lambda: {(executor.name,): executor.queue_depth for executor in EXECUTORS},
+)
+gauge(
+    "executor_in_flight", "Tasks running on a worker thread.", ["executor"],
+    callback=lambda: {(executor.name,): executor.in_flight for executor in EXECUTORS},
+)
+
+
+def shutdown_executors():
+    for executor in EXECUTORS:
+        executor.shutdown(wait=False, cancel_futures=True)
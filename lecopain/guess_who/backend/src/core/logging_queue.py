@@ -0,0 +1,77 @@
+# src/core/logging_queue.py
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+# Longest payload (LLM prompt or response, transcription...) written to the logs
+LOG_PAYLOAD_CHARS = int(os.getenv("LOG_PAYLOAD_CHARS", "300"))
+# Fraction of DEBUG records kept (1 = all), to keep debug logging affordable in production
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1"))
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """
+    Logging handler that only enqueues records: a listener thread formats them and writes
+    them to `stream`, so neither formatting nor I/O happens on the event loop.
+
+    Usable from logging.conf: the formatter configured on this handler is applied by the
+    listener's stream handler. DEBUG records are sampled with LOG_DEBUG_SAMPLE_RATE.
+    """
+
+    def __init__(self, stream=None, debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__(queue.SimpleQueue())
+        self.debug_sample_rate = debug_sample_rate
+        self.target = logging.StreamHandler(stream)
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop_listener)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def setLevel(self, level):
+        super().setLevel(level)
+        self.target.setLevel(level)
+
+    def handle(self, record):
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1 and random.random() >= self.debug_sample_rate:
+            return False
+        return super().handle(record)
+
+    def prepare(self, record):
+        # The record is handed over as is (no pickling, same process): message formatting
+        # (%-style arguments) happens on the listener thread
+        return record
+
+    def stop_listener(self):
+        """Writes out the queued records and stops the listener thread (idempotent)."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self.stop_listener()
+        super().close()
+
+
+class Truncated:
+    """
+    Lazily truncated payload for %-style logging arguments: the value is only converted
+    (and cut to `limit` characters) if the record is actually emitted.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit: int = LOG_PAYLOAD_CHARS):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        text = str(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... [{len(text) - self.limit} more chars]"
+
+    __repr__ = __str__
@@ -0,0 +1,121 @@
+# src/core/registry.py
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# How long a request may wait for a model that is still loading before getting a 503
+MODEL_WAIT_TIMEOUT_S = float(os.getenv("MODEL_WAIT_TIMEOUT_S", "10"))
+
+
+@dataclass
+class _Entry:
+    loader: Callable[[], Any]
+    warmup: Callable[[Any], None] | None = None
+    state: str = "pending" # pending -> loading -> warming -> ready | failed
+    value: Any = None
+    error: str | None = None
+    load_time_s: float | None = None
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class ModelRegistry:
+    """
+    Loads heavy models in the background so the server accepts connections immediately.
+
+    Loaders (and their warm-up inference) run in worker threads, started from the FastAPI
+    lifespan. Routes ask for a model with `await get(name)`: they wait up to a timeout
+    while it is loading and fail fast with a 503 if it is not ready by then or failed.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, _Entry] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Callable[[Any], None] | None = None):
+        self._entries[name] = _Entry(loader=loader, warmup=warmup)
+
+    def start(self):
+        """Schedules every registered loader in the background (call from the lifespan)."""
+        for name, entry in self._entries.items():
+            if entry.state == "pending":
+                self._tasks.append(asyncio.create_task(self._load(name, entry)))
+
+    async def _load(self, name: str, entry: _Entry):
+        start = time.perf_counter()
+        try:
+            entry.state = "loading"
+            logger.info("Loading model '%s' in the background...", name)
+            value = await asyncio.to_thread(entry.loader)
+            if entry.warmup is not None:
+                entry.state = "warming"
+                await asyncio.to_thread(entry.warmup, value)
+            entry.value = value
+            entry.state = "ready"
+            entry.load_time_s = time.perf_counter() - start
+            logger.info("Model '%s' ready after %.1fs.", name, entry.load_time_s)
+        except Exception as e:
+            entry.state = "failed"
+            entry.error = f"{type(e).__name__}: {e}"
+            logger.exception("CRITICAL ERROR: Failed to load model '%s': %s", name, e)
+        finally:
+            entry.event.set()
+
+    async def get(self, name: str, timeout: float = MODEL_WAIT_TIMEOUT_S) -> Any:
+        """Returns a loaded model, waiting up to `timeout` seconds (0 = fail fast) while it loads."""
+        entry = self._entries.get(name)
+        if entry is None:
+            raise HTTPException(status_code=500, detail=f"Model '{name}' is not registered.")
+        if entry.state not in ("ready", "failed") and timeout > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(entry.event.wait()), timeout)
+            except asyncio.TimeoutError:
+                pass
+        if entry.state == "ready":
+            return entry.value
+        if entry.state == "failed":
+            raise HTTPException(status_code=503, detail=f"Model '{name}' failed to load.")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model '{name}' is still loading.",
+            headers={"Retry-After": str(max(1, int(MODEL_WAIT_TIMEOUT_S)))},
+        )
+
+    def provide(self, name: str, value: Any):
+        """Registers an already loaded model as ready (benchmarks, tools)."""
+        entry = _Entry(loader=lambda: value, state="ready", value=value, load_time_s=0.0)
+        entry.event.set()
+        self._entries[name] = entry
+
+    def peek(self, name: str) -> Any:
+        """Returns the model if it is ready, None otherwise (never waits)."""
+        entry = self._entries.get(name)
+        return entry.value if entry is not None and entry.state == "ready" else None
+
+    @property
+    def ready(self) -> bool:
+        return all(entry.state == "ready" for entry in self._entries.values())
+
+    def status(self) -> dict:
+        return {
+            name: {"state": entry.state, "load_time_s": entry.load_time_s, "error": entry.error}
+            for name, entry in self._entries.items()
+        }
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for entry in self._entries.values():
+            close = getattr(entry.value, "shutdown", None)
+            if callable(close):
+                close()
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,249 @@
+# src/core/tracing.py
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# --- Tracing configuration ---
+# Directory where trace files are written; tracing is disabled when empty
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+# Allows a request to ask for a sampling profile with the X-Profile header
+TRACE_PROFILING = os.getenv("TRACE_PROFILING", "0") == "1"
+PROFILE_INTERVAL_S = 0.005
+
+GAME_ID_HEADER = "X-Game-Id"
+TRACE_ID_HEADER = "X-Trace-Id"
+PROFILE_HEADER = "X-Profile"
+
+_current_trace: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("current_trace", default=None)
+# Spans opened inside run_in_executor go to the worker thread's lane instead of the request's
+_in_worker: contextvars.ContextVar[bool] = contextvars.ContextVar("in_worker", default=False)
+
+
+class Trace:
+    """
+    Spans of one request, exported as Chrome trace events ("X" complete events).
+
+    Spans on the event loop are drawn on a lane of their own per request, spans in worker
+    threads on the thread's lane, so the robot worker and the LLM calls appear side by side.
+    """
+
+    def __init__(self, game_id: str, name: str):
+        self.game_id = game_id
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.lane = int(self.trace_id[:7], 16)
+        self.events: list[dict] = []
+
+    def add(self, name: str, start_ns: int, end_ns: int, attrs: dict):
+        tid = threading.get_native_id() if _in_worker.get() else self.lane
+        # list.append is atomic, spans can be added from any thread
+        self.events.append({
+            "name": name,
+            "cat": self.game_id,
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {"trace_id": self.trace_id, **attrs},
+        })
+
+    def chrome_events(self) -> list[dict]:
+        lane_name = {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": self.lane,
+                     "args": {"name": f"{self.name} [{self.trace_id[:8]}]"}}
+        return [lane_name, *self.events]
+
+
+def current_trace() -> "Trace | None":
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Times the enclosed block as a span of the current request (a no-op outside traced requests)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        trace.add(name, start_ns, time.perf_counter_ns(), attrs)
+
+
+def traced(name: str | None = None):
+    """Decorator recording each call of a (sync or async) function as a span."""
+
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+async def run_in_executor(executor, fn, *args, span_name: str | None = None, **attrs):
+    """
+    loop.run_in_executor that carries the trace (and every other context variable) into
+    the worker thread, where the call is recorded as a span on the thread's lane.
+    """
+    context = contextvars.copy_context()
+
+    def run():
+        _in_worker.set(True)
+        with span(span_name or fn.__qualname__, **attrs):
+            return fn(*args)
+
+    return await asyncio.get_running_loop().run_in_executor(executor, context.run, run)
+
+
+class TraceWriter:
+    """
+    Appends finished traces to `<TRACE_DIR>/<game_id>.trace.json` from a background thread,
+    so file I/O never runs on the event loop. Files use the Chrome trace JSON array format
+    (whose closing bracket is optional) and open in chrome://tracing or ui.perfetto.dev.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, trace: Trace):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+            self._thread.start()
+        self._queue.put(trace)
+
+    def _run(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            trace = self._queue.get()
+            try:
+                path = self.directory / f"{trace.game_id}.trace.json"
+                new_file = not path.exists()
+                with open(path, "a") as f:
+                    if new_file:
+                        f.write("[\n")
+                    for event in trace.chrome_events():
+                        f.write(json.dumps(event) + ",\n")
+            except Exception:
+                logger.exception("Failed to write trace file.")
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at a fixed interval while a request runs and writes them
+    in the collapsed ("folded") format of flame graph tools. Only one profile runs at a time;
+    other requests running concurrently show up in the samples too.
+    """
+
+    _running = threading.Lock()
+
+    def __init__(self, path: Path, interval_s: float = PROFILE_INTERVAL_S):
+        self.path = path
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+
+    def start(self) -> bool:
+        if not SamplingProfiler._running.acquire(blocking=False):
+            return False
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        SamplingProfiler._running.release()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+
+
+trace_writer = TraceWriter(TRACE_DIR) if TRACE_DIR else None
+
+
+def _clean_game_id(value: str | None) -> str | None:
+    # The game id becomes a file name
+    if not value:
+        return None
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value)[:64]
+
+
+async def tracing_middleware(request, call_next):
+    """
+    Traces each HTTP request under the game id of the X-Game-Id header. Requests without one
+    (metrics scrapes, health probes) are not traced: their trace file would grow forever. With
+    TRACE_PROFILING=1, a request sent with `X-Profile: 1` is also profiled into
+    `<TRACE_DIR>/<game_id>.<trace_id>.folded`.
+    """
+    game_id = _clean_game_id(request.headers.get(GAME_ID_HEADER))
+    if trace_writer is None or game_id is None:
+        return await call_next(request)
+
+    trace = Trace(game_id, f"{request.method} {request.url.path}")
+    token = _current_trace.set(trace)
+    profiler = None
+    if TRACE_PROFILING and request.headers.get(PROFILE_HEADER) == "1":
+        profiler = SamplingProfiler(trace_writer.directory / f"{game_id}.{trace.trace_id}.folded")
+        if not profiler.start():
+            logger.info("A profile is already running, request not profiled.")
+            profiler = None
+    try:
+        with span(trace.name, game_id=game_id):
+            response = await call_next(request)
+        response.headers[TRACE_ID_HEADER] = trace.trace_id
+        return response
+    finally:
+        _current_trace.reset(token)
+        if profiler is not None:
+            await asyncio.to_thread(profiler.stop)
+        trace_writer.submit(trace)
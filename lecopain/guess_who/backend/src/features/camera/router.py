@@ -0,0 +1,115 @@
+# src/features/camera/router.py
+import asyncio
+import contextlib
+import logging
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+
+from .schema import CameraPreviewStatusResponse
+from .services import CAMERA_PREVIEW_ENABLED, preview
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MJPEG_BOUNDARY = "frame"
+
+
+def _check_enabled():
+    if not CAMERA_PREVIEW_ENABLED:
+        raise HTTPException(status_code=404, detail="Camera preview is disabled (CAMERA_PREVIEW=0).")
+
+
+async def _mjpeg_parts() -> AsyncIterator[bytes]:
+    async for jpeg in preview.frames():
+        yield (
+            f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+            + jpeg + b"\r\n"
+        )
+
+
+@router.get(
+    "/preview.mjpg",
+    response_class=StreamingResponse,
+    summary="Live camera preview (MJPEG)",
+    description=(
+        "Frames of the robot's camera as published by the control loop, at most PREVIEW_MAX_FPS "
+        "per second. Usable directly as an <img> source."
+    ),
+    responses={200: {"content": {f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}": {}}}},
+)
+async def http_preview_mjpeg():
+    _check_enabled()
+    return StreamingResponse(
+        _mjpeg_parts(),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@router.get(
+    "/latest.jpg",
+    response_class=Response,
+    summary="Latest camera frame",
+    description="The latest frame published by the control loop, as a JPEG. 503 if no control loop is publishing.",
+    responses={200: {"content": {"image/jpeg": {}}}},
+)
+async def http_latest_frame():
+    _check_enabled()
+    try:
+        # Shared memory read and JPEG encoding, off the event loop
+        jpeg = await asyncio.to_thread(preview.latest_jpeg)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if jpeg is None:
+        raise HTTPException(status_code=503, detail="No camera frame published yet.")
+    return Response(content=jpeg, media_type="image/jpeg", headers={"Cache-Control": "no-store"})
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/ws")
+async def ws_preview(websocket: WebSocket):
+    """Same frames as /preview.mjpg, one binary JPEG message per frame."""
+    await websocket.accept()
+    if not CAMERA_PREVIEW_ENABLED:
+        await websocket.close(code=1008, reason="Camera preview is disabled.")
+        return
+    frames = preview.frames()
+    # Without new frames (arm idle) nothing is sent: watch the socket to notice a disconnect anyway
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+    next_frame = None
+    try:
+        while True:
+            next_frame = asyncio.ensure_future(anext(frames))
+            await asyncio.wait((next_frame, disconnected), return_when=asyncio.FIRST_COMPLETED)
+            if not next_frame.done():
+                break
+            await websocket.send_bytes(next_frame.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in (next_frame, disconnected):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration, WebSocketDisconnect):
+                    await task
+        # Unsubscribes (a no-op if cancelling the pending frame already closed the generator)
+        await frames.aclose()
+
+
+@router.get(
+    "/status",
+    response_model=CameraPreviewStatusResponse,
+    summary="Camera preview status",
+    description="Whether a control loop is publishing frames, and how many clients are watching.",
+)
+async def http_preview_status():
+    return CameraPreviewStatusResponse(enabled=CAMERA_PREVIEW_ENABLED, **preview.status())
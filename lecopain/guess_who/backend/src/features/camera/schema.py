@@ -0,0 +1,15 @@
+# src/features/camera/schema.py
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+class CameraPreviewStatusResponse(BaseModel):
+    """State of the live preview, read from the control loop's shared memory."""
+    enabled: bool
+    attached: bool # A control loop is publishing frames
+    shm_name: str
+    frame_shape: Optional[List[int]] = None # height, width, channels
+    latest_frame: int # Number of the latest published frame (0 = none)
+    latest_frame_age_s: Optional[float] = None # Since the capture of the last frame sent to the clients
+    subscribers: int
+    max_fps: float
@@ -0,0 +1,231 @@
+# src/features/camera/services.py
+import asyncio
+import atexit
+import logging
+import os
+import time
+from typing import AsyncIterator, Callable
+
+import numpy as np
+
+from src.core.metrics import counter, gauge, histogram
+from .frame_ring import FrameRingReader, FrameRingWriter
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+CAMERA_PREVIEW_ENABLED = os.getenv("CAMERA_PREVIEW", "1") == "1"
+CAMERA_PREVIEW_SHM_NAME = os.getenv("CAMERA_PREVIEW_SHM", "lecopain_camera_mounted")
+PREVIEW_IMAGE_KEY = "observation.images.mounted"
+# The preview never encodes more than this, however many clients watch (the control loop runs at 30)
+PREVIEW_MAX_FPS = float(os.getenv("PREVIEW_MAX_FPS", "10"))
+PREVIEW_JPEG_QUALITY = int(os.getenv("PREVIEW_JPEG_QUALITY", "70"))
+# Without new frames for this long, the reader re-attaches (the control worker may have restarted)
+REATTACH_AFTER_S = 2.0
+
+# --- Metrics ---
+PREVIEW_PUBLISH_LATENCY = histogram(
+    "camera_preview_publish_seconds", "Time the control loop spends publishing a frame.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+PREVIEW_ENCODE_LATENCY = histogram("camera_preview_encode_seconds", "Shared-memory read and JPEG encoding of a preview frame.")
+PREVIEW_FRAMES = counter("camera_preview_frames", "Preview frames encoded for the clients.")
+
+
+# --- Publisher (control loop side) ---
+_writer: FrameRingWriter | None = None
+_publish_failed = False
+# Latest frame of the control loop in this process (a reference, no copy), and when it was captured
+_latest_frame: np.ndarray | None = None
+_latest_frame_t = 0.0
+
+
+def publish_preview_frame(observation: dict):
+    """
+    Hands the camera frame of `observation` to the preview: one copy into shared memory,
+    no encoding. Called from the control loop; failures disable the preview, never the loop.
+    The frame is also kept for `latest_frame`, preview or not.
+    """
+    global _writer, _publish_failed, _latest_frame, _latest_frame_t
+    frame = observation.get(PREVIEW_IMAGE_KEY)
+    if frame is None:
+        return
+    # Each observation gets new tensors: keeping a reference is safe
+    _latest_frame = frame.numpy() if hasattr(frame, "numpy") else np.asarray(frame)
+    _latest_frame_t = time.monotonic()
+    if not CAMERA_PREVIEW_ENABLED or _publish_failed:
+        return
+    start = time.perf_counter()
+    try:
+        # torch tensors from the robot share their memory with this view
+        array = _latest_frame
+        if _writer is None or _writer.shape != array.shape:
+            if _writer is not None:
+                _writer.close()
+            _writer = FrameRingWriter(CAMERA_PREVIEW_SHM_NAME, array.shape)
+            logger.info("Publishing camera preview frames %s to shared memory '%s'", array.shape, CAMERA_PREVIEW_SHM_NAME)
+        _writer.write(array)
+    except Exception:
+        _publish_failed = True
+        logger.exception("Camera preview publishing failed, disabling it for this process.")
+    finally:
+        PREVIEW_PUBLISH_LATENCY.observe(time.perf_counter() - start)
+
+
+def latest_frame(max_age_s: float) -> np.ndarray | None:
+    """The control loop's latest frame (RGB, HWC) if captured less than `max_age_s` ago in this process."""
+    frame = _latest_frame
+    if frame is None or time.monotonic() - _latest_frame_t > max_age_s:
+        return None
+    return frame
+
+
+@atexit.register
+def close_publisher():
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+# --- JPEG encoding ---
+_encoder: Callable[[np.ndarray, int], bytes] | None = None
+
+
+def _make_encoder() -> Callable[[np.ndarray, int], bytes]:
+    try:
+        import cv2  # Installed with lerobot on the robot machine
+
+        def encode(frame: np.ndarray, quality: int) -> bytes:
+            ok, buffer = cv2.imencode(".jpg", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                raise RuntimeError("cv2.imencode failed")
+            return buffer.tobytes()
+        return encode
+    except ImportError:
+        pass
+    try:
+        import io
+        from PIL import Image
+
+        def encode(frame: np.ndarray, quality: int) -> bytes:
+            buffer = io.BytesIO()
+            Image.fromarray(frame).save(buffer, format="JPEG", quality=quality)
+            return buffer.getvalue()
+        return encode
+    except ImportError:
+        raise RuntimeError("No JPEG encoder available for the camera preview (install opencv-python or Pillow).")
+
+
+def encode_jpeg(frame: np.ndarray, quality: int = PREVIEW_JPEG_QUALITY) -> bytes:
+    global _encoder
+    if _encoder is None:
+        _encoder = _make_encoder()
+    return _encoder(frame, quality)
+
+
+# --- Preview (API side) ---
+class PreviewBroadcaster:
+    """
+    Reads the latest frame from shared memory at most PREVIEW_MAX_FPS times per second,
+    encodes it once and fans the JPEG out to every client. It only runs while someone
+    watches, and skips frames rather than queueing them.
+    """
+
+    def __init__(self, shm_name: str, max_fps: float = PREVIEW_MAX_FPS, quality: int = PREVIEW_JPEG_QUALITY):
+        self.shm_name = shm_name
+        self.max_fps = max_fps
+        self.quality = quality
+        self.subscribers = 0
+        self._reader: FrameRingReader | None = None
+        self._last_attach_attempt = 0.0
+        self._last_number = 0
+        self._last_new_frame = 0.0
+        self._jpeg: bytes | None = None
+        self._captured_at = 0.0
+        self._version = 0
+        self._condition = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+
+    def _attached_reader(self) -> FrameRingReader | None:
+        now = time.monotonic()
+        if self._reader is not None and now - self._last_new_frame > REATTACH_AFTER_S and now - self._last_attach_attempt > REATTACH_AFTER_S:
+            self._reader.close()
+            self._reader = None
+        if self._reader is None and now - self._last_attach_attempt > 1.0:
+            self._last_attach_attempt = now
+            try:
+                self._reader = FrameRingReader(self.shm_name)
+                self._last_number = 0
+                self._last_new_frame = now
+            except (FileNotFoundError, ValueError):
+                self._reader = None
+        return self._reader
+
+    def _read_and_encode(self, reader: FrameRingReader, after: int) -> tuple[int, float, bytes] | None:
+        result = reader.read_latest(after=after)
+        if result is None:
+            return None
+        number, captured_at, frame = result
+        return number, captured_at, encode_jpeg(frame, self.quality)
+
+    async def _run(self):
+        period = 1.0 / self.max_fps
+        while self.subscribers > 0:
+            start = time.perf_counter()
+            reader = self._attached_reader()
+            if reader is not None:
+                try:
+                    encoded = await asyncio.to_thread(self._read_and_encode, reader, self._last_number)
+                except Exception:
+                    logger.exception("Camera preview encoding failed.")
+                    encoded = None
+                if encoded is not None:
+                    PREVIEW_ENCODE_LATENCY.observe(time.perf_counter() - start)
+                    PREVIEW_FRAMES.inc()
+                    self._last_number, self._captured_at, jpeg = encoded
+                    self._last_new_frame = time.monotonic()
+                    async with self._condition:
+                        self._jpeg = jpeg
+                        self._version += 1
+                        self._condition.notify_all()
+            await asyncio.sleep(max(0.0, period - (time.perf_counter() - start)))
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        """JPEG frames as they come (at most max_fps), until the caller stops iterating."""
+        self.subscribers += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            seen = 0
+            while True:
+                async with self._condition:
+                    await self._condition.wait_for(lambda: self._version > seen)
+                    seen, jpeg = self._version, self._jpeg
+                yield jpeg
+        finally:
+            self.subscribers -= 1
+
+    def latest_jpeg(self) -> bytes | None:
+        """Encodes the latest frame in shared memory now (single snapshot), None if there is none."""
+        reader = self._attached_reader()
+        if reader is None:
+            return None
+        result = reader.read_latest()
+        return encode_jpeg(result[2], self.quality) if result is not None else None
+
+    def status(self) -> dict:
+        reader = self._reader
+        return {
+            "attached": reader is not None,
+            "shm_name": self.shm_name,
+            "frame_shape": list(reader.shape) if reader is not None else None,
+            "latest_frame": reader.latest_number if reader is not None else 0,
+            "latest_frame_age_s": round(time.time() - self._captured_at, 3) if self._captured_at else None,
+            "subscribers": self.subscribers,
+            "max_fps": self.max_fps,
+        }
+
+
+preview = PreviewBroadcaster(CAMERA_PREVIEW_SHM_NAME)
+gauge("camera_preview_subscribers", "Clients watching the camera preview.", callback=lambda: {(): preview.subscribers})
@@ -0,0 +1,18 @@
+# src/features/guess_who/constants.py
+# Game data shared with other features (e.g. STT vocabulary biasing).
+# Kept free of heavy imports so it can be used without the LLM client or the robot stack.
+
+# Board layout used by the grid-conditioned policy
+NUM_COLS = 8
+NUM_ROWS = 3
+
+# Animal names remain in French as they are identifiers from the original game setup
+ANIMAL_COORDS = {
+    "Grenouille": [0, 0], "Chien": [0, 1], "Chat": [0, 2], "Vache": [0, 3],
+    "Lion": [0, 4], "Girafe": [0, 5], "Singe": [0, 6], "Pieuvre": [0, 7],
+    "Poisson": [1, 0], "Pingouin": [1, 1], "Rouge-Gorge": [1, 2], "Elephant": [1, 3],
+    "Chenille": [1, 4], "Requin-Tigre": [1, 5], "Corbeau": [1, 6], "Ours Polaire": [1, 7],
+    "Araignée": [2, 0], "Mouche": [2, 1], "Chouette": [2, 2], "Escargot": [2, 3],
+    "Serpent": [2, 4], "Rat": [2, 5], "Mouton": [2, 6], "Crocodile": [2, 7]
+}
+ALL_CHARACTERS = list(ANIMAL_COORDS.keys())
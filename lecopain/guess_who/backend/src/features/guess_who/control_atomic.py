@@ -1,8 +1,10 @@
 import logging
 import os
 import time
+from itertools import islice
 from dataclasses import asdict, dataclass
 from pprint import pformat
+from typing import Callable
 import numpy as np
 import random
 import shutil
@@ -10,7 +12,6 @@ import rerun as rr
 
 # from safetensors.torch import load_file, save_file
 from lerobot.common.datasets.lerobot_dataset import LeRobotDataset
-from lerobot.common.policies.factory import make_policy
 from lerobot.common.robot_devices.control_configs import (
     RecordControlConfig,
     TeleoperateControlConfig,
@@ -41,6 +42,14 @@ from lerobot.configs.types import PolicyFeature, FeatureType
 import shutil
 import torch
 
+from src.core.tracing import span
+from src.features.camera.services import publish_preview_frame
+from .motion import move_to_home
+from .policies import PolicyRegistry
+from .playback import PLAYBACK_MAX_RELATIVE_TARGET, PlaybackStats, TimeScaledPlayback, playback_speed
+from .recording import AsyncFrameRecorder, LoopTimer
+
+logger = logging.getLogger(__name__)
 
 ########################################################################################
 # Control modes
@@ -64,48 +73,157 @@ class Config:
     robot: So100RobotConfig
     control: RecordControlConfig
 
+def run_episode(
+    robot: Robot,
+    policy,
+    fps: int | None,
+    control_time_s: float,
+    current_grid: torch.Tensor,
+    recorder: AsyncFrameRecorder | None = None,
+    events: dict | None = None,
+    timer: LoopTimer | None = None,
+    speed: float = 1.0,
+) -> PlaybackStats:
+    """
+    Runs one episode of the control loop at `fps`. With a `recorder`, every (observation, action)
+    is handed to its queue, which never blocks: writing happens in the recorder's writer thread.
+
+    With a policy and `speed` above 1, its actions are played time-scaled (see playback.py): the
+    episode ends once `control_time_s` of the policy's timeline has been played, in less time.
+    At speed 1 the episode ends after `control_time_s` of wall time.
+    """
+    stats = PlaybackStats(speed=speed)
+    playback = None
+    if policy is not None:
+        device = get_safe_torch_device(policy.config.device)
+        playback = TimeScaledPlayback(
+            lambda observation: predict_action(observation, policy, device, policy.config.use_amp),
+            speed,
+            peek_ahead=lambda n: _peek_policy_actions(policy, n),
+        )
+    # Faster than the demonstrations, the episode lasts `control_time_s` of the policy's timeline;
+    # otherwise `control_time_s` of wall time, as without time scaling
+    on_policy_timeline = playback is not None and fps is not None and speed != 1.0
+    timestamp = 0
+    start_episode_t = time.perf_counter()
+    while (playback.position / fps if on_policy_timeline else timestamp) < control_time_s:
+        start_loop_t = time.perf_counter()
+
+        if policy is None:
+            observation, action = robot.teleop_step(record_data=True)
+            observation["grid_position"] = current_grid
+        else:
+            observation = robot.capture_observation()
+            observation["grid_position"] = current_grid
+            pred_action = playback.next_action(observation)
+            # Action can eventually be clipped using `max_relative_target`,
+            # so action actually sent is saved in the dataset.
+            action = robot.send_action(pred_action)
+            if (action - pred_action).abs().max() > 1e-3:
+                stats.clamped_ticks += 1
+            action = {"action": action}
+        stats.ticks += 1
+
+        # After the action is sent: the preview copy never delays the robot
+        publish_preview_frame(observation)
+        if recorder is not None:
+            recorder.add_frame(observation, action)
+
+        dt_s = time.perf_counter() - start_loop_t
+        if timer is not None:
+            timer.add(dt_s)
+        if fps is not None:
+            busy_wait(1 / fps - dt_s)
+
+        timestamp = time.perf_counter() - start_episode_t
+        if events is not None and events["exit_early"]:
+            events["exit_early"] = False
+            break
+
+    stats.duration_s = time.perf_counter() - start_episode_t
+    if playback is not None:
+        stats.policy_steps = playback.position
+        stats.grasp_ticks = playback.grasp_ticks
+    return stats
+
+
+def _peek_policy_actions(policy, n: int) -> list[torch.Tensor]:
+    """Up to `n` actions the policy already predicted but did not return yet (ACT's action queue)."""
+    queue = getattr(policy, "_action_queue", None)
+    if not queue:
+        return []
+    return [action.squeeze(0).cpu() for action in islice(queue, n)]
+
+
+def reset_phase(robot: Robot, recorder: AsyncFrameRecorder | None, cfg: RecordControlConfig, events: dict | None):
+    """
+    Gives `cfg.reset_time_s` to put the environment back (teleoperated if no policy),
+    while the recorder saves the previous episode in the background.
+    """
+    start_reset_t = time.perf_counter()
+    while time.perf_counter() - start_reset_t < cfg.reset_time_s:
+        start_loop_t = time.perf_counter()
+        if cfg.policy is None:
+            robot.teleop_step()
+        if events is not None and events["exit_early"]:
+            events["exit_early"] = False
+            break
+        busy_wait(1 / cfg.fps - (time.perf_counter() - start_loop_t))
+    if recorder is not None:
+        logger.info("Recorder after reset: %s", recorder.stats())
+
+
 @safe_disconnect
 def record(
     robot: Robot,
     cfg: RecordControlConfig,
     index:int,
     row_col: tuple[int, int] = None,
-) -> LeRobotDataset:
+    collect: bool = False,
+    speed: float = 1.0,
+) -> PlaybackStats | None:
+    """
+    Runs the policy (or teleoperation) on grid cell `row_col`, time-scaled by `speed`, and returns
+    the episode's stats. With `collect=True`, `cfg.num_episodes` episodes are recorded into the
+    dataset at normal speed instead (see collect_episodes).
+    """
     cfg.repo_id = cfg.repo_id + "_" + str(index)
     # Create empty dataset or load existing saved episodes
     sanity_check_dataset_name(cfg.repo_id, cfg.policy)
-    dataset = LeRobotDataset.create(
-        cfg.repo_id,
-        cfg.fps,
-        root=cfg.root,
-        robot=robot,
-        use_videos=cfg.video,
-        image_writer_processes=cfg.num_image_writer_processes,
-        image_writer_threads=cfg.num_image_writer_threads_per_camera * len(robot.cameras),
-    )
+    with span("robot.create_dataset"):
+        dataset = LeRobotDataset.create(
+            cfg.repo_id,
+            cfg.fps,
+            root=cfg.root,
+            robot=robot,
+            use_videos=cfg.video,
+            image_writer_processes=cfg.num_image_writer_processes,
+            image_writer_threads=cfg.num_image_writer_threads_per_camera * len(robot.cameras),
+        )
 
-    # Load pretrained policy
-    policy = None if cfg.policy is None else make_policy(cfg.policy, ds_meta=dataset.meta)
+    # Resident policy (loaded at startup, or when switching checkpoints, see policies.py)
+    checkpoint, policy = None, None
+    if cfg.policy is not None:
+        with span("robot.load_policy"):
+            checkpoint, policy = policy_registry.policy_for_episode()
 
     if not robot.is_connected:
-        robot.connect()
-
-    # Interpolate between current position and goal position 
-    # observation = robot.capture_observation()
-    # print(observation)
-    # current_position = observation["observation.state"].cpu().numpy()
-    # robot.send_action(torch.tensor([current_position[0], 135, 135, 4, -90, 3]))
-    # time.sleep(0.5)
-    # robot.send_action(torch.tensor([0, 135, 135, 4, -90, 3]))
+        with span("robot.connect"):
+            robot.connect()
 
-    listener, events = init_keyboard_listener()
+    # Keyboard controls (re-record, stop) only matter when collecting: a flip starts no listener thread
+    listener, events = init_keyboard_listener() if collect else (None, None)
 
-    # Execute a few seconds without recording to:
-    # 1. teleoperate the robot to move it in starting position if no policy provided,
-    # 2. give times to the robot devices to connect and start synchronizing,
-    # 3. place the cameras windows on screen
     enable_teleoperation = policy is None
-    warmup_record(robot, None, enable_teleoperation, cfg.warmup_time_s, cfg.display_data, cfg.fps)
+    if enable_teleoperation:
+        # Execute a few seconds without recording to teleoperate the robot to its starting position,
+        # give times to the robot devices to connect and start synchronizing, and place the camera windows
+        with span("robot.warmup"):
+            warmup_record(robot, None, enable_teleoperation, cfg.warmup_time_s, cfg.display_data, cfg.fps)
+    else:
+        # The policy starts from the home pose: interpolate there and go as soon as it is reached
+        with span("robot.move_home"):
+            move_to_home(robot, cfg.fps)
 
     control_time_s = cfg.episode_time_s
     #while True:
@@ -118,30 +236,72 @@ def record(
 
     if dataset is not None and cfg.fps is not None and dataset.fps != cfg.fps:
         raise ValueError(f"The dataset fps should be equal to requested fps ({dataset['fps']} != {cfg.fps}).")
-    
-    timestamp = 0
-    start_episode_t = time.perf_counter()
-    while timestamp < control_time_s:
-        start_loop_t = time.perf_counter()
-        
-        observation = robot.capture_observation()
-        observation["grid_position"] = current_grid
-        if policy is not None:
-            pred_action = predict_action(
-                observation, policy, get_safe_torch_device(policy.config.device), policy.config.use_amp
-            )
-            # Action can eventually be clipped using `max_relative_target`,
-            # so action actually sent is saved in the dataset.
-            action = robot.send_action(pred_action)
-            action = {"action": action}
 
-        if cfg.fps is not None:
-            dt_s = time.perf_counter() - start_loop_t
-            busy_wait(1 / cfg.fps - dt_s)
+    if not collect:
+        with span("robot.episode", row_col=str(row_col), speed=speed):
+            stats = run_episode(robot, policy, cfg.fps, control_time_s, current_grid, speed=speed)
+        stats.checkpoint = checkpoint
+        logger.info("Finished trajectory on %s: %s", row_col, stats)
+        return stats
 
-        dt_s = time.perf_counter() - start_loop_t
-        timestamp = time.perf_counter() - start_episode_t
-    print("Finished recording trajectory")
+    try:
+        collect_episodes(robot, policy, cfg, dataset, events, [(row_col, None)] * cfg.num_episodes)
+    finally:
+        if listener is not None:
+            listener.stop()
+
+
+def collect_episodes(
+    robot: Robot,
+    policy,
+    cfg: RecordControlConfig,
+    dataset: LeRobotDataset,
+    events: dict,
+    plan: list[tuple[tuple[int, int], Callable[[], None] | None]],
+):
+    """
+    Records one episode per `(row_col, on_saved)` of `plan` into `dataset`, with a reset phase
+    between episodes. Frames go through an AsyncFrameRecorder so that writing never stalls the
+    control loop; each episode is saved during the following reset phase, then `on_saved` is called.
+    """
+    control_time_s = cfg.episode_time_s if cfg.episode_time_s is not None else float("inf")
+    recorder = AsyncFrameRecorder(dataset, task=cfg.single_task)
+    timer = LoopTimer(cfg.fps)
+    try:
+        i = 0
+        while i < len(plan) and not events["stop_recording"]:
+            row_col, on_saved = plan[i]
+            # Saving longer than the reset would fill the queue during the next episode
+            if not recorder.wait(0):
+                logger.info("Waiting for the previous episode to be saved...")
+                recorder.wait()
+            logger.info("Recording episode %s on cell %s (%s/%s)", dataset.num_episodes, row_col, i + 1, len(plan))
+            timer.reset()
+            if policy is not None:
+                # Drop the action queue of the previous episode
+                policy.reset()
+            current_grid = torch.tensor(row_col, dtype=torch.float)
+            run_episode(robot, policy, cfg.fps, control_time_s, current_grid, recorder, events, timer)
+
+            if events["rerecord_episode"]:
+                events["rerecord_episode"] = False
+                recorder.discard_episode()
+                reset_phase(robot, None, cfg, events)
+                continue
+
+            dropped = recorder.end_episode(on_saved)
+            logger.info("Control loop: %s, dropped frames: %s", timer.summary(), dropped)
+            if dropped:
+                # Discarded by the recorder: record the cell again once the writer has caught up
+                reset_phase(robot, None, cfg, events)
+                continue
+            i += 1
+            if i < len(plan) and not events["stop_recording"]:
+                reset_phase(robot, recorder, cfg, events)
+        recorder.wait()
+    finally:
+        recorder.close()
+    logger.info("Recording done: %s", recorder.stats())
 
 
 @dataclass
@@ -149,10 +309,7 @@ class Config_dummy():
     robot: So100RobotConfig
     control: RecordControlConfig
 
-def control_robot(
-    row_col: tuple[int, int],
-    index: int,
-):
+def make_config() -> Config_dummy:
     # TODO : fix the call to config here 
     cfg = Config_dummy(
         robot=So100RobotConfig(
@@ -262,10 +419,25 @@ def control_robot(
             resume=False
         )
     )
-    cfg.control.policy.pretrained_path = '~/LeCopain/lecopain/guess_who/backend/src/features/guess_who/checkpoints/100000_full_light/pretrained_model'
+    cfg.control.policy.pretrained_path = None # Checkpoints are chosen by the policy registry (see policies.py)
+    return cfg
+
+
+policy_registry = PolicyRegistry(make_config().control.policy)
+
 
-    robot = make_robot_from_config(cfg.robot)
-    record(robot, cfg.control, row_col=row_col, index=index)
+def control_robot(
+    row_col: tuple[int, int],
+    index: int,
+) -> PlaybackStats:
+    cfg = make_config()
+    speed = playback_speed(*row_col)
+    if speed > 1.0:
+        # Faster than the demonstrations: bound each joint's move per tick
+        cfg.robot.max_relative_target = PLAYBACK_MAX_RELATIVE_TARGET
+    with span("robot.make_robot"):
+        robot = make_robot_from_config(cfg.robot)
+    return record(robot, cfg.control, row_col=row_col, index=index, speed=speed)
 
 
 
@@ -276,9 +448,12 @@ def robot_move_grid(row: int, col: int):
     Args:
         row (int): The row index of the grid.
         col (int): The column index of the grid.
+
+    Returns:
+        PlaybackStats: Duration and playback statistics of the flip.
     """
     index = row * NUM_COLS + col
-    control_robot(row_col=[row, col], index=index)
+    return control_robot(row_col=[row, col], index=index)
 
 if __name__ == "__main__":
    index = 0
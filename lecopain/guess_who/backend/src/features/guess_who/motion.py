@@ -0,0 +1,143 @@
+"""
+Velocity-limited moves of the follower arm to a joint pose, used to bring the arm home before
+each flip instead of a fixed warm-up period.
+
+The move reads the current joint positions from the motor bus (no camera capture), then sends
+a minimum-jerk trajectory to the target: smooth start and stop, timed so that no joint exceeds
+`max_velocity_deg_s`. It returns as soon as every joint is within `tolerance_deg` of the
+target. The cameras, reconnected for every flip, are read during the move and then until
+ROBOT_CAMERA_SETTLE_S has passed and each delivered a frame, even if the arm was already home.
+"""
+import logging
+import os
+import time
+
+import numpy as np
+import torch
+from lerobot.common.robot_devices.robots.utils import Robot
+from lerobot.common.robot_devices.utils import busy_wait
+
+logger = logging.getLogger(__name__)
+
+# Start pose of the demonstrations: shoulder_pan, shoulder_lift, elbow_flex, wrist_flex, wrist_roll, gripper
+HOME_POSE = tuple(float(v) for v in os.getenv("ROBOT_HOME_POSE", "0 135 135 4 -90 3").split())
+ROBOT_HOME_MAX_VELOCITY_DEG_S = float(os.getenv("ROBOT_HOME_MAX_VELOCITY_DEG_S", "90"))
+# Joint error below which the arm is considered home
+HOME_TOLERANCE_DEG = 2.0
+# Time allowed after the trajectory for the motors to catch up with the last command
+HOME_SETTLE_TIMEOUT_S = 1.0
+# Shortest move, so that tiny corrections are not jerky
+MIN_MOVE_S = 0.2
+# Peak velocity of a minimum-jerk move over its average velocity
+MIN_JERK_PEAK_RATIO = 1.875
+# The cameras are reconnected for every flip: time they are read before the first observation,
+# even when the arm is already home, so that auto exposure and the capture threads settle
+ROBOT_CAMERA_SETTLE_S = float(os.getenv("ROBOT_CAMERA_SETTLE_S", "1.0"))
+# Longest wait for every camera to deliver a frame
+CAMERA_SETTLE_TIMEOUT_S = 5.0
+
+
+def min_jerk_trajectory(start: np.ndarray, goal: np.ndarray, max_velocity_deg_s: float, fps: int) -> np.ndarray:
+    """
+    Joint positions at each tick (excluding `start`, ending exactly at `goal`) of a minimum-jerk
+    move whose fastest joint peaks at `max_velocity_deg_s`. All joints start and stop together.
+    """
+    distance = float(np.abs(goal - start).max())
+    duration_s = max(MIN_MOVE_S, MIN_JERK_PEAK_RATIO * distance / max_velocity_deg_s)
+    num_ticks = max(1, int(np.ceil(duration_s * fps)))
+    tau = np.arange(1, num_ticks + 1) / num_ticks
+    progress = 10 * tau**3 - 15 * tau**4 + 6 * tau**5
+    return start + progress[:, None] * (goal - start)
+
+
+def read_joint_positions(robot: Robot) -> np.ndarray:
+    """Present positions of the follower arms (degrees), in the order of the action vector."""
+    return np.concatenate([
+        np.asarray(arm.read("Present_Position"), dtype=np.float32) for arm in robot.follower_arms.values()
+    ])
+
+
+def _poll_cameras(robot: Robot) -> set[str]:
+    """Reads every camera once (keeps their capture threads running). Returns those that delivered a frame."""
+    ready = set()
+    for name, camera in robot.cameras.items():
+        try:
+            if camera.async_read() is not None:
+                ready.add(name)
+        except TimeoutError:
+            pass # Capture thread not started yet
+    return ready
+
+
+def settle_cameras(robot: Robot, fps: int, min_s: float) -> dict:
+    """
+    Reads the cameras at `fps` for at least `min_s` and until each has delivered a frame, so
+    that the first observation of the episode is a settled frame, as after the old warm-up.
+    """
+    start_t = time.perf_counter()
+    ready: set[str] = set()
+    while True:
+        start_loop_t = time.perf_counter()
+        ready |= _poll_cameras(robot)
+        elapsed_s = time.perf_counter() - start_t
+        if elapsed_s >= min_s and len(ready) == len(robot.cameras):
+            break
+        if elapsed_s > max(min_s, CAMERA_SETTLE_TIMEOUT_S):
+            logger.warning("Cameras %s delivered no frame within %.1fs", sorted(set(robot.cameras) - ready), elapsed_s)
+            break
+        busy_wait(1 / fps - (time.perf_counter() - start_loop_t))
+    return {"duration_s": time.perf_counter() - start_t, "cameras_ready": len(ready)}
+
+
+def move_to(robot: Robot, target, fps: int, max_velocity_deg_s: float = ROBOT_HOME_MAX_VELOCITY_DEG_S,
+            tolerance_deg: float = HOME_TOLERANCE_DEG) -> dict:
+    """Moves the follower arm to the joint pose `target`. Returns the move's duration and final error."""
+    start_t = time.perf_counter()
+    target = np.asarray(target, dtype=np.float32)
+    start = read_joint_positions(robot)
+    ticks = 0
+    if np.abs(target - start).max() > tolerance_deg:
+        for pose in min_jerk_trajectory(start, target, max_velocity_deg_s, fps):
+            start_loop_t = time.perf_counter()
+            robot.send_action(torch.from_numpy(pose.astype(np.float32)))
+            _poll_cameras(robot)
+            ticks += 1
+            busy_wait(1 / fps - (time.perf_counter() - start_loop_t))
+
+    settle_start_t = time.perf_counter()
+    error = float(np.abs(target - read_joint_positions(robot)).max())
+    while error > tolerance_deg and time.perf_counter() - settle_start_t < HOME_SETTLE_TIMEOUT_S:
+        start_loop_t = time.perf_counter()
+        robot.send_action(torch.from_numpy(target))
+        _poll_cameras(robot)
+        busy_wait(1 / fps - (time.perf_counter() - start_loop_t))
+        error = float(np.abs(target - read_joint_positions(robot)).max())
+    if error > tolerance_deg:
+        logger.warning("Arm still %.1f degrees away from the target after the move", error)
+    return {"duration_s": time.perf_counter() - start_t, "ticks": ticks, "error_deg": error}
+
+
+def move_to_home(robot: Robot, fps: int, home=HOME_POSE) -> dict:
+    """
+    Brings the arm to `home` in two moves: every joint but the shoulder pan first, then the pan,
+    so that the arm is lifted before it sweeps over the board.
+    """
+    start_t = time.perf_counter()
+    current = read_joint_positions(robot)
+    lifted = np.asarray(home, dtype=np.float32).copy()
+    lifted[0] = current[0]
+    lift = move_to(robot, lifted, fps)
+    pan = move_to(robot, home, fps)
+    # The cameras were read during the move: only the rest of the settle window is left
+    settle = settle_cameras(robot, fps, ROBOT_CAMERA_SETTLE_S - (time.perf_counter() - start_t))
+    stats = {
+        "duration_s": time.perf_counter() - start_t,
+        "ticks": lift["ticks"] + pan["ticks"],
+        "error_deg": pan["error_deg"],
+        "camera_settle_s": settle["duration_s"],
+    }
+    logger.info(
+        "Arm home in %.2fs (%s ticks, error %.1f degrees, cameras settled for %.2fs)",
+        stats["duration_s"], stats["ticks"], stats["error_deg"], stats["camera_settle_s"],
+    )
+    return stats
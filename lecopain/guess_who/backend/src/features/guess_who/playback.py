@@ -0,0 +1,194 @@
+"""
+Time-scaled playback of the policy's actions, to flip cards faster than the demonstrations.
+
+The ACT policy reproduces teleoperated demonstrations at the recorded pace (30 actions per
+second), much of which is slow human motion rather than anything the arm needs. With a speed
+factor above 1, each control tick advances the policy's timeline by `speed` steps instead of one
+and sends the action linearly interpolated at that point, so the same trajectory is played in
+less time. The policy is still queried through `select_action`: with ACT's action chunks, the
+extra steps are read from the current chunk and a new chunk is predicted from the latest
+observation, as at normal speed.
+
+Around the grasp (the gripper command moving, plus GRASP_MARGIN_STEPS on both sides) the
+playback falls back to normal speed. Joint velocities stay bounded by the robot's
+`max_relative_target`, set to PLAYBACK_MAX_RELATIVE_TARGET whenever the speed is above 1.
+
+Every flip is appended to ROBOT_FLIP_LOG (cell, checkpoint, speed, duration, camera-checked
+success) and summarized per cell, to find the speed each cell (and checkpoint) tolerates:
+    python -m src.features.guess_who.playback
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Policy steps played per control tick outside the grasp (1 = demonstration speed)
+ROBOT_PLAYBACK_SPEED = float(os.getenv("ROBOT_PLAYBACK_SPEED", "1.0"))
+# Per-cell overrides, e.g. "1,6=1.0 2,3=1.25" (cells that fail at the global speed)
+ROBOT_PLAYBACK_SPEED_CELLS = os.getenv("ROBOT_PLAYBACK_SPEED_CELLS", "")
+# Largest joint move per control tick (degrees) while playing faster than the demonstrations
+PLAYBACK_MAX_RELATIVE_TARGET = float(os.getenv("PLAYBACK_MAX_RELATIVE_TARGET", "10"))
+ROBOT_FLIP_LOG = Path(os.getenv("ROBOT_FLIP_LOG", Path.home() / ".cache" / "lecopain" / "flips.jsonl"))
+
+# Index of the gripper in the action vector (shoulder_pan ... wrist_roll, gripper)
+GRIPPER_INDEX = 5
+# Gripper command change per policy step (degrees) above which the arm is grasping
+GRASP_GRIPPER_DELTA = 0.5
+# Policy steps played at normal speed before and after the gripper moves
+GRASP_MARGIN_STEPS = 15
+
+
+def _parse_cell_speeds(spec: str) -> dict[tuple[int, int], float]:
+    speeds = {}
+    for item in spec.split():
+        cell, speed = item.split("=")
+        row, col = cell.split(",")
+        speeds[int(row), int(col)] = float(speed)
+    return speeds
+
+
+CELL_SPEEDS = _parse_cell_speeds(ROBOT_PLAYBACK_SPEED_CELLS)
+
+
+def playback_speed(row: int, col: int) -> float:
+    return CELL_SPEEDS.get((row, col), ROBOT_PLAYBACK_SPEED)
+
+
+@dataclass
+class PlaybackStats:
+    """Outcome of one episode of the control loop."""
+    speed: float
+    duration_s: float = 0.0
+    ticks: int = 0 # Control loop iterations (actions sent)
+    policy_steps: float = 0.0 # Position reached on the policy's timeline
+    grasp_ticks: int = 0 # Ticks played at normal speed around the grasp
+    clamped_ticks: int = 0 # Ticks whose action was limited by max_relative_target
+    checkpoint: str | None = None # Policy checkpoint that played the episode
+
+
+class TimeScaledPlayback:
+    """
+    Resamples the stream of policy actions in time. `next_policy_action(observation)` returns
+    the policy's next action (one per policy step); `peek_ahead(n)` optionally returns up to `n`
+    actions already predicted but not consumed yet, which lets the grasp slow-down start before
+    the gripper moves. Actions are tensors or arrays of joint positions.
+    """
+
+    def __init__(
+        self,
+        next_policy_action: Callable[[dict], Any],
+        speed: float,
+        peek_ahead: Callable[[int], list] | None = None,
+        gripper_index: int = GRIPPER_INDEX,
+        grasp_delta: float = GRASP_GRIPPER_DELTA,
+        margin_steps: int = GRASP_MARGIN_STEPS,
+    ):
+        if speed <= 0:
+            raise ValueError(f"Playback speed must be positive, got {speed}")
+        self.next_policy_action = next_policy_action
+        self.speed = speed
+        self.peek_ahead = peek_ahead
+        self.gripper_index = gripper_index
+        self.grasp_delta = grasp_delta
+        self.margin_steps = margin_steps
+        self.position = 0.0 # On the policy's timeline, in policy steps
+        self.grasp_ticks = 0
+        self._actions: list = [] # Consumed policy actions, by policy step
+        self._last_grasp_step = -math.inf
+
+    def _action(self, step: int, observation: dict):
+        while len(self._actions) <= step:
+            action = self.next_policy_action(observation)
+            self._actions.append(action)
+            if len(self._actions) > 1 and self._gripper_moves(self._actions[-2], action):
+                self._last_grasp_step = len(self._actions) - 1
+        return self._actions[step]
+
+    def _gripper_moves(self, previous, action) -> bool:
+        return abs(float(action[self.gripper_index]) - float(previous[self.gripper_index])) > self.grasp_delta
+
+    def _grasp_ahead(self) -> bool:
+        if self.peek_ahead is None or not self._actions:
+            return False
+        upcoming = [self._actions[-1], *self.peek_ahead(self.margin_steps)]
+        return any(self._gripper_moves(a, b) for a, b in zip(upcoming, upcoming[1:]))
+
+    def in_grasp(self) -> bool:
+        return self.position - self._last_grasp_step <= self.margin_steps or self._grasp_ahead()
+
+    def next_action(self, observation: dict):
+        """The action to send on this tick, then advances the timeline (by 1 step around the grasp)."""
+        step = int(self.position)
+        fraction = self.position - step
+        action = self._action(step, observation)
+        if fraction > 0:
+            following = self._action(step + 1, observation)
+            action = action + (following - action) * fraction
+        if self.speed != 1.0 and self.in_grasp():
+            self.grasp_ticks += 1
+            self.position += min(1.0, self.speed)
+        else:
+            self.position += self.speed
+        return action
+
+
+# --- Flip log ---
+def log_flips(records: list[dict], path: Path = ROBOT_FLIP_LOG):
+    """Appends flip records (row, col, attempt, success, and the episode's PlaybackStats) to the JSONL log."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a") as f:
+            for record in records:
+                f.write(json.dumps({"time": time.time(), **record}) + "\n")
+    except OSError as e:
+        logger.warning("Could not write the flip log '%s': %s", path, e)
+
+
+def flip_record(row: int, col: int, attempt: int, stats: PlaybackStats | None, success: bool | None) -> dict:
+    """`success` is None when the flip could not be checked on camera (no card state calibration)."""
+    return {"row": row, "col": col, "attempt": attempt, "success": success, **(asdict(stats) if stats else {})}
+
+
+def summarize(path: Path) -> list[dict]:
+    """Per cell, checkpoint and speed: flips, camera-checked successes and durations."""
+    groups = defaultdict(list)
+    with path.open() as f:
+        for line in f:
+            record = json.loads(line)
+            groups[record["row"], record["col"], record.get("checkpoint") or "-", record.get("speed", 1.0)].append(record)
+    rows = []
+    for (row, col, checkpoint, speed), records in sorted(groups.items()):
+        checked = [r["success"] for r in records if r["success"] is not None]
+        durations = [r["duration_s"] for r in records if "duration_s" in r]
+        rows.append({
+            "row": row, "col": col, "checkpoint": checkpoint, "speed": speed, "flips": len(records),
+            "success_rate": sum(checked) / len(checked) if checked else None,
+            "mean_s": sum(durations) / len(durations) if durations else None,
+            "max_s": max(durations) if durations else None,
+            "clamped_ticks": sum(r.get("clamped_ticks", 0) for r in records),
+        })
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-cell flip success and timing, from the flip log")
+    parser.add_argument("--log", type=Path, default=ROBOT_FLIP_LOG, help="Flip log (JSONL)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{'cell':>6} {'checkpoint':>24} {'speed':>6} {'flips':>6} {'success':>8} {'mean s':>7} {'max s':>7} {'clamped':>8}")
+    for r in summarize(args.log):
+        success = f"{r['success_rate']:.0%}" if r["success_rate"] is not None else "-"
+        mean_s = f"{r['mean_s']:.1f}" if r["mean_s"] is not None else "-"
+        max_s = f"{r['max_s']:.1f}" if r["max_s"] is not None else "-"
+        print(f"{r['row']:>3},{r['col']:<2} {r['checkpoint']:>24} {r['speed']:>6.2f} {r['flips']:>6} {success:>8} {mean_s:>7} {max_s:>7} {r['clamped_ticks']:>8}")
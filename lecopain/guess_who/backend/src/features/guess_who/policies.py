@@ -0,0 +1,184 @@
+"""
+Resident policy checkpoints, loaded once and switched between episodes.
+
+A checkpoint (a `pretrained_model` directory with `model.safetensors`) is loaded by building the
+policy from the configuration in make_config() and assigning the weights straight from the
+memory-mapped safetensors file: no intermediate copy, and on the CPU the tensors stay backed
+by the page cache. Each new checkpoint runs one dummy inference before it is used, so the first
+flip does not pay for CUDA initialization or cuDNN autotuning.
+
+Loading and warm-up run on a background thread. `activate` only takes effect when the next
+episode asks for its policy (`policy_for_episode`), so an episode never sees its policy change.
+With several checkpoints activated at once, episodes rotate through them, and each flip
+records the checkpoint it used in the flip log (see playback.py) for A/B comparisons.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import torch
+from lerobot.common.policies.factory import get_policy_class
+from lerobot.common.utils.utils import get_safe_torch_device
+from safetensors.torch import load_file
+
+logger = logging.getLogger(__name__)
+
+POLICY_CHECKPOINT = os.getenv(
+    "GUESS_WHO_POLICY_CHECKPOINT",
+    str(Path(__file__).parent / "checkpoints" / "100000_full_light" / "pretrained_model"),
+)
+# Checkpoints rotated per episode from startup (A/B), space separated; overrides GUESS_WHO_POLICY_CHECKPOINT
+POLICY_AB_CHECKPOINTS = os.getenv("GUESS_WHO_POLICY_AB_CHECKPOINTS", "").split()
+# Checkpoints kept loaded (the least recently used inactive one is evicted beyond this)
+POLICY_MAX_RESIDENT = int(os.getenv("POLICY_MAX_RESIDENT", "3"))
+
+SAFETENSORS_FILE = "model.safetensors"
+
+
+def checkpoint_key(path: str) -> str:
+    return str(Path(path).expanduser().resolve())
+
+
+def checkpoint_name(path: str) -> str:
+    """Short name for logs: the training run directory rather than `pretrained_model`."""
+    path = Path(path)
+    return path.parent.name if path.name == "pretrained_model" else path.name
+
+
+class PolicyRegistry:
+    """Checkpoints loaded by path, the active ones, and the switch applied between episodes."""
+
+    def __init__(self, policy_config, max_resident: int = POLICY_MAX_RESIDENT):
+        self.policy_config = policy_config
+        self.max_resident = max(1, max_resident)
+        self._policies: OrderedDict[str, torch.nn.Module] = OrderedDict()
+        self._load_times: dict[str, float] = {}
+        self._loading: dict[str, Future] = {}
+        self._active: list[str] = []
+        self._requested: list[str] = []
+        self._rotation = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="policy-loader")
+
+    def _load(self, key: str) -> torch.nn.Module:
+        start = time.perf_counter()
+        config = copy.deepcopy(self.policy_config)
+        config.pretrained_path = key
+        # The checkpoint holds the backbone too: skip torchvision's ImageNet weights
+        config.pretrained_backbone_weights = None
+        device = get_safe_torch_device(config.device)
+        policy = get_policy_class(config.type)(config)
+        # Memory-mapped: tensors are views of the file until moved to the device
+        state_dict = load_file(Path(key) / SAFETENSORS_FILE, device="cpu")
+        policy.load_state_dict(state_dict, strict=True, assign=True)
+        policy.to(device)
+        policy.eval()
+        self._warmup(policy, device)
+        self._load_times[key] = time.perf_counter() - start
+        logger.info("Policy '%s' loaded and warmed up in %.1fs", checkpoint_name(key), self._load_times[key])
+        return policy
+
+    def _warmup(self, policy, device: torch.device):
+        batch = {
+            name: torch.zeros((1, *feature.shape), device=device)
+            for name, feature in policy.config.input_features.items()
+        }
+        batch["grid_position"] = torch.zeros((1, 2), device=device)
+        with torch.inference_mode():
+            policy.select_action(batch)
+        policy.reset()
+
+    def _load_resident(self, key: str) -> torch.nn.Module:
+        with self._lock:
+            policy = self._policies.get(key)
+            if policy is not None:
+                self._policies.move_to_end(key)
+        if policy is None:
+            policy = self._load(key)
+            with self._lock:
+                self._policies[key] = policy
+                self._evict()
+        return policy
+
+    def _evict(self):
+        for key in list(self._policies):
+            if len(self._policies) <= self.max_resident:
+                break
+            if key not in self._active and key not in self._requested:
+                del self._policies[key]
+                logger.info("Evicted policy '%s'", checkpoint_name(key))
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def preload(self, path: str) -> Future:
+        """Loads and warms `path` on the background thread (no-op if resident or already loading)."""
+        key = checkpoint_key(path)
+        with self._lock:
+            future = self._loading.get(key)
+            # Evicted checkpoints (and failed loads) are loaded again
+            if future is None or (future.done() and key not in self._policies):
+                future = self._executor.submit(self._load_resident, key)
+                self._loading[key] = future
+        return future
+
+    def activate(self, paths: list[str]) -> list[Future]:
+        """
+        Uses `paths` (rotated per episode if several) from the first episode starting once they are
+        all loaded; until then, episodes keep the current checkpoints.
+        """
+        if not paths:
+            raise ValueError("At least one checkpoint is needed")
+        keys = [checkpoint_key(path) for path in paths]
+        for key in keys:
+            if not (Path(key) / SAFETENSORS_FILE).exists():
+                raise FileNotFoundError(f"No {SAFETENSORS_FILE} in '{key}'")
+        with self._lock:
+            self._requested = keys
+        logger.info("Switching to policies %s once loaded", [checkpoint_name(key) for key in keys])
+        return [self.preload(key) for key in keys]
+
+    def policy_for_episode(self) -> tuple[str, torch.nn.Module]:
+        """(checkpoint name, policy) for the episode about to start, after applying a pending switch."""
+        with self._lock:
+            if self._requested and all(key in self._policies for key in self._requested):
+                if self._requested != self._active:
+                    logger.info("Now using policies %s", [checkpoint_name(key) for key in self._requested])
+                    self._active, self._rotation = self._requested, 0
+                self._requested = []
+                self._evict()
+            active = list(self._active)
+        if not active:
+            # No switch ready yet (first episode): wait for the requested checkpoints
+            self.load_default(keep_requested=True)
+            return self.policy_for_episode()
+        key = active[self._rotation % len(active)]
+        self._rotation += 1
+        policy = self._load_resident(key)
+        policy.reset() # Drop the action queue of the previous episode
+        return checkpoint_name(key), policy
+
+    def load_default(self, keep_requested: bool = False):
+        """Loads the checkpoints of the environment (blocking; run by the model registry at startup)."""
+        paths = (keep_requested and self._requested) or POLICY_AB_CHECKPOINTS or [POLICY_CHECKPOINT]
+        for future in self.activate(paths):
+            future.result()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "active": [checkpoint_name(key) for key in self._active],
+                "pending": [checkpoint_name(key) for key in self._requested],
+                "resident": {
+                    checkpoint_name(key): {"path": key, "load_time_s": self._load_times.get(key)}
+                    for key in self._policies
+                },
+                "loading": [checkpoint_name(key) for key, future in self._loading.items() if not future.done()],
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,179 @@
+# src/features/guess_who/recording.py
+import logging
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Frames buffered between the control loop and the writer thread (~4s at 30 fps)
+RECORDING_QUEUE_SIZE = 128
+
+_END_EPISODE = "end_episode"
+_DISCARD_EPISODE = "discard_episode"
+_STOP = "stop"
+
+
+@dataclass
+class RecorderStats:
+    frames_queued: int = 0
+    frames_written: int = 0
+    frames_dropped: int = 0
+    backlog: int = 0
+    max_backlog: int = 0
+    episodes_saved: int = 0
+    last_save_s: float = 0.0
+    errors: int = 0
+
+
+class AsyncFrameRecorder:
+    """
+    Moves dataset writing out of the control loop.
+
+    The control loop only hands (observation, action) references to a bounded queue with
+    `add_frame`, which never blocks: when the queue is full the frame is dropped and counted,
+    and `end_episode` discards the episode rather than saving it with a gap.
+    A writer thread feeds them to `LeRobotDataset.add_frame`, whose images are written as PNG
+    by the dataset's image writer processes (`image_writer_processes`). `end_episode` queues
+    the episode flush: the writer waits for the PNGs, then `save_episode` writes the parquet
+    and encodes the videos (ffmpeg subprocesses) while the arm is being reset.
+    """
+
+    def __init__(self, dataset, task: str, max_queue_size: int = RECORDING_QUEUE_SIZE):
+        self.dataset = dataset
+        self.task = task
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._stats = RecorderStats()
+        self._episode_dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = threading.Thread(target=self._run, name="dataset-writer", daemon=True)
+        self._thread.start()
+
+    def add_frame(self, observation: dict, action: dict) -> bool:
+        """Queues a frame without blocking. Returns False if it was dropped."""
+        frame = {**observation, **action, "task": self.task}
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            with self._lock:
+                self._stats.frames_dropped += 1
+                self._episode_dropped += 1
+            return False
+        with self._lock:
+            self._stats.frames_queued += 1
+            backlog = self._queue.qsize()
+            self._stats.max_backlog = max(self._stats.max_backlog, backlog)
+        return True
+
+    def end_episode(self, on_saved: Callable[[], None] | None = None) -> int:
+        """
+        Schedules the current episode to be saved in the background, `on_saved` is then called
+        from the writer thread. Returns the episode's dropped frame count: an episode with
+        dropped frames is discarded instead of saved (LeRobot derives timestamps from the frame
+        index, so it would be time-compressed and out of sync with its actions) and must be
+        recorded again.
+        """
+        with self._lock:
+            dropped, self._episode_dropped = self._episode_dropped, 0
+        if dropped:
+            logger.warning("%s frames were dropped during this episode (writer backlog), discarding it.", dropped)
+            self.discard_episode()
+            return dropped
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+        self._queue.put((_END_EPISODE, on_saved))
+        return dropped
+
+    def discard_episode(self):
+        """Drops the frames of the current episode (re-recording)."""
+        with self._lock:
+            self._episode_dropped = 0
+            self._pending += 1
+            self._idle.clear()
+        self._queue.put(_DISCARD_EPISODE)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks until every scheduled episode has been saved or discarded (the queue is then drained)."""
+        return self._idle.wait(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._stats.backlog = self._queue.qsize()
+            return asdict(self._stats)
+
+    def close(self):
+        """Flushes what is queued, stops the writer thread and the dataset image writer."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        if getattr(self.dataset, "image_writer", None) is not None:
+            self.dataset.stop_image_writer()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item == _STOP:
+                    return
+                if isinstance(item, tuple) and item[0] == _END_EPISODE:
+                    self._save_episode()
+                    if item[1] is not None:
+                        item[1]()
+                elif item == _DISCARD_EPISODE:
+                    self.dataset.clear_episode_buffer()
+                else:
+                    self.dataset.add_frame(item)
+                    with self._lock:
+                        self._stats.frames_written += 1
+            except Exception:
+                with self._lock:
+                    self._stats.errors += 1
+                logger.exception("Dataset writer failed.")
+            finally:
+                if item == _DISCARD_EPISODE or (isinstance(item, tuple) and item[0] == _END_EPISODE):
+                    with self._lock:
+                        self._pending -= 1
+                        if self._pending == 0:
+                            self._idle.set()
+
+    def _save_episode(self):
+        start = time.perf_counter()
+        self.dataset.save_episode()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats.episodes_saved += 1
+            self._stats.last_save_s = elapsed
+        logger.info("Episode saved in %.1fs (images and videos written in the background).", elapsed)
+
+
+class LoopTimer:
+    """Control loop period statistics, to check that recording does not slow the loop down."""
+
+    def __init__(self, fps: int):
+        self.period_s = 1 / fps
+        self._durations: list[float] = []
+
+    def add(self, duration_s: float):
+        self._durations.append(duration_s)
+
+    def summary(self) -> dict:
+        if not self._durations:
+            return {"frames": 0}
+        durations_ms = np.array(self._durations) * 1000
+        return {
+            "frames": len(durations_ms),
+            "mean_ms": float(durations_ms.mean()),
+            "p99_ms": float(np.percentile(durations_ms, 99)),
+            "max_ms": float(durations_ms.max()),
+            "overruns": int((durations_ms > self.period_s * 1000).sum()),
+        }
+
+    def reset(self):
+        self._durations.clear()
@@ -4,9 +4,10 @@ from fastapi import APIRouter, HTTPException, Body
 
 # Import schemas and services for this feature
 # Schema descriptions were already translated
-from .schema import AnimalListResponse, AskRequest, AskResponse, FilterRequest, FilterResponse, GenerateQuestionRequest, GenerateQuestionResponse, SelectAnimalResponse
+from .schema import AnimalListResponse, AskRequest, AskResponse, FilterRequest, FilterResponse, GenerateQuestionRequest, GenerateQuestionResponse, PolicyActivateRequest, PolicyStatusResponse, SelectAnimalResponse
 # Service function names remain the same
-from .services import ALL_CHARACTERS, filter_list, generate_ai_question, select_random_animal, answer_question #, filter_list (if added)
+from .services import ALL_CHARACTERS, activate_policies, filter_list, generate_ai_question, policy_status, select_random_animal, answer_question #, filter_list (if added)
+from src.features.tts.services import prefetch as prefetch_speech
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +54,7 @@ async def http_ask_question(
     Requires the question and the AI's current secret animal in the request body.
     """
     # Translated log message
-    logger.info(f"Received question for animal '{request_data.secret_animal}': '{request_data.question}'")
+    logger.info("Received question for animal '%s': '%s'", request_data.secret_animal, request_data.question)
     try:
         # Expecting "yes" or "no" from the translated service now
         ai_answer = await answer_question(
@@ -67,7 +68,7 @@ async def http_ask_question(
         raise e
     except Exception as e:
         # Translated log message
-        logger.exception(f"Unexpected error processing question for animal '{request_data.secret_animal}'.")
+        logger.exception("Unexpected error processing question for animal '%s'.", request_data.secret_animal)
         # Return a structured error using the schema
         # Translated error message
         return AskResponse(
@@ -111,7 +112,7 @@ async def http_get_all_animals():
 )
 async def http_filter_list(request_data: FilterRequest = Body(...)):
     # Translated log message
-    logger.info(f"Filtering list based on Q:'{request_data.question}', A:'{request_data.answer}'")
+    logger.info("Filtering list based on Q:'%s', A:'%s'", request_data.question, request_data.answer)
     try:
         kept_animals, reasoning = await filter_list(
             question=request_data.question,
@@ -143,9 +144,11 @@ async def http_generate_question(request_data: GenerateQuestionRequest = Body(..
     Endpoint for the AI to generate its next question.
     Requires the AI's current list of possible user animals.
     """
-    logger.info(f"Request received to generate AI question from list: {request_data.current_list}")
+    logger.info("Request received to generate AI question from list: %s", request_data.current_list)
     try:
         question = await generate_ai_question(current_list=request_data.current_list,  previous_questions=request_data.previous_questions)
+        # The front speaks the question next: render it while the response travels
+        prefetch_speech(question)
         return GenerateQuestionResponse(question=question)
 
     except HTTPException as e:
@@ -157,4 +160,28 @@ async def http_generate_question(request_data: GenerateQuestionRequest = Body(..
         return GenerateQuestionResponse(
             question="",
             error=f"An unexpected server error occurred during question generation: {type(e).__name__}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get(
+    "/policies",
+    response_model=PolicyStatusResponse,
+    summary="Robot policy checkpoints",
+    description="Checkpoints in use, loaded in memory and being loaded by the robot worker.",
+)
+async def http_policy_status():
+    return PolicyStatusResponse(**await policy_status())
+
+
+@router.post(
+    "/policies/activate",
+    response_model=PolicyStatusResponse,
+    summary="Switch the robot policy",
+    description=(
+        "Loads the checkpoints in the background and switches to them between two flips, without "
+        "restarting. With several checkpoints, flips rotate through them (A/B comparison, see the flip log)."
+    ),
+)
+async def http_activate_policies(request_data: PolicyActivateRequest = Body(...)):
+    logger.info("Request to switch the robot policy to %s", request_data.checkpoints)
+    return PolicyStatusResponse(**await activate_policies(request_data.checkpoints))
@@ -44,4 +44,18 @@ class GenerateQuestionRequest(BaseModel):
 class GenerateQuestionResponse(BaseModel):
     """Response model for the AI's generated question."""
     question: str = Field(..., description="The question generated by the AI.")
-    error: str | None = Field(None, description="Optional error message.")
\ No newline at end of file
+    error: str | None = Field(None, description="Optional error message.")
+class ResidentPolicy(BaseModel):
+    path: str
+    load_time_s: float | None = None
+
+class PolicyStatusResponse(BaseModel):
+    """Policy checkpoints of the robot worker."""
+    active: List[str] = Field(..., description="Checkpoints in use, rotated per flip if several.")
+    pending: List[str] = Field(default_factory=list, description="Checkpoints to switch to once loaded.")
+    resident: dict[str, ResidentPolicy] = Field(default_factory=dict, description="Checkpoints loaded in memory.")
+    loading: List[str] = Field(default_factory=list, description="Checkpoints being loaded in the background.")
+
+class PolicyActivateRequest(BaseModel):
+    """Checkpoints to switch to between two flips."""
+    checkpoints: List[str] = Field(..., description="pretrained_model directories; several for an A/B rotation per flip.")
@@ -3,55 +3,140 @@ import asyncio
 import random
 import os
 import logging
+import time
 import ast
 from typing import List, Tuple
 import json
 from fastapi import HTTPException
 import random
 
-# --- Mistral Client Setup ---
-# Make sure to install the library: pip install mistralai
-from .control_atomic import robot_move_grid
-from mistralai import Mistral
-
 from pydantic import BaseModel
 
+from src.core.admission import admission_controller
+from src.core.executors import LLM_MAX_WORKERS, llm_executor, robot_executor
+from src.core.logging_queue import Truncated
+from src.core.metrics import counter, histogram
+from src.core.registry import model_registry
+from src.core.tracing import run_in_executor, span
+from .playback import PlaybackStats, flip_record, log_flips
+from .vision import BoardReading, get_classifier, read_board
+
 class Response(BaseModel):
     resonning: str
     question: str
 
 logger = logging.getLogger(__name__)
 
+# --- Metrics ---
+LLM_LATENCY = histogram("llm_request_duration_seconds", "Mistral API call latency.", ["call_site"])
+LLM_ERRORS = counter("llm_errors", "Failed Mistral API calls.", ["call_site", "error"])
+ROBOT_FLIP_LATENCY = histogram(
+    "robot_flip_duration_seconds", "Duration of one card flip by the arm.", ["row", "col"],
+    buckets=(1.0, 2.5, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 120.0),
+)
+ROBOT_FLIPS = counter("robot_flips", "Card flips by outcome (skipped: already down, retried, failed).", ["outcome"])
+VISION_CHECK_LATENCY = histogram("vision_check_duration_seconds", "Board state check (camera capture and classification).")
+
+# --- Robot ---
+# The robot stack (torch, rerun, lerobot) is only imported by workers that drive the arm, in the
+# background at startup like the models (see src/core/registry.py). With GUESS_WHO_ROBOT=0, the
+# worker serves the LLM and STT routes only and card flips are skipped.
+ROBOT_ENABLED = os.getenv("GUESS_WHO_ROBOT", "1") == "1"
+ROBOT_REGISTRY_KEY = "robot"
+
+
+def load_robot_move_grid():
+    """Imports the robot control stack and loads the policy (blocking; run by the model registry in a thread)."""
+    from .control_atomic import policy_registry, robot_move_grid
+    policy_registry.load_default()
+    return robot_move_grid
+
+
+async def _get_policy_registry():
+    await model_registry.get(ROBOT_REGISTRY_KEY)
+    from .control_atomic import policy_registry # Already imported by the robot loader
+    return policy_registry
+
+
+async def policy_status() -> dict:
+    if not ROBOT_ENABLED:
+        raise HTTPException(status_code=404, detail="Robot disabled (GUESS_WHO_ROBOT=0).")
+    return (await _get_policy_registry()).status()
+
+
+async def activate_policies(checkpoints: List[str]) -> dict:
+    """
+    Loads `checkpoints` in the background and switches to them between two flips (rotating through
+    them per flip if several, for A/B comparisons). Returns at once with the registry status.
+    """
+    if not ROBOT_ENABLED:
+        raise HTTPException(status_code=404, detail="Robot disabled (GUESS_WHO_ROBOT=0).")
+    policy_registry = await _get_policy_registry()
+    try:
+        policy_registry.activate(checkpoints)
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return policy_registry.status()
+
+
+if ROBOT_ENABLED:
+    model_registry.register(ROBOT_REGISTRY_KEY, load_robot_move_grid)
+
+# Extra attempts for a card still up after its flip (only with a card state calibration, see vision.py)
+FLIP_MAX_RETRIES = int(os.getenv("FLIP_MAX_RETRIES", "2"))
+
+# --- Admission control (see src/core/admission.py) ---
+# One flip sequence drives the arm at a time; a couple more may wait for it (a sequence takes ~10-60s)
+ROBOT_MAX_QUEUE = int(os.getenv("ROBOT_MAX_QUEUE", "2"))
+ROBOT_MAX_WAIT_S = float(os.getenv("ROBOT_MAX_WAIT_S", "90"))
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", str(LLM_MAX_WORKERS)))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_MAX_WAIT_S = float(os.getenv("LLM_MAX_WAIT_S", "10"))
+
+robot_admission = admission_controller("robot", 1, ROBOT_MAX_QUEUE, ROBOT_MAX_WAIT_S)
+llm_admission = admission_controller("llm", LLM_MAX_CONCURRENT, LLM_MAX_QUEUE, LLM_MAX_WAIT_S)
+
 # Load API key from environment variable - REVERTED HARDCODED KEY
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY") # <-- Use environment variable
 MODEL_NAME = os.getenv("MISTRAL_MODEL", "mistral-small-latest") # Or choose another model
 
+MISTRAL_REGISTRY_KEY = "mistral"
+
+
+def load_mistral_client():
+    """Creates the Mistral client (blocking; run by the model registry in a thread)."""
+    # Make sure to install the library: pip install mistralai
+    # Imported here: the SDK alone takes most of the app's import time
+    from mistralai import Mistral
+
+    client = Mistral(api_key=MISTRAL_API_KEY)
+    # Translated log message
+    logger.info("Mistral client initialized successfully for model '%s'.", MODEL_NAME)
+    return client
+
+
 if not MISTRAL_API_KEY:
     # Translated log message
     logger.error("CRITICAL: MISTRAL_API_KEY environment variable not set.")
     # Or raise an exception during startup if preferred
-    mistral_client = None
 else:
-    try:
-        mistral_client = Mistral(api_key=MISTRAL_API_KEY)
-        # Translated log message
-        logger.info(f"Mistral client initialized successfully for model '{MODEL_NAME}'.")
-    except Exception as e:
+    model_registry.register(MISTRAL_REGISTRY_KEY, load_mistral_client)
+
+
+async def _get_mistral_client():
+    if not MISTRAL_API_KEY:
         # Translated log message
-        logger.exception(f"Failed to initialize Mistral client: {e}")
-        mistral_client = None
-
-# --- Animal Data (Consider moving to core/constants.py if used elsewhere) ---
-# Animal names remain in French as they are identifiers from the original game setup
-ANIMAL_COORDS = {
-    "Grenouille": [0, 0], "Chien": [0, 1], "Chat": [0, 2], "Vache": [0, 3],
-    "Lion": [0, 4], "Girafe": [0, 5], "Singe": [0, 6], "Pieuvre": [0, 7],
-    "Poisson": [1, 0], "Pingouin": [1, 1], "Rouge-Gorge": [1, 2], "Elephant": [1, 3],
-    "Chenille": [1, 4], "Requin-Tigre": [1, 5], "Corbeau": [1, 6], "Ours Polaire": [1, 7],
-    "Araignée": [2, 0], "Mouche": [2, 1], "Chouette": [2, 2], "Escargot": [2, 3],
-    "Serpent": [2, 4], "Rat": [2, 5], "Mouton": [2, 6], "Crocodile": [2, 7]
-}
-ALL_CHARACTERS = list(ANIMAL_COORDS.keys())
+        logger.error("Mistral client is not available.")
+        # Translated detail message
+        raise HTTPException(status_code=503, detail="LLM service is unavailable.")
+    return await model_registry.get(MISTRAL_REGISTRY_KEY)
+
+
+def llm_client_available() -> bool:
+    return model_registry.peek(MISTRAL_REGISTRY_KEY) is not None
+
+# --- Animal Data (see constants.py) ---
+from .constants import ALL_CHARACTERS, ANIMAL_COORDS
 
 # --- Helper Functions (Adapted from your script) ---
 
@@ -66,61 +151,73 @@ def _extract_list(text: str) -> list[str]:
             return [str(item) for item in evaluated] # Ensure items are strings
         else:
             # Translated log message
-            logger.warning(f"Extracted literal is not a list: {evaluated}")
+            logger.warning("Extracted literal is not a list: %s", evaluated)
             return []
     except StopIteration:
         # Translated log message
-        logger.warning(f"Could not find line starting with '[' in text: {text}")
+        logger.warning("Could not find line starting with '[' in text: %s", text)
         return []
     except (SyntaxError, ValueError, TypeError) as e:
         # Translated log message
-        logger.error(f"Error extracting list using ast.literal_eval: {e} from text: {text}")
+        logger.error("Error extracting list using ast.literal_eval: %s from text: %s", e, text)
         return []
     except Exception as e:
         # Translated log message
-        logger.error(f"Unexpected error extracting list: {e} from text: {text}")
+        logger.error("Unexpected error extracting list: %s from text: %s", e, text)
         return []
 
-async def _llm_queryV2(prompt: str) -> str:
+async def _timed_llm_call(call_site: str, call):
+    """Awaits a Mistral API call, recording its latency and errors for `call_site`."""
+    start = time.perf_counter()
+    try:
+        with span(f"llm.{call_site}"):
+            return await call
+    except Exception as e:
+        LLM_ERRORS.labels(call_site, type(e).__name__).inc()
+        raise
+    finally:
+        LLM_LATENCY.labels(call_site).observe(time.perf_counter() - start)
+
+
+async def _llm_queryV2(prompt: str, call_site: str = "generate_ai_question") -> str:
     """Sends a prompt to the Mistral API using the client."""
-    if not mistral_client:
-        # Translated log message
-        logger.error("Mistral client is not available.")
-        # Translated detail message
-        raise HTTPException(status_code=503, detail="LLM service is unavailable.")
+    mistral_client = await _get_mistral_client()
 
     try:
         # Mistral client's chat method might be synchronous.
         # Run it in a thread pool executor to avoid blocking the async event loop.
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,  # Use default executor
-            lambda: mistral_client.chat.parse(
-                model=MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=1.0,
-                random_seed=random.randint(0, 2**32-1),  # Random seed for reproducibility
-                response_format= Response,
-                top_p=0.9,
-            )
-        )
-        print("couuuuuuuuccccooouuuuuuuuuu")
-        logger.info(f"##########{response}######")  # Debugging line to see the raw response
+        async with llm_admission.slot():
+            response = await _timed_llm_call(call_site, run_in_executor(
+                llm_executor,
+                lambda: mistral_client.chat.parse(
+                    model=MODEL_NAME,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=1.0,
+                    random_seed=random.randint(0, 2**32-1),  # Random seed for reproducibility
+                    response_format= Response,
+                    top_p=0.9,
+                ),
+                span_name="mistral.chat.parse",
+            ))
+        logger.debug("[%s] Raw LLM response: %s", call_site, Truncated(response))
         # Check if response is valid and has choices
         if response and response.choices:
             content = response.choices[0].message.parsed.question.strip()
             # Translated log message
-            logger.debug(f"LLM Query successful. Prompt: '{prompt[:50]}...', Response: '{content[:50]}...'")
+            logger.debug("LLM Query successful. Prompt: '%s', Response: '%s'", Truncated(prompt, 50), Truncated(content, 50))
             return content
         else:
             # Translated log message
-            logger.error(f"Invalid response received from Mistral API: {response}")
+            LLM_ERRORS.labels(call_site, "invalid_response").inc()
+            logger.error("Invalid response received from Mistral API: %s", Truncated(response))
             # Translated detail message
             raise HTTPException(status_code=502, detail="Invalid response from LLM service.")
 
+    except HTTPException:
+        raise
     except Exception as e:
         # Translated log message
-        logger.exception(f"Error querying Mistral API: {e}")
+        logger.exception("Error querying Mistral API: %s", e)
         # Re-raise HTTPException if it came from the client, otherwise wrap
         if isinstance(e, HTTPException):
             raise e
@@ -129,44 +226,43 @@ async def _llm_queryV2(prompt: str) -> str:
             raise HTTPException(status_code=500, detail=f"Error communicating with LLM: {type(e).__name__}")
 
 
-async def _llm_query(prompt: str) -> str:
+async def _llm_query(prompt: str, call_site: str) -> str:
     """Sends a prompt to the Mistral API using the client."""
-    if not mistral_client:
-        # Translated log message
-        logger.error("Mistral client is not available.")
-        # Translated detail message
-        raise HTTPException(status_code=503, detail="LLM service is unavailable.")
+    mistral_client = await _get_mistral_client()
 
     try:
         # Mistral client's chat method might be synchronous.
         # Run it in a thread pool executor to avoid blocking the async event loop.
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,  # Use default executor
-            lambda: mistral_client.chat.complete(
-                model=MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=1.0,
-                random_seed=random.randint(0, 2**32-1),  # Random seed for reproducibility
-            )
-        )
-        print("couuuuuuuuccccooouuuuuuuuuu")
-        logger.info(f"##########{response}######")  # Debugging line to see the raw response
+        async with llm_admission.slot():
+            response = await _timed_llm_call(call_site, run_in_executor(
+                llm_executor,
+                lambda: mistral_client.chat.complete(
+                    model=MODEL_NAME,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=1.0,
+                    random_seed=random.randint(0, 2**32-1),  # Random seed for reproducibility
+                ),
+                span_name="mistral.chat.complete",
+            ))
+        logger.debug("[%s] Raw LLM response: %s", call_site, Truncated(response))
         # Check if response is valid and has choices
         if response and response.choices:
             content = response.choices[0].message.content.strip()
             # Translated log message
-            logger.debug(f"LLM Query successful. Prompt: '{prompt[:50]}...', Response: '{content[:50]}...'")
+            logger.debug("LLM Query successful. Prompt: '%s', Response: '%s'", Truncated(prompt, 50), Truncated(content, 50))
             return content
         else:
             # Translated log message
-            logger.error(f"Invalid response received from Mistral API: {response}")
+            LLM_ERRORS.labels(call_site, "invalid_response").inc()
+            logger.error("Invalid response received from Mistral API: %s", Truncated(response))
             # Translated detail message
             raise HTTPException(status_code=502, detail="Invalid response from LLM service.")
 
+    except HTTPException:
+        raise
     except Exception as e:
         # Translated log message
-        logger.exception(f"Error querying Mistral API: {e}")
+        logger.exception("Error querying Mistral API: %s", e)
         # Re-raise HTTPException if it came from the client, otherwise wrap
         if isinstance(e, HTTPException):
             raise e
@@ -175,6 +271,98 @@ async def _llm_query(prompt: str) -> str:
             raise HTTPException(status_code=500, detail=f"Error communicating with LLM: {type(e).__name__}")
 
 
+def _timed_robot_move(robot_move_grid, row: int, col: int) -> PlaybackStats:
+    start = time.perf_counter()
+    try:
+        return robot_move_grid(row, col)
+    finally:
+        ROBOT_FLIP_LATENCY.labels(row, col).observe(time.perf_counter() - start)
+
+
+async def flip_card(row: int, col: int) -> PlaybackStats | None:
+    """Flips the card at (row, col) on the robot worker thread, without blocking the event loop."""
+    if not ROBOT_ENABLED:
+        logger.info("Robot disabled (GUESS_WHO_ROBOT=0), not flipping the card at (%s, %s)", row, col)
+        return None
+    robot_move_grid = await model_registry.get(ROBOT_REGISTRY_KEY)
+    with span("robot.flip_card", row=row, col=col):
+        return await run_in_executor(
+            robot_executor, _timed_robot_move, robot_move_grid, row, col, span_name="robot.move_grid", row=row, col=col
+        )
+
+
+def _timed_read_board() -> BoardReading:
+    start = time.perf_counter()
+    try:
+        return read_board()
+    finally:
+        VISION_CHECK_LATENCY.observe(time.perf_counter() - start)
+
+
+async def _cards_still_up(cells: List[Tuple[int, int]]) -> List[Tuple[int, int]] | None:
+    """The cells among `cells` whose card is up, or None if the board cannot be read (no calibration or camera error)."""
+    if not ROBOT_ENABLED or get_classifier() is None:
+        return None
+    try:
+        # On the robot worker: the camera is shared with the arm's control loop
+        reading = await run_in_executor(robot_executor, _timed_read_board, span_name="vision.read_board")
+    except Exception as e:
+        logger.warning("Board state check failed, flipping without it: %s", e)
+        return None
+    return [(row, col) for row, col in cells if reading.is_up(row, col)]
+
+
+async def flip_cards(cells: List[Tuple[int, int]]):
+    """
+    Flips the cards at `cells` down. With a card state calibration, cards already down are
+    skipped and each flip is checked on camera, retrying those still up (FLIP_MAX_RETRIES).
+    The whole sequence holds the arm, so that concurrent calls never interleave their flips.
+    """
+    if not ROBOT_ENABLED:
+        logger.info("Robot disabled (GUESS_WHO_ROBOT=0), not flipping the cards at %s", cells)
+        return
+    async with robot_admission.slot():
+        await _flip_cards(cells)
+
+
+async def _flip_cards(cells: List[Tuple[int, int]]):
+    pending = await _cards_still_up(cells)
+    if pending is None:
+        records = [flip_record(row, col, 0, await flip_card(row, col), None) for row, col in cells]
+        await _log_flips(records)
+        return
+    skipped = len(cells) - len(pending)
+    if skipped:
+        ROBOT_FLIPS.labels("skipped").inc(skipped)
+        logger.info("Skipping %s card(s) already down", skipped)
+
+    for attempt in range(FLIP_MAX_RETRIES + 1):
+        if not pending:
+            return
+        if attempt:
+            ROBOT_FLIPS.labels("retried").inc(len(pending))
+            logger.warning("Card(s) still up after flip, retrying (attempt %s): %s", attempt + 1, pending)
+        flip_stats = {(row, col): await flip_card(row, col) for row, col in pending}
+        still_up = await _cards_still_up(pending)
+        await _log_flips([
+            flip_record(row, col, attempt, stats, None if still_up is None else (row, col) not in still_up)
+            for (row, col), stats in flip_stats.items()
+        ])
+        if still_up is None:
+            return
+        ROBOT_FLIPS.labels("flipped").inc(len(pending) - len(still_up))
+        pending = still_up
+    if pending:
+        ROBOT_FLIPS.labels("failed").inc(len(pending))
+        logger.error("Card(s) still up after %s attempts: %s", FLIP_MAX_RETRIES + 1, pending)
+
+
+async def _log_flips(records: list[dict]):
+    """Per-cell timing and success of the flips, to tune the playback speed (see playback.py)."""
+    if ROBOT_ENABLED and records:
+        await asyncio.to_thread(log_flips, records)
+
+
 # --- Service Functions ---
 
 async def select_random_animal() -> str:
@@ -186,7 +374,7 @@ async def select_random_animal() -> str:
          raise HTTPException(status_code=500, detail="Animal list is not configured.")
     selected = random.choice(ALL_CHARACTERS)
     # Translated log message
-    logger.info(f"Randomly selected animal: {selected}")
+    logger.info("Randomly selected animal: %s", selected)
     return selected
 
 async def answer_question(question: str, secret_animal: str) -> str:
@@ -195,7 +383,7 @@ async def answer_question(question: str, secret_animal: str) -> str:
     """
     if secret_animal not in ANIMAL_COORDS:
         # Translated log message
-        logger.error(f"Invalid secret animal provided: {secret_animal}")
+        logger.error("Invalid secret animal provided: %s", secret_animal)
         # Translated detail message
         raise HTTPException(status_code=400, detail=f"Invalid secret animal: {secret_animal}")
 
@@ -206,7 +394,7 @@ A player asks you the following question: "{question}"
 Answer only and literally with "yes" or "no", without any other punctuation or sentences.
 """
     try:
-        raw_response = await _llm_query(prompt)
+        raw_response = await _llm_query(prompt, call_site="answer_question")
         # Clean the response to be strictly "yes" or "no"
         # Keep logic targeting French oui/non unless LLM response guarantees English
         cleaned_response = raw_response.lower().strip().rstrip('.?!')
@@ -217,11 +405,11 @@ Answer only and literally with "yes" or "no", without any other punctuation or s
              answer = "no"
         else:
              # Translated log message - adapted for yes/no
-            logger.warning(f"LLM response was not clearly 'yes' or 'no': '{raw_response}'. Defaulting based on presence of 'yes'.")
+            logger.warning("LLM response was not clearly 'yes' or 'no': '%s'. Defaulting based on presence of 'yes'.", Truncated(raw_response))
             answer = "yes" if "yes" in cleaned_response else "no" # Simple fallback
 
         # Translated log message - adapted for yes/no
-        logger.info(f"Question: '{question}' for animal '{secret_animal}'. Answer: '{answer}' (Raw: '{raw_response}')")
+        logger.info("Question: '%s' for animal '%s'. Answer: '%s' (Raw: '%s')", Truncated(question), secret_animal, answer, Truncated(raw_response))
         return answer
 
     except HTTPException as e:
@@ -229,7 +417,7 @@ Answer only and literally with "yes" or "no", without any other punctuation or s
         raise e
     except Exception as e:
         # Translated log message
-        logger.exception(f"Unexpected error in answer_question for animal '{secret_animal}': {e}")
+        logger.exception("Unexpected error in answer_question for animal '%s': %s", secret_animal, e)
         # Translated detail message
         raise HTTPException(status_code=500, detail="Failed to get answer from LLM.")
 
@@ -239,6 +427,9 @@ async def filter_list(question: str, answer: str, current_list: List[str]) -> Tu
     Uses the LLM to filter the list based on the question and answer,
     expecting a JSON response.
     """
+    if ROBOT_ENABLED:
+        # Refuse before spending an LLM call if the arm's queue is already full
+        robot_admission.check()
     # Updated filter_prompt asking for JSON
     filter_prompt = f"""
 You are playing the game "Guess Who?". Your opponent asked: "{question}"
@@ -262,8 +453,7 @@ Example JSON Response:
 ```
     """
     try:
-        raw_response = await _llm_query(filter_prompt)
-        print(f"##########{raw_response}######")  # Debugging line to see the raw response
+        raw_response = await _llm_query(filter_prompt, call_site="filter_list")
         # Attempt to parse the JSON response
         try:
             # Find the JSON part in case the LLM still adds extra text (optional robustness)
@@ -290,15 +480,15 @@ Example JSON Response:
                 raise ValueError("'reasoning' should be a string.")
 
         except json.JSONDecodeError:
-            logger.error(f"Failed to parse LLM response as JSON. Raw: '{raw_response}'")
+            logger.error("Failed to parse LLM response as JSON. Raw: '%s'", Truncated(raw_response))
             # Translated detail message
             raise HTTPException(status_code=500, detail="LLM response was not valid JSON.")
         except ValueError as ve: # Catch type validation errors
-            logger.error(f"Invalid JSON structure or types from LLM: {ve}. Raw: '{raw_response}'")
+            logger.error("Invalid JSON structure or types from LLM: %s. Raw: '%s'", ve, Truncated(raw_response))
             # Translated detail message
             raise HTTPException(status_code=500, detail=f"LLM response JSON structure/type error: {ve}")
         except Exception as e: # Catch unexpected parsing issues
-            logger.exception(f"Error processing LLM JSON response: {e}. Raw: '{raw_response}'")
+            logger.exception("Error processing LLM JSON response: %s. Raw: '%s'", e, Truncated(raw_response))
             # Translated detail message
             raise HTTPException(status_code=500, detail="Failed to process LLM JSON response.")
 
@@ -309,19 +499,15 @@ Example JSON Response:
         if len(valid_kept_animals) != len(kept_animals):
             invalid_suggestions = [animal for animal in kept_animals if animal not in current_list]
             # Translated log message
-            logger.warning(f"LLM filter suggested animals not in the original list ({invalid_suggestions}). Raw JSON: '{json_str}', Original: {current_list}, Kept valid: {valid_kept_animals}")
+            logger.warning("LLM filter suggested animals not in the original list (%s). Raw JSON: '%s', Original: %s, Kept valid: %s", invalid_suggestions, Truncated(json_str), current_list, valid_kept_animals)
             # Note: We only keep the valid ones, correcting the LLM's mistake silently for the user.
 
         removed_animals = [animal for animal in current_list if animal not in valid_kept_animals]
-        for animal in removed_animals:
-            print(f"Kept animal: {animal}")  # Debugging line to see kept animals
-            if animal in ANIMAL_COORDS.keys():
-                print(f"Animal {animal} found in ANIMAL_COORDS.")
-                coord = ANIMAL_COORDS[animal]
-                print(f"Coordinates for {animal}: {coord}")
-                robot_move_grid(coord[0], coord[1])  # Assuming robot_move_grid is defined elsewhere
+        cells = [tuple(ANIMAL_COORDS[animal]) for animal in removed_animals if animal in ANIMAL_COORDS]
+        logger.debug("Flipping %s at %s", removed_animals, cells)
+        await flip_cards(cells)
         # Translated log message
-        logger.info(f"Filtered list based on Q:'{question}', A:'{answer}'. Kept: {valid_kept_animals}. Reasoning: '{reasoning}'")
+        logger.info("Filtered list based on Q:'%s', A:'%s'. Kept: %s. Reasoning: '%s'", Truncated(question), answer, valid_kept_animals, Truncated(reasoning))
 
         return valid_kept_animals, reasoning
 
@@ -330,7 +516,7 @@ Example JSON Response:
         raise e
     except Exception as e:
         # Translated log message
-        logger.exception(f"Unexpected error in filter_list during LLM call or processing: {e}")
+        logger.exception("Unexpected error in filter_list during LLM call or processing: %s", e)
         # Translated detail message
         raise HTTPException(status_code=500, detail="Failed to filter list using LLM.")
         
@@ -350,7 +536,7 @@ async def generate_ai_question(current_list: List[str], previous_questions: List
          # This logic might be better handled in the frontend, but we can prevent unnecessary LLM calls.
          # Or return a specific message indicating a guess is needed.
          # For now, let's still generate a question, though it might be trivial.
-         logger.info(f"Generating question for single remaining animal: {current_list[0]}")
+         logger.info("Generating question for single remaining animal: %s", current_list[0])
 
 
     previous_block = (
@@ -383,17 +569,17 @@ async def generate_ai_question(current_list: List[str], previous_questions: List
     """
     try:
         # Use the existing LLM query helper
-        generated_question = await _llm_queryV2(prompt)
+        generated_question = await _llm_queryV2(prompt, call_site="generate_ai_question")
 
         # Basic cleaning (remove potential quotes or extra phrases if LLM doesn't follow instructions perfectly)
         cleaned_question = generated_question.strip().strip('"')
-        logger.info(f"\n\n\n{prompt}\n\n\n")
+        logger.debug("Question generation prompt: %s", Truncated(prompt))
 
-        logger.info(f"Generated AI question for list {current_list}: '{cleaned_question}' (Raw: '{generated_question}')")
+        logger.info("Generated AI question for list %s: '%s'", current_list, Truncated(cleaned_question))
         return cleaned_question
     except HTTPException as e:
         # Propagate HTTP exceptions from _llm_query
         raise e
     except Exception as e:
-        logger.exception(f"Unexpected error generating AI question for list {current_list}: {e}")
+        logger.exception("Unexpected error generating AI question for list %s: %s", current_list, e)
         raise HTTPException(status_code=500, detail="Failed to generate question via LLM.")
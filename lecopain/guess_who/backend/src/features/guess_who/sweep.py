@@ -0,0 +1,163 @@
+"""
+Records a sweep of the grid into a single dataset, in one robot session.
+
+Instead of one dataset per cell (`<repo_id>_0` ... `<repo_id>_23`, see record()), every selected
+cell gets `--episodes-per-cell` episodes in the same dataset, with a reset phase between episodes.
+The robot is connected, the policy loaded and the warm-up done once.
+
+Each saved episode is appended to `meta/sweep_progress.json` in the dataset, so an interrupted
+sweep continues where it stopped with `--resume`. Existing per-cell datasets can be merged into
+one with lecopain/guess_who/merge_datasets.py.
+
+Run from lecopain/guess_who/backend:
+    python -m src.features.guess_who.sweep --repo-id <user-id>/guess_who_sweep --episodes-per-cell 4 --teleop
+    python -m src.features.guess_who.sweep --repo-id <user-id>/guess_who_sweep --cells 0 1 2 --resume
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from lerobot.common.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.common.robot_devices.control_configs import RecordControlConfig
+from lerobot.common.robot_devices.control_utils import init_keyboard_listener, warmup_record
+from lerobot.common.robot_devices.robots.utils import Robot, make_robot_from_config
+from lerobot.common.robot_devices.utils import safe_disconnect
+
+from .constants import NUM_COLS, NUM_ROWS
+from .control_atomic import collect_episodes, make_config, policy_registry
+
+logger = logging.getLogger(__name__)
+
+SWEEP_PROGRESS_FILE = "meta/sweep_progress.json"
+
+
+class SweepProgress:
+    """Episodes saved so far, as {"episode_index", "row", "col"} records, persisted after each episode."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.episodes: list[dict] = []
+        if path.exists():
+            self.episodes = json.loads(path.read_text())["episodes"]
+
+    def count(self, row: int, col: int) -> int:
+        return sum(1 for e in self.episodes if e["row"] == row and e["col"] == col)
+
+    def add(self, episode_index: int, row: int, col: int):
+        with self._lock:
+            self.episodes.append({"episode_index": episode_index, "row": row, "col": col})
+            # Atomic replace: an interruption never leaves a truncated file
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"episodes": self.episodes}, indent=2))
+            os.replace(tmp_path, self.path)
+
+
+def open_dataset(robot: Robot, cfg: RecordControlConfig, resume: bool) -> LeRobotDataset:
+    image_writer_threads = cfg.num_image_writer_threads_per_camera * len(robot.cameras)
+    if resume:
+        dataset = LeRobotDataset(cfg.repo_id, root=cfg.root)
+        if len(robot.cameras) > 0:
+            dataset.start_image_writer(
+                num_processes=cfg.num_image_writer_processes,
+                num_threads=image_writer_threads,
+            )
+        return dataset
+    return LeRobotDataset.create(
+        cfg.repo_id,
+        cfg.fps,
+        root=cfg.root,
+        robot=robot,
+        use_videos=cfg.video,
+        image_writer_processes=cfg.num_image_writer_processes,
+        image_writer_threads=image_writer_threads,
+    )
+
+
+@safe_disconnect
+def sweep(
+    robot: Robot,
+    cfg: RecordControlConfig,
+    cells: list[tuple[int, int]],
+    episodes_per_cell: int,
+    resume: bool = False,
+) -> LeRobotDataset:
+    """Records `episodes_per_cell` episodes on each of `cells` into the single dataset `cfg.repo_id`."""
+    dataset = open_dataset(robot, cfg, resume)
+    progress = SweepProgress(Path(dataset.root) / SWEEP_PROGRESS_FILE)
+    if len(progress.episodes) != dataset.meta.total_episodes:
+        logger.warning(
+            "Sweep progress lists %s episodes but the dataset has %s: the last run was interrupted while saving.",
+            len(progress.episodes), dataset.meta.total_episodes,
+        )
+
+    def on_saved(row: int, col: int):
+        return lambda: progress.add(dataset.meta.total_episodes - 1, row, col)
+
+    plan = [
+        ((row, col), on_saved(row, col))
+        for row, col in cells
+        for _ in range(max(0, episodes_per_cell - progress.count(row, col)))
+    ]
+    logger.info(
+        "Sweep: %s episodes to record on %s cells (%s already done).", len(plan), len(cells), len(progress.episodes)
+    )
+    if not plan:
+        return dataset
+
+    # The checkpoint loaded by the registry, as in record() (make_config() leaves pretrained_path unset)
+    policy = None
+    if cfg.policy is not None:
+        checkpoint, policy = policy_registry.policy_for_episode()
+        logger.info("Sweep recorded with policy '%s'.", checkpoint)
+    if not robot.is_connected:
+        robot.connect()
+    listener, events = init_keyboard_listener()
+    try:
+        warmup_record(robot, events, policy is None, cfg.warmup_time_s, cfg.display_data, cfg.fps)
+        collect_episodes(robot, policy, cfg, dataset, events, plan)
+    finally:
+        if listener is not None:
+            listener.stop()
+    return dataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Record the whole grid (or a subset) into one dataset")
+    parser.add_argument("--repo-id", required=True, help="Dataset repo id, e.g. <user-id>/guess_who_sweep")
+    parser.add_argument("--root", default=None, help="Local dataset root (defaults to the LeRobot cache)")
+    parser.add_argument("--cells", type=int, nargs="*", default=None,
+                        help="Cell indices (row * 8 + col) to record, all 24 by default")
+    parser.add_argument("--episodes-per-cell", type=int, default=4)
+    parser.add_argument("--episode-time-s", type=float, default=None)
+    parser.add_argument("--reset-time-s", type=float, default=None)
+    parser.add_argument("--task", default="Flip the card at the given grid position.")
+    parser.add_argument("--teleop", action="store_true", help="Record with the leader arm instead of the policy")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted sweep")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    cfg = make_config()
+    control = cfg.control
+    control.repo_id = args.repo_id
+    control.root = args.root
+    control.single_task = args.task
+    control.resume = args.resume
+    if args.episode_time_s is not None:
+        control.episode_time_s = args.episode_time_s
+    if args.reset_time_s is not None:
+        control.reset_time_s = args.reset_time_s
+    if args.teleop:
+        control.policy = None
+
+    cell_indices = args.cells if args.cells is not None else range(NUM_ROWS * NUM_COLS)
+    cells = [(index // NUM_COLS, index % NUM_COLS) for index in cell_indices]
+
+    robot = make_robot_from_config(cfg.robot)
+    sweep(robot, control, cells, args.episodes_per_cell, resume=args.resume)
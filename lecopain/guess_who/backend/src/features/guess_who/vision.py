@@ -0,0 +1,215 @@
+"""
+Card state check from the `mounted` camera: is each of the 24 cards face up or face down?
+
+Each cell of the grid is cropped from the frame and resampled to a small patch (one fancy
+indexing gather for all cells at once), then compared with two calibrated reference patches
+of the same cell, one with the card up and one with it down. A cell is up when it is closer
+to its "up" reference. Patches are mean-centered so that a global change of lighting does
+not flip the decision. Classifying the 24 cells takes well under a millisecond on the CPU.
+Right after a flip, the check reuses the last frame of the arm's control loop (the camera is
+already open); only a check with no recent flip opens the camera, which dominates its cost.
+
+The calibration (cell boxes and reference patches) is a .npz file written by:
+    python -m src.features.guess_who.vision calibrate --board X0 Y0 X1 Y1
+(run from lecopain/guess_who/backend, with every card put up, then down, when asked) and checked with:
+    python -m src.features.guess_who.vision check
+"""
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.features.camera.services import latest_frame
+from .constants import NUM_COLS, NUM_ROWS
+
+logger = logging.getLogger(__name__)
+
+VISION_CALIBRATION_PATH = Path(os.getenv(
+    "VISION_CALIBRATION_PATH", Path(__file__).parent / "calibration" / "card_states.npz"
+))
+# Side of the square patch each cell is resampled to
+PATCH_SIZE = 24
+# Fraction of each cell trimmed on every side, so that neighbouring cards and the grid lines are ignored
+CELL_MARGIN = 0.15
+# Frames read and discarded after opening the camera, while its auto exposure settles
+CAMERA_WARMUP_FRAMES = 5
+# A check right after a flip uses the control loop's last frame if it is at most this old,
+# instead of opening the camera again
+VISION_FRAME_MAX_AGE_S = float(os.getenv("VISION_FRAME_MAX_AGE_S", "2.0"))
+
+
+def grid_cell_boxes(board: tuple[int, int, int, int], margin: float = CELL_MARGIN) -> np.ndarray:
+    """(NUM_ROWS * NUM_COLS, 4) int boxes (x0, y0, x1, y1), row-major, splitting `board` (x0, y0, x1, y1) evenly."""
+    x0, y0, x1, y1 = board
+    cell_w = (x1 - x0) / NUM_COLS
+    cell_h = (y1 - y0) / NUM_ROWS
+    boxes = []
+    for row in range(NUM_ROWS):
+        for col in range(NUM_COLS):
+            left, top = x0 + col * cell_w, y0 + row * cell_h
+            boxes.append((
+                round(left + margin * cell_w), round(top + margin * cell_h),
+                round(left + (1 - margin) * cell_w), round(top + (1 - margin) * cell_h),
+            ))
+    return np.array(boxes, dtype=np.int32)
+
+
+def _sampling_grid(boxes: np.ndarray, patch_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pixel rows (cells, patch, 1) and columns (cells, 1, patch) of each cell's patch."""
+    steps = (np.arange(patch_size) + 0.5) / patch_size
+    xs = boxes[:, 0:1] + steps * (boxes[:, 2:3] - boxes[:, 0:1])
+    ys = boxes[:, 1:2] + steps * (boxes[:, 3:4] - boxes[:, 1:2])
+    return ys.astype(np.intp)[:, :, None], xs.astype(np.intp)[:, None, :]
+
+
+def _normalize(patches: np.ndarray) -> np.ndarray:
+    patches = patches.astype(np.float32)
+    return patches - patches.mean(axis=(1, 2, 3), keepdims=True)
+
+
+@dataclass
+class BoardReading:
+    up: np.ndarray  # (NUM_ROWS, NUM_COLS) bool
+    confidence: np.ndarray  # (NUM_ROWS, NUM_COLS) in [0, 1]: 0 when both references are as close
+    classify_s: float = 0.0
+
+    def is_up(self, row: int, col: int) -> bool:
+        return bool(self.up[row, col])
+
+    def __str__(self) -> str:
+        return "\n".join(" ".join("U" if up else "." for up in row) for row in self.up)
+
+
+class CardStateClassifier:
+    """Classifies every cell of a frame as card up or down against per-cell reference patches."""
+
+    def __init__(self, boxes: np.ndarray, up_reference: np.ndarray, down_reference: np.ndarray):
+        self.boxes = boxes
+        self.patch_size = up_reference.shape[1]
+        self._rows, self._cols = _sampling_grid(boxes, self.patch_size)
+        self._raw_references = (up_reference, down_reference)
+        self.up_reference = _normalize(up_reference)
+        self.down_reference = _normalize(down_reference)
+
+    def patches(self, frame: np.ndarray) -> np.ndarray:
+        """(cells, patch, patch, channels) crops of every cell, gathered in one indexing operation."""
+        return frame[self._rows, self._cols]
+
+    def classify(self, frame: np.ndarray) -> BoardReading:
+        start = time.perf_counter()
+        patches = _normalize(self.patches(frame))
+        up_distance = np.abs(patches - self.up_reference).mean(axis=(1, 2, 3))
+        down_distance = np.abs(patches - self.down_reference).mean(axis=(1, 2, 3))
+        up = up_distance < down_distance
+        confidence = np.abs(up_distance - down_distance) / np.maximum(up_distance + down_distance, 1e-6)
+        return BoardReading(
+            up=up.reshape(NUM_ROWS, NUM_COLS),
+            confidence=confidence.reshape(NUM_ROWS, NUM_COLS),
+            classify_s=time.perf_counter() - start,
+        )
+
+    @classmethod
+    def from_frames(cls, up_frame: np.ndarray, down_frame: np.ndarray, boxes: np.ndarray, patch_size: int = PATCH_SIZE):
+        """Calibration from one frame with every card up and one with every card down."""
+        rows, cols = _sampling_grid(boxes, patch_size)
+        return cls(boxes, up_frame[rows, cols], down_frame[rows, cols])
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        up, down = self._raw_references
+        np.savez_compressed(path, boxes=self.boxes, up=up, down=down)
+
+    @classmethod
+    def load(cls, path: Path) -> "CardStateClassifier":
+        data = np.load(path)
+        return cls(data["boxes"], data["up"], data["down"])
+
+
+def capture_frame() -> np.ndarray:
+    """One RGB frame from the `mounted` camera (opened and closed around the read: the robot uses it too)."""
+    # Lazy: the camera stack is only needed when a check actually runs
+    from lerobot.common.robot_devices.cameras.utils import make_cameras_from_configs
+    from .control_atomic import make_config
+
+    camera = make_cameras_from_configs({"mounted": make_config().robot.cameras["mounted"]})["mounted"]
+    camera.connect()
+    try:
+        for _ in range(CAMERA_WARMUP_FRAMES):
+            camera.read()
+        return camera.read()
+    finally:
+        camera.disconnect()
+
+
+_classifier: CardStateClassifier | None = None
+
+
+def get_classifier() -> CardStateClassifier | None:
+    """The calibrated classifier, or None if there is no calibration file (checks are then skipped)."""
+    global _classifier
+    if _classifier is None and VISION_CALIBRATION_PATH.exists():
+        _classifier = CardStateClassifier.load(VISION_CALIBRATION_PATH)
+        logger.info("Loaded card state calibration from '%s'", VISION_CALIBRATION_PATH)
+    return _classifier
+
+
+def board_frame(max_age_s: float = VISION_FRAME_MAX_AGE_S) -> np.ndarray:
+    """
+    The last frame of the arm's control loop (the end of the flip that just ran) if recent,
+    otherwise one captured now by opening the camera.
+    """
+    frame = latest_frame(max_age_s)
+    if frame is not None:
+        return frame
+    return capture_frame()
+
+
+def read_board() -> BoardReading:
+    """Classifies every card of a recent frame. Blocking: run it on the robot executor."""
+    classifier = get_classifier()
+    if classifier is None:
+        raise RuntimeError(f"No card state calibration at '{VISION_CALIBRATION_PATH}'")
+    reading = classifier.classify(board_frame())
+    logger.debug("Board reading (%.2f ms):\n%s", reading.classify_s * 1000, reading)
+    return reading
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Card state calibration and check")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    calibrate = subparsers.add_parser("calibrate", help="Capture the up and down references")
+    calibrate.add_argument("--board", type=int, nargs=4, required=True, metavar=("X0", "Y0", "X1", "Y1"),
+                           help="Pixel box of the whole grid in the camera frame")
+    calibrate.add_argument("--margin", type=float, default=CELL_MARGIN)
+    calibrate.add_argument("--patch-size", type=int, default=PATCH_SIZE)
+    check = subparsers.add_parser("check", help="Classify the current board")
+    check.add_argument("--repeat", type=int, default=100, help="Classifications timed on the captured frame")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    if args.command == "calibrate":
+        boxes = grid_cell_boxes(tuple(args.board), args.margin)
+        input("Put every card face UP, then press Enter...")
+        up_frame = capture_frame()
+        input("Put every card face DOWN, then press Enter...")
+        down_frame = capture_frame()
+        classifier = CardStateClassifier.from_frames(up_frame, down_frame, boxes, args.patch_size)
+        classifier.save(VISION_CALIBRATION_PATH)
+        print(f"Saved calibration to {VISION_CALIBRATION_PATH}")
+    else:
+        classifier = get_classifier()
+        if classifier is None:
+            raise SystemExit(f"No calibration at {VISION_CALIBRATION_PATH}, run the calibrate command first")
+        frame = capture_frame()
+        timings = [classifier.classify(frame).classify_s for _ in range(args.repeat)]
+        reading = classifier.classify(frame)
+        print(reading)
+        print(f"Lowest confidence: {reading.confidence.min():.2f}")
+        print(f"Classification of {NUM_ROWS * NUM_COLS} cells: median {np.median(timings) * 1000:.3f} ms, max {max(timings) * 1000:.3f} ms")
@@ -0,0 +1,43 @@
+# src/features/stt/audio.py
+import numpy as np
+
+# Whisper expects 16 kHz mono float32 samples in [-1, 1]
+SAMPLE_RATE = 16000
+
+# Raw PCM layouts accepted from clients, mapped to their NumPy dtype
+PCM_FORMATS = {
+    "pcm_s16le": np.dtype("<i2"),
+    "pcm_f32le": np.dtype("<f4"),
+}
+
+
+def pcm_to_float32(data: bytes, pcm_format: str) -> np.ndarray:
+    """
+    Converts raw little-endian PCM bytes to a float32 array in [-1, 1].
+    Trailing bytes that do not form a full sample are ignored.
+    """
+    dtype = PCM_FORMATS[pcm_format]
+    usable = len(data) - (len(data) % dtype.itemsize)
+    samples = np.frombuffer(data, dtype=dtype, count=usable // dtype.itemsize)
+    if dtype.kind == "i":
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Resamples a mono float32 signal with vectorized linear interpolation.
+    Good enough for speech going into Whisper, and much cheaper than a polyphase filter.
+    """
+    if orig_sr == target_sr or audio.size == 0:
+        return audio
+    if orig_sr % target_sr == 0:
+        # Integer ratio (48 kHz -> 16 kHz): average each group of samples,
+        # which also acts as a crude anti-aliasing filter
+        factor = orig_sr // target_sr
+        usable = audio.shape[0] - (audio.shape[0] % factor)
+        return audio[:usable].reshape(-1, factor).mean(axis=1, dtype=np.float32)
+    duration = audio.shape[0] / orig_sr
+    n_out = int(round(duration * target_sr))
+    positions = np.arange(n_out, dtype=np.float64) * (orig_sr / target_sr)
+    return np.interp(positions, np.arange(audio.shape[0]), audio).astype(np.float32)
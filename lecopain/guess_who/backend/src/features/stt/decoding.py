@@ -0,0 +1,235 @@
+# src/features/stt/decoding.py
+import asyncio
+import io
+import logging
+import os
+import subprocess
+from typing import AsyncIterator
+
+import numpy as np
+import soundfile as sf
+from fastapi import HTTPException
+
+from src.core.executors import stt_executor
+from src.core.tracing import run_in_executor
+from .audio import SAMPLE_RATE, resample
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+
+# --- Upload limits ---
+STT_MAX_UPLOAD_BYTES = int(os.getenv("STT_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+STT_MAX_AUDIO_S = float(os.getenv("STT_MAX_AUDIO_S", "60"))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+SNIFF_BYTES = 12
+
+# --- ffmpeg fallback output (same as before) ---
+OUTPUT_SAMPLE_RATE = SAMPLE_RATE
+OUTPUT_CHANNELS = 1
+OUTPUT_FORMAT = 'f32le' # PCM 32-bit float little-endian
+BYTES_PER_SAMPLE = np.dtype(np.float32).itemsize
+
+
+def sniff_format(audio_bytes: bytes) -> str | None:
+    """
+    Detects containers libsndfile can decode from their magic bytes.
+    Returns None for anything else (webm, mp4/m4a, ...), which goes through ffmpeg.
+    """
+    header = audio_bytes[:SNIFF_BYTES]
+    if header[:4] in (b"RIFF", b"RF64") and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if header[:3] == b"ID3" or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def decode_in_process(audio_bytes: bytes) -> np.ndarray:
+    """
+    Decodes a common audio container straight into a 16 kHz mono float32 array with libsndfile.
+    16 kHz mono float input comes back as-is; other layouts get one downmix and one resampling pass.
+
+    Raises:
+        sf.LibsndfileError (a RuntimeError) if libsndfile cannot handle the data.
+    """
+    audio, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype='float32', always_2d=False)
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    return resample(audio, sample_rate, SAMPLE_RATE)
+
+
+class PCMBuffer:
+    """
+    Preallocated float32 buffer filled incrementally from raw f32le bytes.
+    Its capacity is the maximum accepted duration, so decoding can never grow memory past it.
+    """
+
+    def __init__(self, max_samples: int):
+        self._array = np.empty(max_samples, dtype=np.float32)
+        self._bytes = self._array.view(np.uint8)
+        self._filled_bytes = 0
+
+    def write(self, data: bytes):
+        end = self._filled_bytes + len(data)
+        if end > self._bytes.shape[0]:
+            max_seconds = self._array.shape[0] / OUTPUT_SAMPLE_RATE
+            raise HTTPException(status_code=413, detail=f"Audio is longer than the {max_seconds:.0f}s limit.")
+        self._bytes[self._filled_bytes:end] = np.frombuffer(data, dtype=np.uint8)
+        self._filled_bytes = end
+
+    def samples(self) -> np.ndarray:
+        """The decoded samples so far (a view, no copy); a trailing partial sample is dropped."""
+        return self._array[: self._filled_bytes // BYTES_PER_SAMPLE]
+
+
+async def single_chunk(audio_bytes: bytes) -> AsyncIterator[bytes]:
+    yield audio_bytes
+
+
+async def _decode_stream_with_ffmpeg(chunks: AsyncIterator[bytes], max_bytes: int, max_samples: int) -> np.ndarray:
+    """
+    Pipes input chunks into ffmpeg's stdin as they arrive while decoded PCM is read from
+    its stdout into a preallocated buffer, so conversion overlaps with the upload.
+    """
+    ffmpeg_command = [
+        FFMPEG_PATH,
+        '-loglevel', 'error',
+        '-i', 'pipe:0',         # Read input from stdin
+        '-f', OUTPUT_FORMAT,    # Output format PCM float 32-bit little-endian
+        '-ar', str(OUTPUT_SAMPLE_RATE), # Sample rate
+        '-ac', str(OUTPUT_CHANNELS),    # Channel count (mono)
+        '-'                     # Write output to stdout
+    ]
+
+    logger.debug("Running ffmpeg command: %s", ' '.join(ffmpeg_command))
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *ffmpeg_command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        logger.error("CRITICAL ERROR: ffmpeg command '%s' not found.", FFMPEG_PATH)
+        raise HTTPException(status_code=500, detail="Server configuration error: ffmpeg not found.")
+
+    pcm = PCMBuffer(max_samples)
+
+    async def feed_stdin():
+        received = 0
+        try:
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Upload is larger than the {max_bytes} bytes limit.")
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass # ffmpeg exited early, its error is reported from stderr below
+        finally:
+            process.stdin.close()
+
+    async def drain_stdout():
+        while True:
+            data = await process.stdout.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            pcm.write(data)
+
+    stderr_task = asyncio.create_task(process.stderr.read())
+    tasks = [asyncio.create_task(feed_stdin()), asyncio.create_task(drain_stdout())]
+    try:
+        await asyncio.gather(*tasks)
+        stderr_data = await stderr_task
+        await process.wait()
+    except BaseException:
+        # gather() leaves the other side running: stop reading the upload before killing ffmpeg
+        for task in (*tasks, stderr_task):
+            task.cancel()
+        await asyncio.gather(*tasks, stderr_task, return_exceptions=True)
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        error_message = stderr_data.decode('utf-8', errors='ignore').strip()
+        logger.error("ffmpeg error (code %s): %s", process.returncode, error_message)
+        raise HTTPException(status_code=500, detail=f"Audio conversion failed: {error_message}")
+
+    audio_np = pcm.samples()
+    if audio_np.size == 0:
+        logger.warning("ffmpeg produced no output PCM data.")
+    return audio_np
+
+
+async def decode_with_ffmpeg(audio_bytes: bytes) -> np.ndarray:
+    """Converts any format ffmpeg understands to 16 kHz mono float32 in a subprocess."""
+    return await _decode_stream_with_ffmpeg(
+        single_chunk(audio_bytes), len(audio_bytes), int(STT_MAX_AUDIO_S * OUTPUT_SAMPLE_RATE)
+    )
+
+
+async def decode_stream(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int = STT_MAX_UPLOAD_BYTES,
+    max_seconds: float = STT_MAX_AUDIO_S,
+) -> np.ndarray:
+    """
+    Decodes an upload to 16 kHz mono float32 as its chunks arrive.
+
+    The format is sniffed from the first bytes. Common containers (wav, flac, ogg, aiff,
+    mp3) are collected (bounded by `max_bytes`) and decoded in-process in an executor
+    thread, which takes milliseconds. Everything else is streamed through ffmpeg while
+    the upload is still in progress. Uploads over `max_bytes` or decoding to more than
+    `max_seconds` of audio are rejected with a 413.
+    """
+    max_samples = int(max_seconds * OUTPUT_SAMPLE_RATE)
+    chunks = aiter(chunks)
+    head = bytearray()
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= SNIFF_BYTES:
+            break
+    if not head:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+
+    audio_format = sniff_format(bytes(head[:SNIFF_BYTES]))
+    if audio_format is None:
+        return await _decode_stream_with_ffmpeg(_prepend(head, chunks), max_bytes, max_samples)
+
+    data = head
+    async for chunk in chunks:
+        data += chunk
+        if len(data) > max_bytes:
+            break
+    if len(data) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload is larger than the {max_bytes} bytes limit.")
+    try:
+        audio_np = await run_in_executor(stt_executor, decode_in_process, data, span_name="stt.decode_in_process")
+        logger.debug("Decoded %s upload in-process (%s samples).", audio_format, audio_np.size)
+    except (RuntimeError, ValueError) as e:
+        logger.info("In-process decoding of %s upload failed (%s), falling back to ffmpeg.", audio_format, e)
+        return await _decode_stream_with_ffmpeg(single_chunk(bytes(data)), max_bytes, max_samples)
+    if audio_np.shape[0] > max_samples:
+        raise HTTPException(status_code=413, detail=f"Audio is longer than the {max_seconds:.0f}s limit.")
+    return audio_np
+
+
+async def _prepend(head: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield bytes(head)
+    async for chunk in chunks:
+        yield chunk
+
+
+async def decode_audio(audio_bytes: bytes) -> np.ndarray:
+    """Decodes a complete in-memory upload to 16 kHz mono float32 (see decode_stream)."""
+    return await decode_stream(single_chunk(audio_bytes))
@@ -0,0 +1,60 @@
+# src/features/stt/policy.py
+import os
+
+import numpy as np
+
+from src.features.guess_who.constants import ALL_CHARACTERS
+from .audio import SAMPLE_RATE
+
+# --- Adaptive decoding configuration ---
+# Clips shorter than this (after trimming) are decoded greedily: game utterances are
+# a few words and beam search brings no accuracy there, only latency
+STT_SHORT_CLIP_S = float(os.getenv("STT_SHORT_CLIP_S", "4"))
+SHORT_CLIP_BEAM_SIZE = 1
+LONG_CLIP_BEAM_SIZE = int(os.getenv("STT_BEAM_SIZE", "5"))
+# "hotwords", "prompt" or "off": how the game vocabulary is passed to Whisper
+STT_VOCABULARY_BIAS = os.getenv("STT_VOCABULARY_BIAS", "hotwords")
+# Silence kept around detected speech so word boundaries are not clipped
+TRIM_PAD_MS = 200
+
+# Closed vocabulary of the game: answers and the animal names on the board
+GAME_VOCABULARY = ["yes", "no", *ALL_CHARACTERS]
+
+
+def trim_silence(audio: np.ndarray) -> np.ndarray:
+    """
+    Removes leading and trailing silence with the Silero VAD bundled in faster-whisper.
+    Pauses inside the utterance are kept. Returns an empty array if no speech is found.
+    Blocking (a few ms per second of audio): call it from a worker thread.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    speech = get_speech_timestamps(
+        audio,
+        VadOptions(min_silence_duration_ms=TRIM_PAD_MS, speech_pad_ms=TRIM_PAD_MS),
+        sampling_rate=SAMPLE_RATE,
+    )
+    if not speech:
+        return audio[:0]
+    return audio[speech[0]["start"]:speech[-1]["end"]]
+
+
+def vocabulary_options(mode: str = STT_VOCABULARY_BIAS) -> dict:
+    """Whisper keyword arguments biasing decoding towards the game vocabulary."""
+    if mode == "hotwords":
+        return {"hotwords": " ".join(GAME_VOCABULARY)}
+    if mode == "prompt":
+        return {"initial_prompt": "Guess Who? " + ", ".join(GAME_VOCABULARY) + "."}
+    return {}
+
+
+def decoding_options(duration_s: float) -> dict:
+    """Greedy decoding for short clips, beam search for long ones, plus vocabulary biasing."""
+    beam_size = SHORT_CLIP_BEAM_SIZE if duration_s < STT_SHORT_CLIP_S else LONG_CLIP_BEAM_SIZE
+    return {"beam_size": beam_size, **vocabulary_options()}
+
+
+def prepare_audio(audio: np.ndarray) -> tuple[np.ndarray, dict]:
+    """Trims the clip and picks its decoding options from the trimmed duration."""
+    trimmed = trim_silence(audio)
+    return trimmed, decoding_options(trimmed.shape[0] / SAMPLE_RATE)
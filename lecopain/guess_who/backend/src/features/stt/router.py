@@ -1,10 +1,18 @@
 # src/features/stt/router.py
+import json
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from typing import AsyncIterator
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from starlette.websockets import WebSocketState
 
 # Import the service function and response schema
-from .services import transcribe_audio_file
-from .schema import TranscriptionResponse
+from src.core.registry import model_registry
+from .services import WHISPER_REGISTRY_KEY, stt_admission, transcribe_audio_stream
+from .schema import SchedulerStatsResponse, StreamTranscriptEvent, TranscriptionResponse
+from .audio import SAMPLE_RATE
+from .decoding import STT_MAX_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES
+from .streaming import STREAM_FORMATS, StreamingSession
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +30,7 @@ async def http_transcribe_audio(
     """
     Endpoint to receive an audio file via HTTP POST request and return its transcription.
     """
-    logger.info(f"Received file '{file.filename}' for transcription, content type: {file.content_type}")
+    logger.info("Received file '%s' for transcription, content type: %s", file.filename, file.content_type)
 
     # Check content type if needed (basic check)
     # You might want more robust validation depending on ffmpeg capabilities
@@ -31,24 +39,18 @@ async def http_transcribe_audio(
     #     raise HTTPException(status_code=400, detail="Invalid file type. Please upload an audio file.")
 
     try:
-        # Read the entire file content into memory.
-        # For very large files, consider streaming to a temporary file first.
-        audio_bytes = await file.read()
+        # Feed the decoder chunk by chunk instead of reading the whole file into memory.
+        # Empty and oversized uploads are rejected by the decoding layer (400 / 413).
+        transcription_text = await transcribe_audio_stream(_iter_upload(file))
 
-        if not audio_bytes:
-             raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-
-        # Call the service function to process and transcribe
-        transcription_text = await transcribe_audio_file(audio_bytes)
-
-        logger.info(f"Successfully processed file '{file.filename}'")
+        logger.info("Successfully processed file '%s'", file.filename)
         return TranscriptionResponse(transcription=transcription_text)
 
     except HTTPException as http_exc:
         # Re-raise HTTPExceptions (e.g., from service layer)
         raise http_exc
     except Exception as e:
-        logger.exception(f"Unexpected error processing file '{file.filename}': {e}")
+        logger.exception("Unexpected error processing file '%s': %s", file.filename, e)
         # Return a structured error response using the schema
         return TranscriptionResponse(
             transcription="",
@@ -57,4 +59,127 @@ async def http_transcribe_audio(
     finally:
         # Ensure the file handle is closed (FastAPI usually handles this with UploadFile)
         await file.close()
-        logger.debug(f"Closed file handle for '{file.filename}'")
\ No newline at end of file
+        logger.debug("Closed file handle for '%s'", file.filename)
+
+
+async def _iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        yield chunk
+
+
+@router.post(
+    "/transcribe_stream",
+    response_model=TranscriptionResponse,
+    summary="Transcribe a streamed audio body",
+    description=(
+        "Send the raw audio file as the request body (e.g. Content-Type: audio/webm). "
+        "Decoding starts while the upload is still in progress."
+    ),
+)
+async def http_transcribe_audio_stream(request: Request):
+    """
+    Endpoint receiving audio as a raw (optionally chunked) request body. Unlike the multipart
+    endpoint, the body is not spooled first: chunks are piped to the decoder as they arrive.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > STT_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload is larger than the {STT_MAX_UPLOAD_BYTES} bytes limit.")
+    logger.info("Receiving streamed audio for transcription, content type: %s", request.headers.get('content-type'))
+
+    try:
+        transcription_text = await transcribe_audio_stream(request.stream())
+        return TranscriptionResponse(transcription=transcription_text)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        logger.exception("Unexpected error processing streamed audio: %s", e)
+        return TranscriptionResponse(
+            transcription="",
+            error=f"An unexpected error occurred: {type(e).__name__}"
+        )
+
+
+@router.get(
+    "/scheduler",
+    response_model=SchedulerStatsResponse,
+    summary="Transcription pool statistics",
+    description="Queue depth, in-flight requests and batching statistics of the Whisper inference pool.",
+)
+async def http_scheduler_stats():
+    transcription_scheduler = await model_registry.get(WHISPER_REGISTRY_KEY, timeout=0)
+    return SchedulerStatsResponse(**transcription_scheduler.stats())
+
+@router.websocket("/stream")
+async def ws_transcribe_stream(
+    websocket: WebSocket,
+    audio_format: str = Query("pcm_s16le", alias="format", description="pcm_s16le, pcm_f32le or opus (webm/ogg container)"),
+    sample_rate: int = Query(SAMPLE_RATE, description="Sample rate of raw PCM input"),
+):
+    """
+    Streaming transcription endpoint.
+
+    The client sends audio as binary messages while the player talks and a text
+    message `{"event": "end"}` when done. The server answers with JSON
+    `StreamTranscriptEvent` messages: `partial` transcripts while speech is ongoing
+    and a `final` transcript as soon as the VAD detects the end of the utterance.
+    Under overload (STT admission control), partials are skipped; if a connection or a
+    final transcript is not admitted, an `error` event with `retry_after_s` is sent and
+    the socket is closed with code 1013.
+    """
+    await websocket.accept()
+
+    async def send(event: StreamTranscriptEvent):
+        # Pending transcriptions may finish after the socket was closed for overload
+        if websocket.application_state == WebSocketState.CONNECTED:
+            await websocket.send_json(jsonable_encoder(event))
+
+    if audio_format not in STREAM_FORMATS or sample_rate <= 0:
+        await send(StreamTranscriptEvent(type="error", error=f"Unsupported stream format '{audio_format}' at {sample_rate} Hz."))
+        await websocket.close(code=1003)
+        return
+
+    async def reject(e: HTTPException):
+        # 1013 "try again later": the same as a 429/503 for the HTTP endpoints
+        retry_after_s = int(e.headers["Retry-After"]) if e.headers and "Retry-After" in e.headers else None
+        if websocket.application_state == WebSocketState.CONNECTED:
+            logger.warning("Transcription stream closed: %s", e.detail)
+            await send(StreamTranscriptEvent(type="error", error=e.detail, retry_after_s=retry_after_s))
+            await websocket.close(code=1013)
+
+    try:
+        # Refuse before starting a decoder if the STT queue is already full
+        stt_admission.check()
+    except HTTPException as e:
+        await reject(e)
+        return
+
+    logger.info("Opened transcription stream (format: %s, sample rate: %s)", audio_format, sample_rate)
+    session = StreamingSession(send=send, input_format=audio_format, sample_rate=sample_rate, on_overload=reject)
+    try:
+        await session.start()
+        await send(StreamTranscriptEvent(type="ready"))
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect" or websocket.application_state != WebSocketState.CONNECTED:
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                await session.push(message["bytes"])
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except json.JSONDecodeError:
+                    control = {}
+                if isinstance(control, dict) and control.get("event") == "end":
+                    break
+        await session.finish()
+        if websocket.application_state == WebSocketState.CONNECTED:
+            await websocket.close()
+        logger.info("Transcription stream finished.")
+    except WebSocketDisconnect:
+        logger.info("Transcription stream disconnected by client.")
+        session.close()
+    except Exception as e:
+        logger.exception("Unexpected error in transcription stream: %s", e)
+        session.close()
+        await send(StreamTranscriptEvent(type="error", error=f"An unexpected error occurred: {type(e).__name__}"))
+        await websocket.close(code=1011)
@@ -0,0 +1,247 @@
+# src/features/stt/scheduler.py
+import asyncio
+import bisect
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import numpy as np
+
+from .audio import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# --- Scheduler configuration ---
+CPU_COUNT = os.cpu_count() or 1
+# Independent model instances; each one decodes a batch at a time
+STT_REPLICAS = max(1, int(os.getenv("STT_REPLICAS", "1")))
+# CTranslate2 intra-op threads per replica (0 = split the cores evenly between replicas)
+STT_THREADS_PER_REPLICA = int(os.getenv("STT_THREADS_PER_REPLICA", "0"))
+# Upper bound on requests decoded together through the batched pipeline
+STT_MAX_BATCH_SIZE = max(1, int(os.getenv("STT_MAX_BATCH_SIZE", "8")))
+# How long a free replica waits for more requests before starting a batch
+STT_BATCH_WINDOW_MS = float(os.getenv("STT_BATCH_WINDOW_MS", "10"))
+STT_LANGUAGE = os.getenv("WHISPER_LANGUAGE") or None
+
+# Whisper decodes 30 s windows; longer clips are never batched with others
+BATCHABLE_MAX_S = 30.0
+# Silence inserted between concatenated clips so segments never straddle two requests
+BATCH_GAP_S = 0.5
+
+
+@dataclass
+class _Job:
+    audio: np.ndarray
+    options: tuple
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def batchable(self) -> bool:
+        return self.audio.shape[0] <= BATCHABLE_MAX_S * SAMPLE_RATE
+
+
+class TranscriptionScheduler:
+    """
+    Runs Whisper inference on its own bounded thread pool, separate from the default
+    asyncio executor used for LLM calls.
+
+    Requests are queued; each replica picks up everything waiting (up to the batch size)
+    after a short batching window, groups it by decoding options and decodes each group
+    in one call of faster-whisper's BatchedInferencePipeline. Replicas and threads per
+    replica trade latency for throughput: more replicas serve more players in parallel,
+    more threads make a single decode faster.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[int], Any],
+        replicas: int = STT_REPLICAS,
+        threads_per_replica: int = STT_THREADS_PER_REPLICA,
+        max_batch_size: int = STT_MAX_BATCH_SIZE,
+        batch_window_ms: float = STT_BATCH_WINDOW_MS,
+        language: str | None = STT_LANGUAGE,
+    ):
+        self.model_factory = model_factory
+        self.num_replicas = replicas
+        self.threads_per_replica = threads_per_replica or max(1, CPU_COUNT // replicas)
+        self.max_batch_size = max_batch_size
+        self.batch_window_s = batch_window_ms / 1000
+        self.language = language
+
+        self.replicas: list = []
+        self._pipelines: list = []
+        self._executor = ThreadPoolExecutor(max_workers=replicas, thread_name_prefix="whisper")
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+
+        # Counters exposed through stats()
+        self._in_flight = 0
+        self._requests = 0
+        self._batches = 0
+        self._batched_requests = 0
+        self._total_queue_wait_s = 0.0
+
+    def load(self):
+        """Instantiates the model replicas (blocking: downloads and loads weights)."""
+        from faster_whisper import BatchedInferencePipeline
+
+        logger.info(
+            "Loading %s Whisper replica(s) with %s thread(s) each (%s cores available).",
+            self.num_replicas, self.threads_per_replica, CPU_COUNT,
+        )
+        self.replicas = [self.model_factory(self.threads_per_replica) for _ in range(self.num_replicas)]
+        self._pipelines = [BatchedInferencePipeline(model=replica) for replica in self.replicas]
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.replicas)
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(index)) for index in range(len(self.replicas))
+        ]
+
+    async def transcribe(self, audio: np.ndarray, beam_size: int = 5, **options) -> str:
+        """Queues 16 kHz mono float32 samples for transcription and waits for the text."""
+        if not self.loaded:
+            raise RuntimeError("Transcription scheduler has no model loaded.")
+        self._ensure_started()
+        key = (("beam_size", beam_size), *sorted(options.items()))
+        future = asyncio.get_running_loop().create_future()
+        self._requests += 1
+        await self._queue.put(_Job(audio=audio, options=key, future=future))
+        return await future
+
+    async def _worker_loop(self, replica_index: int):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self._queue.get()]
+            # Give concurrent requests a moment to join this batch
+            deadline = loop.time() + self.batch_window_s
+            while len(jobs) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    jobs.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            now = time.perf_counter()
+            self._total_queue_wait_s += sum(now - job.enqueued_at for job in jobs)
+            self._in_flight += len(jobs)
+            try:
+                results = await loop.run_in_executor(self._executor, self._run_jobs, replica_index, jobs)
+            except Exception as e:
+                results = [e] * len(jobs)
+            finally:
+                self._in_flight -= len(jobs)
+
+            for job, result in zip(jobs, results):
+                if job.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    job.future.set_exception(result)
+                else:
+                    job.future.set_result(result)
+
+    def _run_jobs(self, replica_index: int, jobs: list[_Job]) -> list:
+        """Runs in the scheduler's thread pool. Returns one text (or exception) per job."""
+        groups: dict[tuple, list[int]] = {}
+        for i, job in enumerate(jobs):
+            key = job.options if job.batchable else (job.options, i)
+            groups.setdefault(key, []).append(i)
+
+        results: list = [None] * len(jobs)
+        for indices in groups.values():
+            group = [jobs[i] for i in indices]
+            try:
+                if len(group) == 1:
+                    texts = [self._transcribe_single(replica_index, group[0])]
+                else:
+                    texts = self._transcribe_batch(replica_index, group)
+            except Exception as e:
+                logger.exception("Whisper replica %s failed on a group of %s request(s): %s", replica_index, len(group), e)
+                texts = [e] * len(group)
+            for i, text in zip(indices, texts):
+                results[i] = text
+        return results
+
+    def warmup(self, audio: np.ndarray, beam_size: int = 1):
+        """
+        Runs `audio` on every replica through both paths of real requests, a lone clip and a
+        batch of two through BatchedInferencePipeline, on the scheduler's own threads (blocking).
+        """
+        options = (("beam_size", beam_size),)
+        for replica_index in range(len(self.replicas)):
+            jobs = [_Job(audio=audio, options=options, future=None) for _ in range(2)]
+            self._executor.submit(self._transcribe_single, replica_index, jobs[0]).result()
+            self._executor.submit(self._transcribe_batch, replica_index, jobs).result()
+        # Keep stats() about real requests
+        self._batches = 0
+        self._batched_requests = 0
+
+    def _transcribe_single(self, replica_index: int, job: _Job) -> str:
+        segments, _ = self.replicas[replica_index].transcribe(job.audio, language=self.language, **dict(job.options))
+        return " ".join(seg.text.strip() for seg in segments if seg.text).strip()
+
+    def _transcribe_batch(self, replica_index: int, jobs: list[_Job]) -> list[str]:
+        """
+        Concatenates the clips (separated by silence) and hands them to the batched
+        pipeline with one clip timestamp per request, so each request becomes one
+        element of the same encoder/decoder batch. Segments are mapped back to their
+        request through their start time.
+        """
+        gap = np.zeros(int(BATCH_GAP_S * SAMPLE_RATE), dtype=np.float32)
+        parts, clip_timestamps, starts = [], [], []
+        offset = 0
+        for job in jobs:
+            parts.extend((job.audio, gap))
+            start = offset / SAMPLE_RATE
+            clip_timestamps.append({"start": start, "end": (offset + job.audio.shape[0]) / SAMPLE_RATE})
+            starts.append(start)
+            offset += job.audio.shape[0] + gap.shape[0]
+
+        segments, _ = self._pipelines[replica_index].transcribe(
+            np.concatenate(parts),
+            language=self.language,
+            clip_timestamps=clip_timestamps,
+            batch_size=len(jobs),
+            **dict(jobs[0].options),
+        )
+        texts: list[list[str]] = [[] for _ in jobs]
+        for seg in segments:
+            if seg.text:
+                index = max(0, bisect.bisect_right(starts, seg.start + 1e-3) - 1)
+                texts[index].append(seg.text.strip())
+
+        self._batches += 1
+        self._batched_requests += len(jobs)
+        return [" ".join(words).strip() for words in texts]
+
+    def stats(self) -> dict:
+        """Queue depth and throughput counters for monitoring."""
+        return {
+            "replicas": len(self.replicas),
+            "threads_per_replica": self.threads_per_replica,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self._in_flight,
+            "requests": self._requests,
+            "batches": self._batches,
+            "avg_batch_size": self._batched_requests / self._batches if self._batches else 0.0,
+            "avg_queue_wait_ms": 1000 * self._total_queue_wait_s / self._requests if self._requests else 0.0,
+        }
+
+    def shutdown(self):
+        for task in self._workers:
+            task.cancel()
+        self._workers = []
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,6 @@
 # src/features/stt/schema.py
+from typing import Literal
+
 from pydantic import BaseModel
 
 class TranscriptionResponse(BaseModel):
@@ -6,4 +8,29 @@ class TranscriptionResponse(BaseModel):
     Pydantic model for the transcription response.
     """
     transcription: str
-    error: str | None = None # Optional field for reporting errors
\ No newline at end of file
+    error: str | None = None # Optional field for reporting errors
+
+class StreamTranscriptEvent(BaseModel):
+    """
+    Message sent over the streaming transcription WebSocket.
+    `partial` events may be revised; a `final` event closes the utterance.
+    """
+    type: Literal["ready", "partial", "final", "error"]
+    utterance: int = 0
+    text: str = ""
+    latency_ms: float | None = None # End-of-speech to final transcript, for `final` events
+    error: str | None = None
+    retry_after_s: int | None = None # Set on `error` events when the server is overloaded
+
+
+class SchedulerStatsResponse(BaseModel):
+    """Queue depth and throughput counters of the Whisper inference pool."""
+    replicas: int
+    threads_per_replica: int
+    max_batch_size: int
+    queue_depth: int
+    in_flight: int
+    requests: int
+    batches: int
+    avg_batch_size: float
+    avg_queue_wait_ms: float
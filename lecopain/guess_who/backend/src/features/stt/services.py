@@ -1,108 +1,159 @@
 # src/features/stt/services.py
-import asyncio
 import logging
-import subprocess
-import numpy as np
 import os
+import time
+from typing import AsyncIterator
+
+import numpy as np
 from fastapi import HTTPException
 
-# Import the globally loaded model from main.py
-# This assumes model is loaded in main.py and accessible
-# Adjust the import path if your structure differs slightly
-from src.main import model, FFMPEG_PATH # Import model and ffmpeg path
+from src.core.admission import admission_controller
+from src.core.executors import stt_executor
+from src.core.metrics import counter, gauge, histogram
+from src.core.registry import model_registry
+from src.core.tracing import run_in_executor, span, traced
+from .audio import SAMPLE_RATE
+from .decoding import single_chunk, decode_stream
+from .policy import prepare_audio, vocabulary_options
+from .scheduler import TranscriptionScheduler
 
 logger = logging.getLogger(__name__)
 
-# --- Audio processing constants (same as before) ---
-# INPUT_FORMAT is not strictly needed here as ffmpeg detects it,
-# but it's good practice if you want to enforce certain input types later.
-OUTPUT_SAMPLE_RATE = 16000
-OUTPUT_CHANNELS = 1
-OUTPUT_FORMAT = 'f32le' # PCM 32-bit float little-endian
-BYTES_PER_SAMPLE = np.dtype(np.float32).itemsize
+# --- Faster Whisper model configuration ---
+MODEL_NAME = os.getenv("WHISPER_MODEL", "ctranslate2-4you/whisper-base.en-ct2-int8_bfloat16")
+DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_REGISTRY_KEY = "whisper"
+
+
+def load_transcription_scheduler() -> TranscriptionScheduler:
+    """Builds the Whisper inference pool (blocking; run by the model registry in a thread)."""
+    # Imported here so that importing the app does not pay for ctranslate2
+    from faster_whisper import WhisperModel
+
+    logger.info("Loading Faster Whisper model '%s' on device '%s' (%s)...", MODEL_NAME, DEVICE, COMPUTE_TYPE)
+    scheduler = TranscriptionScheduler(
+        lambda cpu_threads: WhisperModel(MODEL_NAME, device=DEVICE, compute_type=COMPUTE_TYPE, cpu_threads=cpu_threads)
+    )
+    scheduler.load()
+    return scheduler
 
-async def transcribe_audio_file(audio_bytes: bytes) -> str:
+
+def warmup_transcription_scheduler(scheduler: TranscriptionScheduler):
     """
-    Processes an audio file (bytes), converts it using ffmpeg,
-    and transcribes it using the loaded Faster Whisper model.
+    Runs dummy inferences on every replica, alone and batched, so the first player does not pay
+    for lazy initialization (including the batched pipeline's).
     """
-    if not model:
-        logger.error("Transcription failed: Faster Whisper model not loaded.")
-        raise HTTPException(status_code=500, detail="Transcription model is not available.")
+    dummy_audio = np.random.default_rng(0).normal(0, 0.01, SAMPLE_RATE).astype(np.float32)
+    scheduler.warmup(dummy_audio)
 
-    if not audio_bytes:
-        logger.warning("Transcription skipped: No audio data received.")
-        return "" # Or raise HTTPException(status_code=400, detail="No audio data received.")
 
-    ffmpeg_command = [
-        FFMPEG_PATH,
-        '-loglevel', 'error',
-        '-i', 'pipe:0',         # Read input from stdin
-        '-f', OUTPUT_FORMAT,    # Output format PCM float 32-bit little-endian
-        '-ar', str(OUTPUT_SAMPLE_RATE), # Sample rate
-        '-ac', str(OUTPUT_CHANNELS),    # Channel count (mono)
-        '-'                     # Write output to stdout
-    ]
+model_registry.register(WHISPER_REGISTRY_KEY, load_transcription_scheduler, warmup_transcription_scheduler)
 
-    logger.debug(f"Running ffmpeg command: {' '.join(ffmpeg_command)}")
+# --- Admission control (see src/core/admission.py) ---
+# Uploads decoded and transcribed at once (each may run an ffmpeg process), and how many may wait
+STT_MAX_CONCURRENT = int(os.getenv("STT_MAX_CONCURRENT", "4"))
+STT_MAX_QUEUE = int(os.getenv("STT_MAX_QUEUE", "8"))
+STT_MAX_WAIT_S = float(os.getenv("STT_MAX_WAIT_S", "10"))
+
+stt_admission = admission_controller("stt", STT_MAX_CONCURRENT, STT_MAX_QUEUE, STT_MAX_WAIT_S)
+
+
+# --- Metrics ---
+# mode: "adaptive" (policy.py) or "fixed" (explicit beam size, e.g. streaming partials)
+STT_DECODE_LATENCY = histogram("stt_decode_duration_seconds", "Upload decoding time, overlapping the upload.")
+STT_TRANSCRIBE_LATENCY = histogram("stt_transcribe_duration_seconds", "Whisper transcription time.", ["mode"])
+STT_AUDIO_SECONDS = counter("stt_audio_seconds", "Seconds of audio sent to transcription.", ["mode"])
+
+
+def _scheduler_stat(key: str) -> dict:
+    scheduler = model_registry.peek(WHISPER_REGISTRY_KEY)
+    return {(): scheduler.stats()[key] if scheduler is not None else 0}
 
-    try:
-        process = await asyncio.create_subprocess_exec(
-            *ffmpeg_command,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-
-        # Write audio data to ffmpeg's stdin and close it
-        stdout_data, stderr_data = await process.communicate(input=audio_bytes)
-
-        if process.returncode != 0:
-            error_message = stderr_data.decode('utf-8', errors='ignore').strip()
-            logger.error(f"ffmpeg error (code {process.returncode}): {error_message}")
-            raise HTTPException(status_code=500, detail=f"Audio conversion failed: {error_message}")
-
-        if not stdout_data:
-            logger.warning("ffmpeg produced no output PCM data.")
-            return "" # No data to transcribe
-
-        # Convert PCM bytes to NumPy array
-        try:
-            audio_np = np.frombuffer(stdout_data, dtype=np.float32)
-        except Exception as np_err:
-             logger.error(f"Error converting PCM bytes to NumPy array: {np_err}")
-             raise HTTPException(status_code=500, detail="Error processing audio data.")
 
+gauge("stt_scheduler_queue_depth", "Transcriptions waiting for a Whisper replica.",
+      callback=lambda: _scheduler_stat("queue_depth"))
+gauge("stt_scheduler_in_flight", "Transcriptions running on a Whisper replica.",
+      callback=lambda: _scheduler_stat("in_flight"))
+
+
+@traced("stt.transcribe")
+async def transcribe_array(audio_np: np.ndarray, beam_size: int | None = None) -> str:
+    """
+    Transcribes 16 kHz mono float32 samples using the loaded Faster Whisper model.
+    Shared by the upload endpoint and the streaming WebSocket endpoint; the actual
+    inference is queued on the transcription scheduler's worker pool.
+
+    With `beam_size=None` the adaptive policy applies (see policy.py): silence is
+    trimmed and the beam size is chosen from the remaining duration. The game
+    vocabulary is passed to Whisper in both cases.
+    """
+    # Waits briefly if the model is still loading, 503 otherwise
+    transcription_scheduler = await model_registry.get(WHISPER_REGISTRY_KEY)
+    mode = "adaptive" if beam_size is None else "fixed"
+    STT_AUDIO_SECONDS.labels(mode).inc(audio_np.shape[0] / SAMPLE_RATE)
+    start = time.perf_counter()
+
+    if beam_size is None:
+        audio_np, options = await run_in_executor(stt_executor, prepare_audio, audio_np, span_name="stt.prepare_audio")
         if audio_np.size == 0:
-             logger.info("Transcription skipped: Empty audio array after conversion.")
-             return ""
-
-        # --- Transcription using faster-whisper ---
-        logger.debug(f"Transcribing {audio_np.size} PCM samples using faster-whisper...")
-        try:
-            # Run synchronous model.transcribe in an executor thread
-            segments, _ = await asyncio.get_event_loop().run_in_executor(
-                None,  # Use default executor
-                lambda: list(model.transcribe(audio_np, beam_size=5))
-            )
-            transcription = " ".join(seg.text.strip() for seg in segments if seg.text).strip()
-
-            if not transcription:
-                transcription = "" # No speech detected or empty result
-                logger.info("Transcription result is empty.")
-            else:
-                logger.info(f"Transcription successful.") # Don't log full transcription here usually
-                # logger.debug(f"Transcription result: '{transcription}'") # Debug if needed
-
-            return transcription
-
-        except Exception as e:
-            logger.exception(f"Error during faster-whisper transcription process: {e}")
-            raise HTTPException(status_code=500, detail="Error during transcription process.")
-
-    except FileNotFoundError:
-         logger.error(f"CRITICAL ERROR: ffmpeg command '{FFMPEG_PATH}' not found.")
-         raise HTTPException(status_code=500, detail="Server configuration error: ffmpeg not found.")
-    except Exception as ffmpeg_err:
-         logger.error(f"Error running ffmpeg process: {ffmpeg_err}", exc_info=True)
-         raise HTTPException(status_code=500, detail="Server error during audio processing.")
\ No newline at end of file
+            logger.info("Transcription skipped: no speech detected.")
+            return ""
+    else:
+        options = {"beam_size": beam_size, **vocabulary_options()}
+
+    # --- Transcription using faster-whisper ---
+    logger.debug("Transcribing %s PCM samples using faster-whisper (options: %s)...", audio_np.size, options)
+    try:
+        transcription = await transcription_scheduler.transcribe(audio_np, **options)
+        STT_TRANSCRIBE_LATENCY.labels(mode).observe(time.perf_counter() - start)
+
+        if not transcription:
+            transcription = "" # No speech detected or empty result
+            logger.info("Transcription result is empty.")
+        else:
+            logger.info("Transcription successful.") # Don't log full transcription here usually
+            # logger.debug(f"Transcription result: '{transcription}'") # Debug if needed
+
+        return transcription
+
+    except Exception as e:
+        logger.exception("Error during faster-whisper transcription process: %s", e)
+        raise HTTPException(status_code=500, detail="Error during transcription process.")
+
+
+async def transcribe_audio_stream(chunks: AsyncIterator[bytes], beam_size: int | None = None) -> str:
+    """
+    Decodes an upload while its chunks arrive (bounded in size and duration, see
+    decoding.decode_stream) and transcribes it using the loaded Faster Whisper model.
+    Admitted before the first chunk is read: a refused upload costs no decoding.
+    """
+    try:
+        async with stt_admission.slot():
+            # In-process decoding for common formats, ffmpeg subprocess for the rest
+            with STT_DECODE_LATENCY.time(), span("stt.decode"):
+                audio_np = await decode_stream(chunks)
+
+            if audio_np.size == 0:
+                 logger.info("Transcription skipped: Empty audio array after conversion.")
+                 return ""
+
+            return await transcribe_array(audio_np, beam_size=beam_size)
+
+    except HTTPException:
+        raise
+    except Exception as decode_err:
+         logger.error("Error decoding audio: %s", decode_err, exc_info=True)
+         raise HTTPException(status_code=500, detail="Server error during audio processing.")
+
+
+async def transcribe_audio_file(audio_bytes: bytes, beam_size: int | None = None) -> str:
+    """
+    Processes an audio file (bytes), decodes it to 16 kHz mono PCM,
+    and transcribes it using the loaded Faster Whisper model.
+    """
+    if not audio_bytes:
+        logger.warning("Transcription skipped: No audio data received.")
+        return "" # Or raise HTTPException(status_code=400, detail="No audio data received.")
+
+    return await transcribe_audio_stream(single_chunk(audio_bytes), beam_size=beam_size)
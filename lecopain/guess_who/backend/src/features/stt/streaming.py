@@ -0,0 +1,254 @@
+# src/features/stt/streaming.py
+import asyncio
+import logging
+import os
+import subprocess
+import time
+from typing import Awaitable, Callable
+
+import numpy as np
+from fastapi import HTTPException
+
+from .audio import PCM_FORMATS, SAMPLE_RATE, pcm_to_float32, resample
+from .decoding import FFMPEG_PATH
+from .schema import StreamTranscriptEvent
+from .services import stt_admission, transcribe_array
+from .vad import EnergyVAD
+
+logger = logging.getLogger(__name__)
+
+# --- Streaming configuration ---
+# How much new speech must arrive before we refresh the partial transcript
+PARTIAL_INTERVAL_S = float(os.getenv("STT_PARTIAL_INTERVAL_S", "0.5"))
+# Silence needed after speech before the utterance is considered finished
+ENDPOINT_SILENCE_MS = int(os.getenv("STT_ENDPOINT_SILENCE_MS", "400"))
+# Utterances are force-finalized past this length (Whisper works on 30 s windows)
+MAX_UTTERANCE_S = float(os.getenv("STT_MAX_UTTERANCE_S", "30"))
+# Audio kept from before the VAD trigger so the first syllable is not clipped
+PRE_ROLL_S = 0.3
+# Partials only need to be readable, so we decode them greedily.
+# Finals use the adaptive policy (silence trimming, beam size from duration).
+PARTIAL_BEAM_SIZE = 1
+
+STREAM_FORMATS = (*PCM_FORMATS.keys(), "opus")
+READ_CHUNK_BYTES = 4096
+
+
+class FfmpegStreamDecoder:
+    """
+    Long-lived ffmpeg process decoding a compressed stream (e.g. the webm/ogg Opus
+    chunks produced by the browser MediaRecorder) into 16 kHz mono float32 samples.
+    One process per WebSocket connection instead of one per utterance.
+    """
+
+    def __init__(self, on_samples: Callable[[np.ndarray], Awaitable[None]]):
+        self._on_samples = on_samples
+        self._process: asyncio.subprocess.Process | None = None
+        self._reader_task: asyncio.Task | None = None
+
+    async def start(self):
+        ffmpeg_command = [
+            FFMPEG_PATH,
+            '-loglevel', 'error',
+            # Do not wait for seconds of input before emitting the first samples
+            '-probesize', '4096',
+            '-analyzeduration', '0',
+            '-fflags', 'nobuffer',
+            '-i', 'pipe:0',
+            '-f', 'f32le',
+            '-ar', str(SAMPLE_RATE),
+            '-ac', '1',
+            'pipe:1',
+        ]
+        logger.debug("Starting streaming ffmpeg decoder: %s", ' '.join(ffmpeg_command))
+        self._process = await asyncio.create_subprocess_exec(
+            *ffmpeg_command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        leftover = b""
+        while True:
+            data = await self._process.stdout.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            data = leftover + data
+            usable = len(data) - (len(data) % 4)
+            leftover = data[usable:]
+            if usable:
+                await self._on_samples(np.frombuffer(data[:usable], dtype=np.float32))
+
+    async def write(self, chunk: bytes):
+        self._process.stdin.write(chunk)
+        await self._process.stdin.drain()
+
+    async def close(self):
+        """Closes stdin and waits until every decoded sample has been delivered."""
+        if self._process is None:
+            return
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        if self._reader_task is not None:
+            await self._reader_task
+        await self._process.wait()
+
+    def kill(self):
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+
+
+class StreamingSession:
+    """
+    Incremental transcription of one WebSocket audio stream.
+
+    Incoming samples go through the VAD. While the player talks, a greedy partial
+    transcript of the current utterance is refreshed every PARTIAL_INTERVAL_S.
+    As soon as the VAD reports end of speech, the utterance is decoded once more
+    with the adaptive decoding policy and emitted as a final transcript.
+
+    Transcriptions go through the STT admission control: a partial is skipped when
+    no slot is free, a final waits for one and calls `on_overload` with the 429/503 if
+    it is not admitted.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[StreamTranscriptEvent], Awaitable[None]],
+        input_format: str = "pcm_s16le",
+        sample_rate: int = SAMPLE_RATE,
+        on_overload: Callable[[HTTPException], Awaitable[None]] | None = None,
+    ):
+        if input_format not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported stream format '{input_format}'. Expected one of {STREAM_FORMATS}.")
+        self._send = send
+        self._on_overload = on_overload
+        self.input_format = input_format
+        self.sample_rate = sample_rate
+        self._vad = EnergyVAD(end_silence_ms=ENDPOINT_SILENCE_MS)
+        self._decoder = FfmpegStreamDecoder(self._on_samples) if input_format == "opus" else None
+
+        self._pre_roll = np.zeros(0, dtype=np.float32)
+        self._utterance: list[np.ndarray] = []
+        self._utterance_samples = 0
+        self._utterance_index = 0
+        self._samples_at_last_partial = 0
+        self._partial_task: asyncio.Task | None = None
+        self._final_task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._decoder is not None:
+            await self._decoder.start()
+
+    async def push(self, chunk: bytes):
+        """Feeds one binary WebSocket message."""
+        if self._decoder is not None:
+            await self._decoder.write(chunk)
+            return
+        samples = pcm_to_float32(chunk, self.input_format)
+        await self._on_samples(resample(samples, self.sample_rate))
+
+    async def finish(self):
+        """Flushes the decoder and finalizes whatever the player said last."""
+        if self._decoder is not None:
+            await self._decoder.close()
+        if self._utterance_samples:
+            self._finalize_utterance()
+        if self._final_task is not None:
+            await self._final_task
+
+    def close(self):
+        """Releases resources without waiting (e.g. on client disconnect)."""
+        if self._decoder is not None:
+            self._decoder.kill()
+        for task in (self._partial_task, self._final_task):
+            if task is not None:
+                task.cancel()
+
+    async def _on_samples(self, samples: np.ndarray):
+        if samples.size == 0:
+            return
+        was_in_speech = self._vad.in_speech
+        started, ended = self._vad.process(samples)
+
+        if was_in_speech or started:
+            if started and not was_in_speech:
+                self._utterance = [self._pre_roll]
+                self._utterance_samples = self._pre_roll.shape[0]
+                self._samples_at_last_partial = 0
+            self._utterance.append(samples)
+            self._utterance_samples += samples.shape[0]
+
+        if ended or self._utterance_samples >= MAX_UTTERANCE_S * SAMPLE_RATE:
+            self._finalize_utterance()
+        elif self._vad.in_speech:
+            new_speech = self._utterance_samples - self._samples_at_last_partial
+            partial_idle = self._partial_task is None or self._partial_task.done()
+            if new_speech >= PARTIAL_INTERVAL_S * SAMPLE_RATE and partial_idle:
+                self._samples_at_last_partial = self._utterance_samples
+                audio = np.concatenate(self._utterance)
+                self._partial_task = asyncio.create_task(self._emit_partial(self._utterance_index, audio))
+
+        if not self._vad.in_speech:
+            pre_roll_samples = int(PRE_ROLL_S * SAMPLE_RATE)
+            self._pre_roll = np.concatenate([self._pre_roll, samples])[-pre_roll_samples:]
+
+    def _finalize_utterance(self):
+        audio = np.concatenate(self._utterance) if self._utterance else np.zeros(0, dtype=np.float32)
+        index = self._utterance_index
+        previous_final = self._final_task
+        self._final_task = asyncio.create_task(self._emit_final(index, audio, previous_final, time.perf_counter()))
+
+        self._utterance_index += 1
+        self._utterance = []
+        self._utterance_samples = 0
+        self._samples_at_last_partial = 0
+        self._pre_roll = np.zeros(0, dtype=np.float32)
+        self._vad.reset()
+
+    async def _emit_partial(self, index: int, audio: np.ndarray):
+        try:
+            async with stt_admission.try_slot() as admitted:
+                if not admitted:
+                    logger.debug("Partial transcript of utterance %s skipped: no free STT slot.", index)
+                    return
+                text = await transcribe_array(audio, beam_size=PARTIAL_BEAM_SIZE)
+        except Exception as e:
+            logger.warning("Partial transcription failed for utterance %s: %s", index, e)
+            return
+        # Drop partials that arrive after their utterance was finalized
+        if index == self._utterance_index:
+            await self._send(StreamTranscriptEvent(type="partial", utterance=index, text=text))
+
+    async def _emit_final(self, index: int, audio: np.ndarray, previous: asyncio.Task | None, endpoint_t: float):
+        text = ""
+        error = None
+        try:
+            if audio.size:
+                async with stt_admission.slot():
+                    text = await transcribe_array(audio)
+        except HTTPException as e:
+            if e.status_code in (429, 503) and self._on_overload is not None:
+                await self._on_overload(e)
+                return
+            logger.exception("Final transcription failed for utterance %s: %s", index, e)
+            error = f"Transcription failed: {e.detail}"
+        except Exception as e:
+            logger.exception("Final transcription failed for utterance %s: %s", index, e)
+            error = f"Transcription failed: {type(e).__name__}"
+        # Finals are emitted in utterance order
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        latency_ms = (time.perf_counter() - endpoint_t) * 1000
+        logger.info("Final transcript for utterance %s ready %.0f ms after end of speech.", index, latency_ms)
+        await self._send(StreamTranscriptEvent(
+            type="error" if error else "final",
+            utterance=index,
+            text=text,
+            latency_ms=latency_ms,
+            error=error,
+        ))
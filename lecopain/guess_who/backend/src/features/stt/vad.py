@@ -0,0 +1,78 @@
+# src/features/stt/vad.py
+import numpy as np
+
+from .audio import SAMPLE_RATE
+
+
+class EnergyVAD:
+    """
+    Lightweight streaming voice activity detector.
+
+    Audio is split into fixed frames and each frame is compared against an adaptive
+    noise floor. Speech starts after `min_speech_ms` of loud frames and ends after
+    `end_silence_ms` of quiet frames, which is what we use as the end-of-utterance signal.
+    Cheap enough to run on every incoming chunk on the event loop.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = 30,
+        min_speech_ms: int = 90,
+        end_silence_ms: int = 400,
+        threshold_ratio: float = 3.0,
+        min_rms: float = 0.01,
+    ):
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.end_silence_frames = max(1, end_silence_ms // frame_ms)
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self.noise_floor = min_rms / threshold_ratio
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Resets the speech state (the noise floor estimate is kept)."""
+        self.in_speech = False
+        self._loud_frames = 0
+        self._quiet_frames = 0
+
+    def process(self, samples: np.ndarray) -> tuple[bool, bool]:
+        """
+        Feeds new samples to the detector.
+
+        Returns:
+            (speech_started, speech_ended): whether an utterance started and/or ended
+            within these samples.
+        """
+        if self._pending.size:
+            samples = np.concatenate([self._pending, samples])
+        n_frames = samples.shape[0] // self.frame_size
+        self._pending = samples[n_frames * self.frame_size:].copy()
+        if n_frames == 0:
+            return False, False
+
+        frames = samples[: n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+        started = ended = False
+        for frame_rms in rms:
+            threshold = max(self.min_rms, self.noise_floor * self.threshold_ratio)
+            loud = frame_rms > threshold
+            if not loud:
+                # Slowly track the background level while nobody is talking
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * frame_rms
+            if not self.in_speech:
+                self._loud_frames = self._loud_frames + 1 if loud else 0
+                if self._loud_frames >= self.min_speech_frames:
+                    self.in_speech = True
+                    self._quiet_frames = 0
+                    started = True
+            else:
+                self._quiet_frames = 0 if loud else self._quiet_frames + 1
+                if self._quiet_frames >= self.end_silence_frames:
+                    self.in_speech = False
+                    self._loud_frames = 0
+                    ended = True
+        return started, ended
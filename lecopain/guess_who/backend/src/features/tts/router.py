@@ -0,0 +1,71 @@
+# src/features/tts/router.py
+import logging
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Body, Query
+from fastapi.responses import Response, StreamingResponse
+
+from src.core.registry import model_registry
+from .schema import SpeakRequest, TTSStatusResponse
+from .services import TTS_REGISTRY_KEY, cached_speech, phrase_cache, stream_speech, validate_text
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+WAV_MEDIA_TYPE = "audio/wav"
+
+
+async def _speech_response(text: str) -> Response:
+    text = validate_text(text)
+    wav = await cached_speech(text)
+    if wav is not None:
+        return Response(content=wav, media_type=WAV_MEDIA_TYPE, headers={"X-TTS-Cache": "hit"})
+    return StreamingResponse(_logged_stream(text), media_type=WAV_MEDIA_TYPE, headers={"X-TTS-Cache": "miss"})
+
+
+async def _logged_stream(text: str) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in stream_speech(text):
+            yield chunk
+    except Exception as e:
+        # Headers are already sent: the client gets a truncated WAV
+        logger.exception("Speech synthesis failed for '%s': %s", text, e)
+        raise
+
+
+@router.get(
+    "/speak",
+    response_class=Response,
+    summary="Speak a phrase",
+    description=(
+        "Returns the phrase as a 16-bit mono WAV. Pre-rendered and already spoken phrases are "
+        "served from the cache (X-TTS-Cache: hit); others are streamed while being synthesized."
+    ),
+    responses={200: {"content": {WAV_MEDIA_TYPE: {}}}},
+)
+async def http_speak(text: str = Query(..., description="Text to speak")):
+    """GET so that the front can use the URL directly as an <audio> source."""
+    return await _speech_response(text)
+
+
+@router.post(
+    "/speak",
+    response_class=Response,
+    summary="Speak a phrase (JSON body)",
+    description="Same as GET /speak, with the text in the body.",
+    responses={200: {"content": {WAV_MEDIA_TYPE: {}}}},
+)
+async def http_speak_post(request_data: SpeakRequest = Body(...)):
+    return await _speech_response(request_data.text)
+
+
+@router.get(
+    "/status",
+    response_model=TTSStatusResponse,
+    summary="TTS cache status",
+    description="Synthesizer in use and phrase cache occupancy.",
+)
+async def http_tts_status():
+    ready = model_registry.peek(TTS_REGISTRY_KEY) is not None
+    return TTSStatusResponse(ready=ready, **phrase_cache.stats())
@@ -0,0 +1,16 @@
+# src/features/tts/schema.py
+from pydantic import BaseModel
+
+class SpeakRequest(BaseModel):
+    """Text to speak (POST variant of /speak, for long phrases)."""
+    text: str
+
+class TTSStatusResponse(BaseModel):
+    """Synthesizer and phrase cache state."""
+    ready: bool # Fixed phrases pre-rendered
+    synthesizer: str
+    sample_rate: int
+    pinned_phrases: int
+    recent_phrases: int
+    memory_bytes: int
+    cache_dir: str
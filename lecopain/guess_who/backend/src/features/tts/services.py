@@ -0,0 +1,267 @@
+# src/features/tts/services.py
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+from src.core.metrics import counter, histogram
+from src.core.registry import model_registry
+from src.features.guess_who.constants import ALL_CHARACTERS
+from .synthesizers import Synthesizer, make_synthesizer, wav_header
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+TTS_BACKEND = os.getenv("TTS_BACKEND", "auto")  # espeak | tone | auto
+TTS_VOICE = os.getenv("TTS_VOICE", "en")
+TTS_WORDS_PER_MINUTE = int(os.getenv("TTS_WORDS_PER_MINUTE", "160"))
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", Path.home() / ".cache" / "lecopain" / "tts"))
+TTS_MAX_CHARS = int(os.getenv("TTS_MAX_CHARS", "300"))
+# Novel phrases kept in memory once synthesized (LRU); fixed phrases are always kept
+TTS_MEMORY_CACHE_ITEMS = int(os.getenv("TTS_MEMORY_CACHE_ITEMS", "256"))
+PRERENDER_WORKERS = 4
+TTS_REGISTRY_KEY = "tts"
+
+# The closed set of replies: rendered once at startup, then served from memory
+FIXED_PHRASES = [
+    "yes",
+    "no",
+    *ALL_CHARACTERS,
+    *(f"Is it the {name}?" for name in ALL_CHARACTERS),
+]
+
+# --- Metrics ---
+TTS_REQUESTS = counter("tts_requests", "Speech requests by cache outcome.", ["cache"])
+TTS_FIRST_CHUNK_LATENCY = histogram("tts_first_chunk_seconds", "Time to the first audio chunk of a synthesized phrase.")
+TTS_SYNTHESIS_LATENCY = histogram("tts_synthesis_duration_seconds", "Full synthesis time of a phrase.", ["mode"])
+
+
+def normalize(text: str) -> str:
+    """Cache key: whitespace collapsed, case folded."""
+    return " ".join(text.split()).casefold()
+
+
+def validate_text(text: str) -> str:
+    text = " ".join(text.split())
+    if not text:
+        raise HTTPException(status_code=400, detail="Nothing to say.")
+    if len(text) > TTS_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text longer than {TTS_MAX_CHARS} characters.")
+    return text
+
+
+class PhraseCache:
+    """
+    Rendered phrases as complete WAV files, in memory and on disk.
+
+    Fixed phrases are pinned in memory; other phrases go through a bounded LRU. Files live
+    under a directory per synthesizer namespace (engine, voice, speed), so changing the voice
+    never serves stale audio, and a restart reloads them instead of synthesizing again.
+    """
+
+    def __init__(self, synthesizer: Synthesizer, cache_dir: Path, max_items: int = TTS_MEMORY_CACHE_ITEMS):
+        self.synthesizer = synthesizer
+        self.cache_dir = cache_dir / synthesizer.cache_namespace
+        self.max_items = max_items
+        self._pinned: dict[str, bytes] = {}
+        self._recent: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()[:20]}.wav"
+
+    def peek(self, text: str) -> bytes | None:
+        """The WAV of `text` if it is in memory (no disk access: safe on the event loop)."""
+        key = normalize(text)
+        with self._lock:
+            wav = self._pinned.get(key)
+            if wav is None:
+                wav = self._recent.get(key)
+                if wav is not None:
+                    self._recent.move_to_end(key)
+        return wav
+
+    def get(self, text: str) -> bytes | None:
+        """The WAV of `text` from memory or disk (blocking on a memory miss)."""
+        wav = self.peek(text)
+        if wav is None:
+            key = normalize(text)
+            path = self._path(key)
+            if path.exists():
+                wav = path.read_bytes()
+                self._remember(key, wav, pinned=False)
+        return wav
+
+    def put(self, text: str, pcm: bytes, pinned: bool = False) -> bytes:
+        key = normalize(text)
+        wav = wav_header(self.synthesizer.sample_rate, len(pcm)) + pcm
+        self._remember(key, wav, pinned)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(wav)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write the TTS cache file for '%s': %s", text, e)
+        return wav
+
+    def _remember(self, key: str, wav: bytes, pinned: bool):
+        with self._lock:
+            if pinned:
+                self._pinned[key] = wav
+                self._recent.pop(key, None)
+            elif key not in self._pinned:
+                self._recent[key] = wav
+                self._recent.move_to_end(key)
+                while len(self._recent) > self.max_items:
+                    self._recent.popitem(last=False)
+
+    def render(self, text: str, pinned: bool = False) -> bytes:
+        """The WAV of `text`, from the cache or synthesized now (blocking)."""
+        wav = self.get(text)
+        if wav is not None:
+            if pinned:
+                self._remember(normalize(text), wav, pinned=True)
+            return wav
+        start = time.perf_counter()
+        pcm = self.synthesizer.synthesize(text)
+        TTS_SYNTHESIS_LATENCY.labels("prerender").observe(time.perf_counter() - start)
+        return self.put(text, pcm, pinned)
+
+    def prerender(self, phrases: list[str]) -> "PhraseCache":
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=PRERENDER_WORKERS, thread_name_prefix="tts-prerender") as pool:
+            list(pool.map(lambda phrase: self.render(phrase, pinned=True), phrases))
+        logger.info(
+            "Pre-rendered %s phrases with '%s' in %.1fs (cache: %s)",
+            len(phrases), self.synthesizer.cache_namespace, time.perf_counter() - start, self.cache_dir,
+        )
+        return self
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "synthesizer": self.synthesizer.cache_namespace,
+                "sample_rate": self.synthesizer.sample_rate,
+                "pinned_phrases": len(self._pinned),
+                "recent_phrases": len(self._recent),
+                "memory_bytes": sum(map(len, self._pinned.values())) + sum(map(len, self._recent.values())),
+                "cache_dir": str(self.cache_dir),
+            }
+
+
+synthesizer = make_synthesizer(TTS_BACKEND, TTS_VOICE, TTS_WORDS_PER_MINUTE)
+phrase_cache = PhraseCache(synthesizer, TTS_CACHE_DIR)
+
+# Pre-rendered in the background at startup; /speak serves what is ready and synthesizes the rest
+model_registry.register(TTS_REGISTRY_KEY, lambda: phrase_cache.prerender(FIXED_PHRASES))
+
+
+# Phrases being synthesized (streamed or prefetched), by cache key: later callers wait for the
+# WAV instead of synthesizing it again. Resolved to None if the synthesis did not complete.
+_in_flight: dict[str, asyncio.Future] = {}
+
+
+def _claim(key: str) -> asyncio.Future | None:
+    """Registers the caller as the one synthesizing `key`, None if someone already is."""
+    if key in _in_flight:
+        return None
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    return future
+
+
+def _release(key: str, future: asyncio.Future, wav: bytes | None):
+    _in_flight.pop(key, None)
+    if not future.done():
+        future.set_result(wav)
+
+
+async def _wait_in_flight(key: str) -> bytes | None:
+    pending = _in_flight.get(key)
+    return await asyncio.shield(pending) if pending is not None else None
+
+
+async def cached_speech(text: str) -> bytes | None:
+    """
+    The complete WAV of `text` if it is cached (memory, then disk off the event loop) or being
+    synthesized by another request (waited for), None otherwise.
+    """
+    outcome = "hit"
+    wav = phrase_cache.peek(text)
+    if wav is None and normalize(text) in _in_flight:
+        outcome = "wait"
+        wav = await _wait_in_flight(normalize(text))
+    if wav is None:
+        outcome = "hit"
+        wav = await asyncio.to_thread(phrase_cache.get, text)
+    TTS_REQUESTS.labels(outcome if wav is not None else "miss").inc()
+    return wav
+
+
+async def stream_speech(text: str) -> AsyncIterator[bytes]:
+    """
+    Streams a WAV (open-ended header, then PCM chunks) while `text` is synthesized. Once the
+    whole phrase went through, it is cached so that the next request is a hit. If the phrase
+    is already being synthesized elsewhere, its complete WAV is sent once ready instead.
+    """
+    key = normalize(text)
+    wav = await _wait_in_flight(key)
+    if wav is not None:
+        yield wav
+        return
+    future = _claim(key)
+    start = time.perf_counter()
+    chunks = []
+    try:
+        async for chunk in synthesizer.stream(text):
+            if not chunks:
+                TTS_FIRST_CHUNK_LATENCY.observe(time.perf_counter() - start)
+                yield wav_header(synthesizer.sample_rate)
+            chunks.append(chunk)
+            yield chunk
+        TTS_SYNTHESIS_LATENCY.labels("stream").observe(time.perf_counter() - start)
+        wav = await asyncio.to_thread(phrase_cache.put, text, b"".join(chunks))
+    finally:
+        if future is not None:
+            _release(key, future, wav)
+
+
+_prefetch_tasks: set[asyncio.Task] = set()
+
+
+def prefetch(text: str):
+    """Renders `text` into the cache in the background (e.g. a generated question, before the front asks for it)."""
+    if not text.strip() or len(text) > TTS_MAX_CHARS or phrase_cache.peek(text) is not None:
+        return
+    key = normalize(text)
+    future = _claim(key)
+    if future is None:
+        return
+    task = asyncio.get_running_loop().create_task(_prefetch(text, key, future))
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_done)
+
+
+async def _prefetch(text: str, key: str, future: asyncio.Future):
+    wav = None
+    try:
+        # Reads the disk cache, or synthesizes, in a worker thread
+        wav = await asyncio.to_thread(phrase_cache.render, text)
+    finally:
+        _release(key, future, wav)
+
+
+def _prefetch_done(task: asyncio.Task):
+    _prefetch_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("TTS prefetch failed: %s", task.exception())
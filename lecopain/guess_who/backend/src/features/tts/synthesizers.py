@@ -0,0 +1,171 @@
+# src/features/tts/synthesizers.py
+import asyncio
+import logging
+import math
+import shutil
+import struct
+import subprocess
+import zlib
+from typing import AsyncIterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_BYTES = 4096
+# Size fields of a WAV whose length is not known yet (streamed); players read until the end
+WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def wav_header(sample_rate: int, data_bytes: int | None = None) -> bytes:
+    """44-byte header of a 16-bit mono PCM WAV. Without `data_bytes`, sizes are left open for streaming."""
+    riff_size = WAV_UNKNOWN_SIZE if data_bytes is None else 36 + data_bytes
+    data_size = WAV_UNKNOWN_SIZE if data_bytes is None else data_bytes
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data_size,
+    )
+
+
+def _parse_wav_header(data: bytes) -> tuple[int, int] | None:
+    """(sample rate, offset of the PCM data) of a WAV prefix, None if the data chunk is not reached yet."""
+    if len(data) < 12:
+        return None
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Synthesizer output is not a WAV stream")
+    offset, sample_rate = 12, None
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, offset)
+        if chunk_id == b"data":
+            if sample_rate is None:
+                raise ValueError("WAV data chunk before its fmt chunk")
+            return sample_rate, offset + 8
+        if offset + 8 + size > len(data):
+            return None
+        if chunk_id == b"fmt ":
+            sample_rate = struct.unpack_from("<I", data, offset + 12)[0]
+        offset += 8 + size + (size & 1)
+    return None
+
+
+class Synthesizer:
+    """
+    Text to 16-bit mono PCM. `synthesize` renders a whole phrase (blocking, used to fill the
+    cache); `stream` yields PCM chunks as soon as they are produced (novel phrases).
+    """
+    name = "base"
+    sample_rate = 22050
+
+    @property
+    def cache_namespace(self) -> str:
+        """Changes whenever the same text would sound different (engine, voice, speed)."""
+        return self.name
+
+    def synthesize(self, text: str) -> bytes:
+        raise NotImplementedError
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        yield await asyncio.to_thread(self.synthesize, text)
+
+
+class EspeakSynthesizer(Synthesizer):
+    """Local offline TTS through the espeak-ng (or espeak) command line, one process per phrase."""
+    name = "espeak"
+
+    def __init__(self, executable: str, voice: str = "en", words_per_minute: int = 160):
+        self.executable = executable
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+        self.sample_rate = 22050  # read from the stream header, espeak-ng's fixed rate
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.name}-{self.voice}-{self.words_per_minute}"
+
+    def _command(self, text: str) -> list[str]:
+        # "--" so that a phrase starting with "-" is not read as an option
+        return [self.executable, "--stdout", "-v", self.voice, "-s", str(self.words_per_minute), "--", text]
+
+    def synthesize(self, text: str) -> bytes:
+        output = subprocess.run(self._command(text), capture_output=True, check=True).stdout
+        header = _parse_wav_header(output)
+        if header is None:
+            raise ValueError("Truncated WAV from espeak")
+        self.sample_rate, offset = header
+        return output[offset:]
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        process = await asyncio.create_subprocess_exec(
+            *self._command(text), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            prefix = b""
+            header = None
+            while header is None:
+                chunk = await process.stdout.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    raise ValueError("espeak exited before writing audio")
+                prefix += chunk
+                header = _parse_wav_header(prefix)
+            self.sample_rate, offset = header
+            if len(prefix) > offset:
+                yield prefix[offset:]
+            while chunk := await process.stdout.read(STREAM_CHUNK_BYTES):
+                yield chunk
+            if await process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, self.executable)
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+
+class ToneSynthesizer(Synthesizer):
+    """
+    Dependency-free stand-in for machines without a TTS engine (development, CI): each word
+    becomes a short tone whose pitch depends on the word, so phrases keep their rhythm and
+    distinct phrases sound distinct.
+    """
+    name = "tone"
+    sample_rate = 16000
+
+    SECONDS_PER_CHAR = 0.06
+    GAP_S = 0.05
+
+    def _word(self, word: str) -> np.ndarray:
+        duration = max(0.12, self.SECONDS_PER_CHAR * len(word))
+        t = np.arange(int(duration * self.sample_rate)) / self.sample_rate
+        pitch = 140 + zlib.crc32(word.lower().encode()) % 160
+        envelope = np.sin(np.pi * t / duration) ** 2
+        tone = 0.3 * envelope * (np.sin(2 * math.pi * pitch * t) + 0.3 * np.sin(4 * math.pi * pitch * t))
+        gap = np.zeros(int(self.GAP_S * self.sample_rate))
+        return np.concatenate([tone, gap])
+
+    def _pcm(self, samples: np.ndarray) -> bytes:
+        return (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+    def synthesize(self, text: str) -> bytes:
+        words = text.split() or [""]
+        return self._pcm(np.concatenate([self._word(word) for word in words]))
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        for word in text.split() or [""]:
+            yield self._pcm(self._word(word))
+            await asyncio.sleep(0)
+
+
+def make_synthesizer(backend: str, voice: str, words_per_minute: int) -> Synthesizer:
+    """`backend`: "espeak", "tone", or "auto" (espeak when installed, the tone stand-in otherwise)."""
+    if backend in ("espeak", "auto"):
+        executable = shutil.which("espeak-ng") or shutil.which("espeak")
+        if executable is not None:
+            return EspeakSynthesizer(executable, voice, words_per_minute)
+        if backend == "espeak":
+            raise RuntimeError("TTS_BACKEND=espeak but neither espeak-ng nor espeak is installed.")
+        logger.warning("No espeak-ng found, using the tone stand-in for TTS (install espeak-ng for speech).")
+        return ToneSynthesizer()
+    if backend == "tone":
+        return ToneSynthesizer()
+    raise ValueError(f"Unknown TTS backend '{backend}' (use espeak, tone or auto).")
@@ -1,11 +1,11 @@
 # src/main.py
 import logging
-import os
-# Remove unused numpy/subprocess if not needed elsewhere
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-# Keep Whisper model loading if still needed for STT
-from faster_whisper import WhisperModel
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 # --- Configuration (Keep existing logging setup) ---
 try:
@@ -15,25 +15,30 @@ except ImportError:
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     logger = logging.getLogger(__name__)
 
+from src.core.admission import admission_status
+from src.core.executors import shutdown_executors
+from src.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, counter, histogram, metrics_registry
+from src.core.registry import model_registry
+from src.core.tracing import TRACE_DIR, TRACE_ID_HEADER, tracing_middleware
 
 # --- Locate ffmpeg (Keep if STT feature is used) ---
-FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
-logger.info(f"Using ffmpeg command: '{FFMPEG_PATH}'") # Only relevant if STT is active
-
-# --- Load the Faster Whisper model (Keep if STT feature is used) ---
-MODEL_NAME = os.getenv("WHISPER_MODEL", "ctranslate2-4you/whisper-base.en-ct2-int8_bfloat16")
-DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
-logger.info(f"Loading Faster Whisper model '{MODEL_NAME}' on device '{DEVICE}'...")
-model = None # Initialize model as None
-try:
-    model = WhisperModel(MODEL_NAME, device=DEVICE, compute_type="int8")
-    logger.info("Faster Whisper model loaded successfully.")
-except Exception as model_load_err:
-     logger.exception(f"CRITICAL ERROR: Failed to load Faster Whisper model '{MODEL_NAME}': {model_load_err}")
+from src.features.stt.decoding import FFMPEG_PATH
+logger.info("Using ffmpeg command: '%s'", FFMPEG_PATH) # Only relevant if STT is active
+
+
+# --- Model loading ---
+# Heavy models (Faster Whisper, TTS phrases) and dependencies (Mistral SDK, robot stack) are registered by
+# their feature modules and loaded in the background once the server is up, see src/core/registry.py.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_registry.start()
+    yield
+    await model_registry.shutdown()
+    shutdown_executors()
 
 
 # --- FastAPI and CORS configuration ---
-app = FastAPI(title="AI Services API") # Already English
+app = FastAPI(title="AI Services API", lifespan=lifespan) # Already English
 
 origins = [
     "http://localhost",
@@ -47,65 +52,106 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the front read the trace id of a request (see src/core/tracing.py)
+    expose_headers=[TRACE_ID_HEADER],
 )
 
+# --- Request metrics ---
+HTTP_REQUESTS = counter("http_requests", "HTTP requests handled.", ["method", "route", "status"])
+HTTP_LATENCY = histogram("http_request_duration_seconds", "HTTP request latency (until the response starts).", ["method", "route"])
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The route template (not the raw path) keeps the label set bounded
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_LATENCY.labels(request.method, route_path).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(request.method, route_path, status).inc()
+
+
+# Spans of each request under its game id (X-Game-Id), see src/core/tracing.py
+app.middleware("http")(tracing_middleware)
+if TRACE_DIR:
+    logger.info("Writing request traces to '%s'", TRACE_DIR)
+
+
 # --- Include Routers ---
 
 from src.features.stt.router import router as stt_router
+from src.features.stt.services import MODEL_NAME as WHISPER_MODEL_NAME, DEVICE as WHISPER_DEVICE, WHISPER_REGISTRY_KEY
 from src.features.guess_who.router import router as guess_who_router
+from src.features.tts.router import router as tts_router
+from src.features.tts.services import TTS_REGISTRY_KEY, synthesizer as tts_synthesizer
+from src.features.camera.router import router as camera_router
 app.include_router(stt_router, prefix="/api/stt", tags=["Speech-to-Text"]) # Tag already English
 app.include_router(guess_who_router, prefix="/api/guess_who", tags=["Guess Who AI"])
+app.include_router(tts_router, prefix="/api/tts", tags=["Text-to-Speech"])
+app.include_router(camera_router, prefix="/api/camera", tags=["Camera"])
 
 
 # --- Health Check / Root Endpoint ---
+def _guess_who_client_available() -> bool:
+    from src.features.guess_who.services import llm_client_available
+    return llm_client_available()
+
+
 @app.get("/", tags=["Health Check"]) # Tag already English
 async def read_root():
     services_status = {
-        "stt_model_loaded": model is not None,
-        "guess_who_llm_available": 'mistral_client' in locals() and mistral_client is not None
+        "stt_model_loaded": model_registry.peek(WHISPER_REGISTRY_KEY) is not None,
+        "guess_who_llm_available": _guess_who_client_available(),
+        "tts_phrases_ready": model_registry.peek(TTS_REGISTRY_KEY) is not None,
     }
     return {"message": "AI Services API is running.", "services": services_status}
 
+
+@app.get("/health/live", tags=["Health Check"])
+async def liveness():
+    """The process is up and serving requests (models may still be loading)."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health Check"])
+async def readiness():
+    """Every registered model is loaded and warmed up; 503 until then."""
+    body = {"ready": model_registry.ready, "models": model_registry.status()}
+    return JSONResponse(status_code=200 if model_registry.ready else 503, content=body)
+
+
+@app.get("/admission", tags=["Monitoring"])
+async def admission():
+    """Slots in use, queued requests and rejections per limited resource (llm, stt, robot)."""
+    return admission_status()
+
+
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of the backend metrics."""
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # --- Uvicorn Startup (if running directly) ---
 if __name__ == "__main__":
-    # Check needs the variable in scope
-    guess_who_client_available = False
-    if 'src.features.guess_who.services' in sys.modules:
-         from src.features.guess_who.services import mistral_client
-         guess_who_client_available = mistral_client is not None
-
-    if not guess_who_client_available:
-         print("\n!!! WARNING: Mistral client failed to initialize. Guess Who API will not work. Check logs and MISTRAL_API_KEY. !!!\n")
-    if not model:
-        print("\n!!! WARNING: Faster Whisper model failed to load. STT API might not function correctly. Check logs. !!!\n")
-
-    print("\n--- AI Services API Ready ---")
-    if guess_who_client_available:
-        # This uses MODEL_NAME which is read from the environment variable
-        # Import needed variable if check passed
-        from src.features.guess_who.services import MODEL_NAME as GUESS_WHO_MODEL_NAME # Alias to avoid conflict if stt uses same env var
-        # Translated print statements
+    from src.features.guess_who.services import MISTRAL_API_KEY
+    if not MISTRAL_API_KEY:
+         print("\n!!! WARNING: MISTRAL_API_KEY is not set. Guess Who API will not work. !!!\n")
+    else:
+        from src.features.guess_who.services import MODEL_NAME as GUESS_WHO_MODEL_NAME # Alias to avoid conflict with the Whisper model name
         print(f"Guess Who LLM Model: {GUESS_WHO_MODEL_NAME}")
         print(f"Guess Who API Endpoints available under /api/guess_who")
-    if model:
-         # This uses MODEL_NAME which is read from the environment variable
-        # Alias WHISPER_MODEL_NAME if needed, but it's defined earlier
-        # Translated print statements
-        print(f"Faster Whisper Model: {MODEL_NAME} (Device: {DEVICE})") # Assuming MODEL_NAME refers to whisper here
-        print(f"STT API Endpoint available at /api/stt/transcribe (POST)")
-    # Translated print statement
+
+    print(f"Faster Whisper Model: {WHISPER_MODEL_NAME} (Device: {WHISPER_DEVICE}), loaded in the background at startup")
+    print(f"STT API Endpoint available at /api/stt/transcribe (POST)")
+    print(f"TTS ({tts_synthesizer.cache_namespace}) available at /api/tts/speak, fixed phrases pre-rendered at startup")
+    print(f"Live camera preview at /api/camera/preview.mjpg (published by the robot's control loop)")
+    print(f"Readiness probe at /health/ready, liveness probe at /health/live")
+    print(f"Prometheus metrics at /metrics, admission queues at /admission")
     print(f"Allowed Origins: {origins}")
     print("\nRun with: uvicorn src.main:app --host 0.0.0.0 --port 8000 --reload\n")
-else: # Added else block for clarity when main.py is imported
-    guess_who_client_available = False
-    try:
-        # Attempt import safely during module load
-        import sys
-        if 'src.features.guess_who.services' in sys.modules:
-            from src.features.guess_who.services import mistral_client
-            guess_who_client_available = mistral_client is not None
-        elif 'mistral_client' in globals(): # Fallback check if imported differently
-             guess_who_client_available = mistral_client is not None
-
-    except ImportError:
-         logger.warning("Could not check mistral_client status during import.")
\ No newline at end of file
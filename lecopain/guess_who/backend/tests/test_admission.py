@@ -0,0 +1,93 @@
+"""
+AdmissionController: queueing, 429 / 503 rejections and their Retry-After hint.
+Run from lecopain/guess_who/backend:
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.admission import AdmissionController
+
+
+async def _hold(controller: AdmissionController, release: asyncio.Event):
+    async with controller.slot():
+        await release.wait()
+
+
+def test_queue_full_is_429_with_retry_after():
+    async def scenario():
+        controller = AdmissionController("test_queue_full", max_concurrent=1, max_queue=1, max_wait_s=5)
+        controller._mean_hold_s = 4.0
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, release))
+        waiter = asyncio.create_task(_hold(controller, release))
+        await asyncio.sleep(0.01)
+        assert (controller.in_flight, controller.waiting) == (1, 1)
+
+        with pytest.raises(HTTPException) as rejected:
+            async with controller.slot():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return controller, rejected.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.status_code == 429
+    # One running and one queued ahead of it, on one slot held 4 s on average
+    assert error.headers["Retry-After"] == "8"
+    assert controller.rejected == {"queue_full": 1, "timeout": 0}
+    assert controller.admitted == 2
+    assert controller.in_flight == 0
+
+
+def test_wait_timeout_is_503():
+    async def scenario():
+        controller = AdmissionController("test_timeout", max_concurrent=1, max_queue=1, max_wait_s=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as rejected:
+            async with controller.slot():
+                pass
+        release.set()
+        await holder
+        return controller, rejected.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert int(error.headers["Retry-After"]) >= 1
+    assert controller.rejected == {"queue_full": 0, "timeout": 1}
+    assert (controller.in_flight, controller.waiting) == (0, 0)
+
+
+def test_slot_is_handed_over_in_order():
+    async def scenario():
+        controller = AdmissionController("test_fifo", max_concurrent=1, max_queue=3, max_wait_s=5)
+        order = []
+
+        async def worker(name: str):
+            async with controller.slot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(worker(name) for name in "abc"))
+        return controller, order
+
+    controller, order = asyncio.run(scenario())
+    assert order == ["a", "b", "c"]
+    assert controller.in_flight == 0
+    assert controller.status()["mean_hold_s"] > 0
+
+
+def test_try_slot_never_waits():
+    async def scenario():
+        controller = AdmissionController("test_try_slot", max_concurrent=1, max_queue=1, max_wait_s=5)
+        async with controller.try_slot() as first:
+            async with controller.try_slot() as second:
+                return first, second, controller
+
+    first, second, controller = asyncio.run(scenario())
+    assert (first, second) == (True, False)
+    assert controller.in_flight == 0
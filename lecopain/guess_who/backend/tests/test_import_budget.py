@@ -0,0 +1,29 @@
+"""
+`import src.main` stays fast and never loads the robot stack (see benchmarks/import_budget.py
+for the per-module report). Run from lecopain/guess_who/backend:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from benchmarks.import_budget import FORBIDDEN_MODULES, measure
+
+# Slower CI machines can raise it, e.g. IMPORT_BUDGET_S=2
+IMPORT_BUDGET_S = float(os.getenv("IMPORT_BUDGET_S", "1.0"))
+
+
+@pytest.fixture(scope="module")
+def import_result() -> dict:
+    return measure(repeat=3)
+
+
+def test_import_does_not_load_robot_stack(import_result):
+    assert import_result["forbidden"] == [], (
+        f"importing src.main loaded {import_result['forbidden']} (never: {', '.join(FORBIDDEN_MODULES)})"
+    )
+
+
+def test_import_time_within_budget(import_result):
+    import_s = import_result["import_s"]
+    assert import_s <= IMPORT_BUDGET_S, f"import src.main took {import_s * 1000:.0f} ms (budget {IMPORT_BUDGET_S * 1000:.0f} ms)"
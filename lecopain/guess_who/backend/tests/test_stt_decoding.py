@@ -0,0 +1,59 @@
+"""
+decode_stream upload limits: empty uploads are a 400, oversized uploads and audio over
+the duration limit are a 413.
+Run from lecopain/guess_who/backend:
+    python -m pytest tests
+"""
+import asyncio
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import HTTPException
+
+from src.features.stt.audio import SAMPLE_RATE
+from src.features.stt.decoding import decode_stream, single_chunk
+
+
+def _wav(seconds: float, sample_rate: int = SAMPLE_RATE) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(int(seconds * sample_rate), dtype=np.float32), sample_rate, format="WAV")
+    return buffer.getvalue()
+
+
+async def _chunked(data: bytes, size: int = 1000):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _decode(chunks, **limits) -> np.ndarray:
+    return asyncio.run(decode_stream(chunks, **limits))
+
+
+def test_wav_is_decoded_in_chunks():
+    audio = _decode(_chunked(_wav(1.0, sample_rate=8000)))
+    assert audio.dtype == np.float32
+    assert audio.shape == (SAMPLE_RATE,)
+
+
+@pytest.mark.parametrize("chunks", [single_chunk(b""), _chunked(b"")])
+def test_empty_upload_is_400(chunks):
+    with pytest.raises(HTTPException) as error:
+        _decode(chunks)
+    assert error.value.status_code == 400
+
+
+def test_upload_over_byte_limit_is_413():
+    data = _wav(1.0)
+    with pytest.raises(HTTPException) as error:
+        _decode(_chunked(data), max_bytes=len(data) - 1)
+    assert error.value.status_code == 413
+    assert "bytes limit" in error.value.detail
+
+
+def test_audio_over_duration_limit_is_413():
+    with pytest.raises(HTTPException) as error:
+        _decode(single_chunk(_wav(3.0)), max_seconds=2)
+    assert error.value.status_code == 413
+    assert "longer than the 2s limit" in error.value.detail
@@ -0,0 +1,103 @@
+"""
+TranscriptionScheduler batching with a fake Whisper model: concurrent requests share one
+BatchedInferencePipeline call and each one gets its own text back.
+Run from lecopain/guess_who/backend:
+    python -m pytest tests
+"""
+import asyncio
+from types import SimpleNamespace
+
+import faster_whisper
+import numpy as np
+import pytest
+
+from src.features.stt.audio import SAMPLE_RATE
+from src.features.stt.scheduler import TranscriptionScheduler
+
+
+def _clip(word_id: int, seconds: float = 1.0) -> np.ndarray:
+    # The fake models "recognise" a clip by its constant sample value
+    return np.full(int(seconds * SAMPLE_RATE), word_id, dtype=np.float32)
+
+
+def _text(samples: np.ndarray) -> str:
+    return f"word {int(samples[0])}"
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return [SimpleNamespace(text=_text(audio), start=0.0)], None
+
+
+class FakeBatchedPipeline:
+    batch_sizes: list[int] = []
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, clip_timestamps, batch_size, **options):
+        FakeBatchedPipeline.batch_sizes.append(batch_size)
+        segments = []
+        # Out of order, to check the mapping relies on start times only
+        for clip in reversed(clip_timestamps):
+            samples = audio[int(clip["start"] * SAMPLE_RATE):int(clip["end"] * SAMPLE_RATE)]
+            segments.append(SimpleNamespace(text=f" {_text(samples)} ", start=clip["start"] + 0.2))
+        return segments, None
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    FakeBatchedPipeline.batch_sizes = []
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", FakeBatchedPipeline)
+    scheduler = TranscriptionScheduler(
+        model_factory=lambda threads: FakeModel(),
+        replicas=1,
+        threads_per_replica=1,
+        max_batch_size=8,
+        batch_window_ms=50,
+    )
+    scheduler.load()
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_concurrent_requests_are_batched_and_mapped_back(scheduler):
+    async def scenario():
+        return await asyncio.gather(*(scheduler.transcribe(_clip(i)) for i in range(1, 5)))
+
+    texts = asyncio.run(scenario())
+    assert texts == ["word 1", "word 2", "word 3", "word 4"]
+    assert FakeBatchedPipeline.batch_sizes == [4]
+    stats = scheduler.stats()
+    assert stats["requests"] == 4
+    assert stats["batches"] == 1
+    assert stats["avg_batch_size"] == 4.0
+
+
+def test_lone_and_long_clips_skip_the_batched_pipeline(scheduler):
+    async def scenario():
+        return await asyncio.gather(
+            scheduler.transcribe(_clip(7, seconds=31)),
+            scheduler.transcribe(_clip(8), beam_size=1),
+        )
+
+    texts = asyncio.run(scenario())
+    assert texts == ["word 7", "word 8"]
+    assert FakeBatchedPipeline.batch_sizes == []
+    assert scheduler.replicas[0].calls == 2
+    assert scheduler.stats()["batches"] == 0
+
+
+def test_batch_size_is_capped(scheduler):
+    scheduler.max_batch_size = 3
+
+    async def scenario():
+        return await asyncio.gather(*(scheduler.transcribe(_clip(i)) for i in range(1, 6)))
+
+    texts = asyncio.run(scenario())
+    assert texts == [f"word {i}" for i in range(1, 6)]
+    assert FakeBatchedPipeline.batch_sizes == [3, 2]
@@ -1,39 +1,117 @@
 """
-The following script was used to fix a datasets during data collection when there was 
+The following script was used to fix a datasets during data collection when there was
 an offset in the grid position. The grid position was not being set correctly in the dataset,
-so we need to fix it by iterating through the dataset and setting the grid position based on the episode index.
+so we need to fix it by setting the grid position based on the episode index.
+
+Episodes are assumed to be recorded cell after cell, left-to-right and top-to-bottom,
+wrapping around the grid for each new sweep. The mapping can be adjusted with:
+  --start-cell   position of the first episode in that sequence
+  --repeat       episodes that re-recorded the cell of the previous episode
+  --skip         sequence positions (sweep * 24 + cell) for which no episode was recorded
+
+Only the `episode_index` column is read, the new `grid_position` column is computed with
+NumPy and written back with a single batched map. e.g. the original fix was:
+    python fix_dataset.py --repo-id <user-id>/<repo-id> --repeat 45
 """
 
-from lerobot.common.datasets.lerobot_dataset import LeRobotDataset
-import torch
+import argparse
+
 import numpy as np
 
 NUM_COLS = 8
 NUM_ROWS = 3
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recompute the grid_position column of a LeRobot dataset")
+    parser.add_argument("--repo-id", required=True, help="Dataset repo id, e.g. <user-id>/<repo-id>")
+    parser.add_argument("--root", default=None, help="Local dataset root (defaults to the LeRobot cache)")
+    parser.add_argument("--start-cell", type=int, default=0, help="Sequence position of the first episode")
+    parser.add_argument("--repeat", type=int, nargs="*", default=[], help="Episodes recorded again on the previous cell")
+    parser.add_argument("--skip", type=int, nargs="*", default=[], help="Sequence positions without an episode")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the validation report")
+    return parser.parse_args()
+
+
+def episode_cells(episodes: np.ndarray, start_cell: int = 0, repeat=(), skip=()) -> np.ndarray:
+    """
+    Returns the grid cell index (row * NUM_COLS + col) of each episode in `episodes` (sorted).
+    """
+    # Each new episode moves one step along the sequence, except for repeated ones
+    step = np.ones(len(episodes), dtype=np.int64)
+    step[0] = 0
+    step[np.isin(episodes, repeat)] = 0
+    positions = np.cumsum(step)
+    # Map the n-th visited position to the n-th position that was not skipped
+    available = np.setdiff1d(np.arange(start_cell, start_cell + positions[-1] + len(skip) + 1), skip)
+    return available[positions] % (NUM_ROWS * NUM_COLS)
+
+
+def compute_grid_positions(episode_index: np.ndarray, **mapping) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized (row, col) per frame from the per-frame episode index."""
+    episodes = np.unique(episode_index)
+    cells = episode_cells(episodes, **mapping)
+    frame_cells = cells[np.searchsorted(episodes, episode_index)]
+    grid = np.stack([frame_cells // NUM_COLS, frame_cells % NUM_COLS], axis=1)
+    return grid, episodes, cells
+
+
+def report(episode_index: np.ndarray, grid: np.ndarray, episodes: np.ndarray, cells: np.ndarray, previous: np.ndarray | None):
+    """Prints per-cell coverage and sanity checks of the relabeled column."""
+    frame_cells = grid[:, 0] * NUM_COLS + grid[:, 1]
+    episodes_per_cell = np.bincount(cells, minlength=NUM_ROWS * NUM_COLS)
+    frames_per_cell = np.bincount(frame_cells, minlength=NUM_ROWS * NUM_COLS)
+
+    print(f"{len(episode_index)} frames, {len(episodes)} episodes")
+    print("episodes per cell:")
+    print(episodes_per_cell.reshape(NUM_ROWS, NUM_COLS))
+    print("frames per cell:")
+    print(frames_per_cell.reshape(NUM_ROWS, NUM_COLS))
+
+    # Relabeling is per episode: frames of an episode must be contiguous
+    assert np.all(np.diff(episode_index) >= 0), "Frames are not ordered by episode."
+
+    empty = np.flatnonzero(episodes_per_cell == 0)
+    if empty.size:
+        print(f"WARNING: cells without any episode: {[(c // NUM_COLS, c % NUM_COLS) for c in empty]}")
+    if previous is not None:
+        changed = np.any(previous != grid, axis=1)
+        changed_episodes = np.unique(episode_index[changed])
+        print(f"{changed.sum()} frames in {len(changed_episodes)} episodes changed: {changed_episodes.tolist()}")
+
+
 if __name__ == "__main__":
-    dataset = LeRobotDataset(
-        repo_id="<user-id>/<repo-id>",
-    )
+    from lerobot.common.datasets.lerobot_dataset import LeRobotDataset
+
+    args = parse_args()
+    dataset = LeRobotDataset(repo_id=args.repo_id, root=args.root)
     hf_dataset = dataset.hf_dataset
-    grid_pos = [""] * len(dataset)
-
-    current_episode = -1
-    idx = 0
-    current_grid = (0, 0)
-    for i, item in enumerate(hf_dataset):
-        episode_id = item["episode_index"].item()
-        if episode_id != current_episode:
-            current_episode = episode_id
-            if current_episode == 45:
-                idx -= 1
-            current_grid= [(idx // NUM_COLS) % NUM_ROWS, idx % NUM_COLS]
-            idx += 1
-        grid_pos[i] = np.array(current_grid)
-
-    hf_dataset = hf_dataset.remove_columns(['grid_position'])
-    hf_dataset = hf_dataset.add_column('grid_position', grid_pos)
-
-    dataset.hf_dataset = hf_dataset
-    dataset.save_modified_dataset()
-    
-    
\ No newline at end of file
+
+    # Columnar reads: no frame (and no image) is decoded
+    table = hf_dataset.data
+    episode_index = table.column("episode_index").to_numpy()
+    previous = None
+    if "grid_position" in hf_dataset.column_names:
+        previous = np.stack(table.column("grid_position").to_numpy(zero_copy_only=False)).astype(np.int64)
+
+    grid, episodes, cells = compute_grid_positions(
+        episode_index, start_cell=args.start_cell, repeat=args.repeat, skip=args.skip
+    )
+    report(episode_index, grid, episodes, cells, previous)
+
+    if not args.dry_run:
+        # Keep the feature type of the existing column, only its values change
+        features = hf_dataset.features.copy() if previous is not None else None
+        if previous is not None:
+            hf_dataset = hf_dataset.remove_columns(["grid_position"])
+        hf_dataset = hf_dataset.map(
+            lambda _, indices: {"grid_position": grid[indices]},
+            batched=True,
+            batch_size=100_000,
+            with_indices=True,
+            input_columns=["episode_index"],
+            features=features,
+        )
+
+        dataset.hf_dataset = hf_dataset
+        dataset.save_modified_dataset()
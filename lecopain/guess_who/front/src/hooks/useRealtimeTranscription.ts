@@ -1,5 +1,6 @@
 // src/hooks/useRealtimeTranscription.ts (MODIFIED FOR HTTP POST)
 import { useState, useRef, useEffect, useCallback } from "react";
+import { gameHeaders } from "../services/apiService";
 
 // --- Constantes ---
 // L'URL du WebSocket n'est plus nécessaire
@@ -152,6 +153,7 @@ export function useRealtimeTranscription(): UseRealtimeTranscriptionReturn {
                     const response = await fetch(API_ENDPOINT, {
                         method: 'POST',
                         body: formData,
+                        headers: gameHeaders(),
                     });
 
                     if (!response.ok) {
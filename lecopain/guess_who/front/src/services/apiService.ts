@@ -6,6 +6,11 @@ import {
   } from '../types/api';
   
   const API_BASE_URL = "http://localhost:8000/api/guess_who"; // Or your full base URL
+
+  // --- Game id: links the requests of one game in the backend traces ---
+  let gameId = crypto.randomUUID();
+
+  export const gameHeaders = (): Record<string, string> => ({ 'X-Game-Id': gameId });
   
   // --- Helper for Fetch ---
   async function fetchApi<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
@@ -16,6 +21,7 @@ import {
         headers: {
           'Content-Type': 'application/json',
           'Accept': 'application/json',
+          ...gameHeaders(),
           ...(options.headers || {}),
         },
       });
@@ -50,6 +56,7 @@ import {
   
   
   export const apiSelectAnimal = (): Promise<SelectAnimalResponse> => {
+    gameId = crypto.randomUUID(); // A new game starts
     return fetchApi<SelectAnimalResponse>('/select_animal', { method: 'POST' });
   };
   
@@ -89,6 +96,7 @@ import {
           const response = await fetch("http://localhost:8000/api/stt/transcribe", { // Use full URL here
               method: 'POST',
               body: formData,
+              headers: gameHeaders(),
               // No 'Content-Type' header needed for FormData, browser sets it with boundary
           });
   
@@ -0,0 +1,169 @@
+"""
+Grid-cell index of a guess_who dataset and a cell-balanced sampler for training the
+grid-conditioned ACT policy.
+
+The index has one row per episode: its grid cell and its [frame_from, frame_to) range.
+It is built once from the `episode_index` and `grid_position` columns (no frame is decoded)
+and saved as a structured .npy in the dataset's meta folder. It is loaded with
+`mmap_mode="r"`, so every data loader worker reads the same pages instead of a copy.
+
+Build (and print per-cell coverage):
+    python grid_index.py --repo-id <user-id>/<repo-id>
+
+Train with balanced cells:
+    sampler = GridBalancedSampler(grid_index_path(dataset.root), batch_size=cfg.batch_size)
+    dataloader = torch.utils.data.DataLoader(dataset, batch_size=cfg.batch_size, sampler=sampler, ...)
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+from torch.utils.data import Sampler
+
+NUM_COLS = 8
+NUM_ROWS = 3
+NUM_CELLS = NUM_ROWS * NUM_COLS
+
+GRID_INDEX_FILE = "meta/grid_index.npy"
+GRID_INDEX_DTYPE = np.dtype([
+    ("episode", np.int64),
+    ("cell", np.int64),
+    ("frame_from", np.int64),
+    ("frame_to", np.int64),
+])
+
+
+def grid_index_path(root) -> Path:
+    return Path(root) / GRID_INDEX_FILE
+
+
+def build_grid_index(episode_index: np.ndarray, grid_position: np.ndarray) -> np.ndarray:
+    """
+    Builds the per-episode index from the per-frame `episode_index` and (row, col) `grid_position` columns.
+    Frames must be ordered by episode, which is how LeRobot datasets are written.
+    """
+    if np.any(np.diff(episode_index) < 0):
+        raise ValueError("Frames are not ordered by episode.")
+    frame_from = np.flatnonzero(np.diff(episode_index, prepend=episode_index[0] - 1))
+    frame_to = np.append(frame_from[1:], len(episode_index))
+
+    grid = np.asarray(grid_position, dtype=np.int64)
+    frame_cells = grid[:, 0] * NUM_COLS + grid[:, 1]
+    cells = frame_cells[frame_from]
+    # Every frame of an episode must carry the episode's cell
+    if np.any(frame_cells != np.repeat(cells, frame_to - frame_from)):
+        raise ValueError("An episode spans several grid cells, fix the dataset first (see fix_dataset.py).")
+
+    index = np.empty(len(frame_from), dtype=GRID_INDEX_DTYPE)
+    index["episode"] = episode_index[frame_from]
+    index["cell"] = cells
+    index["frame_from"] = frame_from
+    index["frame_to"] = frame_to
+    return index
+
+
+def save_grid_index(index: np.ndarray, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, index)
+
+
+def load_grid_index(path) -> np.ndarray:
+    """Memory-maps a saved index: read-only and shared between processes."""
+    return np.load(path, mmap_mode="r")
+
+
+def frames_for_cell(index: np.ndarray, row: int, col: int) -> np.ndarray:
+    """All dataset frame indices recorded for grid cell (row, col)."""
+    episodes = index[index["cell"] == row * NUM_COLS + col]
+    if len(episodes) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate([np.arange(e["frame_from"], e["frame_to"]) for e in episodes])
+
+
+class GridBalancedSampler(Sampler):
+    """
+    Yields frame indices so that every batch holds (almost) the same number of samples per grid cell.
+
+    Cells are drawn from consecutive random permutations of the recorded cells, then an episode of
+    the cell uniformly, then a frame of the episode uniformly. Cells with fewer episodes are thus not
+    under-represented. Use it with the same `batch_size` and `shuffle=False` in the DataLoader.
+    """
+
+    def __init__(self, index_path, batch_size: int, num_samples: int | None = None, seed: int | None = None):
+        self.index_path = str(index_path)
+        self.batch_size = batch_size
+        self.seed = seed
+        self._index = None
+        index = self.index
+        self.num_samples = num_samples if num_samples is not None else int(index["frame_to"][-1])
+
+    @property
+    def index(self) -> np.ndarray:
+        # Loaded lazily so pickling the sampler for workers only carries the path
+        if self._index is None:
+            self._index = load_grid_index(self.index_path)
+        return self._index
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed)
+        index = self.index
+        # Episodes grouped by cell
+        order = np.argsort(index["cell"], kind="stable")
+        cells, cell_start, cell_count = np.unique(index["cell"][order], return_index=True, return_counts=True)
+
+        # Each batch is filled from fresh permutations of the cells: per-cell counts differ by at most one
+        permutations_per_batch = -(-self.batch_size // len(cells))
+        num_batches = -(-self.num_samples // self.batch_size)
+        cell_draws = np.concatenate([
+            np.concatenate([rng.permutation(len(cells)) for _ in range(permutations_per_batch)])[: self.batch_size]
+            for _ in range(num_batches)
+        ])[: self.num_samples]
+        episode_rows = order[cell_start[cell_draws] + rng.integers(0, cell_count[cell_draws])]
+        frame_from = index["frame_from"][episode_rows]
+        frame_to = index["frame_to"][episode_rows]
+        frames = frame_from + (rng.random(self.num_samples) * (frame_to - frame_from)).astype(np.int64)
+        yield from frames.tolist()
+
+
+def report(index: np.ndarray):
+    episodes_per_cell = np.bincount(index["cell"], minlength=NUM_CELLS)
+    frames_per_cell = np.bincount(index["cell"], weights=index["frame_to"] - index["frame_from"], minlength=NUM_CELLS)
+    print(f"{len(index)} episodes, {int(frames_per_cell.sum())} frames")
+    print("episodes per cell:")
+    print(episodes_per_cell.reshape(NUM_ROWS, NUM_COLS))
+    print("frames per cell:")
+    print(frames_per_cell.astype(np.int64).reshape(NUM_ROWS, NUM_COLS))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the grid-cell episode index of a LeRobot dataset")
+    parser.add_argument("--repo-id", required=True, help="Dataset repo id, e.g. <user-id>/<repo-id>")
+    parser.add_argument("--root", default=None, help="Local dataset root (defaults to the LeRobot cache)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from lerobot.common.datasets.lerobot_dataset import LeRobotDataset
+
+    args = parse_args()
+    dataset = LeRobotDataset(repo_id=args.repo_id, root=args.root)
+
+    table = dataset.hf_dataset.data
+    episode_index = table.column("episode_index").to_numpy()
+    grid_position = np.stack(table.column("grid_position").to_numpy(zero_copy_only=False))
+
+    index = build_grid_index(episode_index, grid_position)
+    path = grid_index_path(dataset.root)
+    save_grid_index(index, path)
+    report(index)
+    print(f"Saved grid index to {path}")
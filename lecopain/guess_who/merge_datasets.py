@@ -0,0 +1,177 @@
+"""
+Merges the per-cell datasets recorded by record() (`<repo_id>_0` ... `<repo_id>_23`) into one dataset.
+
+Files are merged as they are, nothing is decoded or re-encoded: episode parquet files get their
+`episode_index`, `index` and `task_index` columns rewritten, videos are hard-linked (or copied),
+and the meta files (info.json, episodes.jsonl, episodes_stats.jsonl, tasks.jsonl) are merged.
+Targets the LeRobot v2.1 dataset layout.
+
+With --set-grid, `grid_position` is (re)written from the source order: the i-th source is cell i
+(row i // 8, col i % 8), which is how record() named the per-cell datasets.
+
+    python merge_datasets.py --prefix <user-id>/<repo-id> --count 24 --output <user-id>/<repo-id>_merged --set-grid
+"""
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+NUM_COLS = 8
+NUM_ROWS = 3
+
+INFO_PATH = "meta/info.json"
+EPISODES_PATH = "meta/episodes.jsonl"
+EPISODES_STATS_PATH = "meta/episodes_stats.jsonl"
+TASKS_PATH = "meta/tasks.jsonl"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge LeRobot datasets into one")
+    parser.add_argument("--repo-ids", nargs="*", default=[], help="Source dataset repo ids, in order")
+    parser.add_argument("--prefix", help="Use <prefix>_0 ... <prefix>_{count - 1} as sources")
+    parser.add_argument("--count", type=int, default=NUM_ROWS * NUM_COLS)
+    parser.add_argument("--output", required=True, help="Repo id of the merged dataset")
+    parser.add_argument("--root-dir", default=None, help="Datasets directory (defaults to the LeRobot cache)")
+    parser.add_argument("--set-grid", action="store_true", help="Write grid_position from the source order")
+    return parser.parse_args()
+
+
+def read_jsonl(path: Path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_jsonl(path: Path, items: list[dict]):
+    with open(path, "w") as f:
+        for item in items:
+            f.write(json.dumps(item) + "\n")
+
+
+def column_stats(values: np.ndarray) -> dict:
+    """Per-dimension stats in the episodes_stats.jsonl format."""
+    values = values.reshape(len(values), -1).astype(np.float64)
+    return {
+        "min": values.min(axis=0).tolist(),
+        "max": values.max(axis=0).tolist(),
+        "mean": values.mean(axis=0).tolist(),
+        "std": values.std(axis=0).tolist(),
+        "count": [len(values)],
+    }
+
+
+def link_or_copy(src: Path, dst: Path):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def check_compatible(infos: list[dict], sources: list[Path]):
+    reference = infos[0]
+    for info, source in zip(infos[1:], sources[1:]):
+        if info["fps"] != reference["fps"]:
+            raise ValueError(f"{source} is recorded at {info['fps']} fps, {sources[0]} at {reference['fps']} fps.")
+        if info["features"].keys() != reference["features"].keys():
+            raise ValueError(f"{source} and {sources[0]} do not have the same features.")
+        for key, feature in info["features"].items():
+            if feature["dtype"] != reference["features"][key]["dtype"] or feature["shape"] != reference["features"][key]["shape"]:
+                raise ValueError(f"Feature '{key}' differs between {source} and {sources[0]}.")
+
+
+def merge(sources: list[Path], output: Path, set_grid: bool = False):
+    if output.exists():
+        raise FileExistsError(f"{output} already exists.")
+    infos = [json.loads((source / INFO_PATH).read_text()) for source in sources]
+    check_compatible(infos, sources)
+    info = dict(infos[0])
+    chunks_size = info["chunks_size"]
+    video_keys = [key for key, feature in info["features"].items() if feature["dtype"] == "video"]
+    if set_grid and "grid_position" not in info["features"]:
+        raise ValueError("The datasets have no grid_position feature.")
+
+    (output / "meta").mkdir(parents=True)
+    tasks: dict[str, int] = {}
+    episodes, episodes_stats = [], []
+    total_frames = 0
+
+    for source_number, (source, source_info) in enumerate(zip(sources, infos)):
+        # Task indices are remapped to the merged task list
+        task_map = {}
+        for task in read_jsonl(source / TASKS_PATH):
+            task_map[task["task_index"]] = tasks.setdefault(task["task"], len(tasks))
+        source_stats = {item["episode_index"]: item["stats"] for item in read_jsonl(source / EPISODES_STATS_PATH)}
+
+        for episode in sorted(read_jsonl(source / EPISODES_PATH), key=lambda e: e["episode_index"]):
+            old_index = episode["episode_index"]
+            new_index = len(episodes)
+            old_chunk, new_chunk = old_index // source_info["chunks_size"], new_index // chunks_size
+
+            table = pq.read_table(source / source_info["data_path"].format(episode_chunk=old_chunk, episode_index=old_index))
+            num_frames = table.num_rows
+            new_columns = {
+                "episode_index": np.full(num_frames, new_index, dtype=np.int64),
+                "index": np.arange(total_frames, total_frames + num_frames, dtype=np.int64),
+                "task_index": np.vectorize(task_map.get, otypes=[np.int64])(table.column("task_index").to_numpy()),
+            }
+            if set_grid:
+                cell = source_number % (NUM_ROWS * NUM_COLS)
+                new_columns["grid_position"] = np.tile([cell // NUM_COLS, cell % NUM_COLS], (num_frames, 1))
+            for name, values in new_columns.items():
+                field_index = table.schema.get_field_index(name)
+                field_type = table.schema.field(name).type
+                column = pa.array(values.tolist() if values.ndim > 1 else values, type=field_type)
+                table = table.set_column(field_index, name, column)
+            data_file = output / info["data_path"].format(episode_chunk=new_chunk, episode_index=new_index)
+            data_file.parent.mkdir(parents=True, exist_ok=True)
+            pq.write_table(table, data_file)
+
+            for key in video_keys:
+                old_video = source / source_info["video_path"].format(episode_chunk=old_chunk, video_key=key, episode_index=old_index)
+                new_video = output / info["video_path"].format(episode_chunk=new_chunk, video_key=key, episode_index=new_index)
+                link_or_copy(old_video, new_video)
+
+            stats = dict(source_stats.get(old_index, {}))
+            for name, values in new_columns.items():
+                if name in stats:
+                    stats[name] = column_stats(values)
+            episodes.append({**episode, "episode_index": new_index})
+            episodes_stats.append({"episode_index": new_index, "stats": stats})
+            total_frames += num_frames
+        print(f"{source}: {len(episodes)} episodes, {total_frames} frames so far")
+
+    write_jsonl(output / EPISODES_PATH, episodes)
+    write_jsonl(output / EPISODES_STATS_PATH, episodes_stats)
+    write_jsonl(output / TASKS_PATH, [{"task_index": index, "task": task} for task, index in tasks.items()])
+    info.update(
+        total_episodes=len(episodes),
+        total_frames=total_frames,
+        total_tasks=len(tasks),
+        total_videos=len(episodes) * len(video_keys),
+        total_chunks=(len(episodes) - 1) // chunks_size + 1 if episodes else 0,
+        splits={"train": f"0:{len(episodes)}"},
+    )
+    (output / INFO_PATH).write_text(json.dumps(info, indent=4))
+    print(f"Merged {len(sources)} datasets into {output}: {len(episodes)} episodes, {total_frames} frames")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.root_dir is None:
+        from lerobot.common.constants import HF_LEROBOT_HOME
+        root_dir = Path(HF_LEROBOT_HOME)
+    else:
+        root_dir = Path(args.root_dir)
+
+    repo_ids = list(args.repo_ids)
+    if args.prefix:
+        repo_ids += [f"{args.prefix}_{i}" for i in range(args.count)]
+    if not repo_ids:
+        raise SystemExit("Pass --repo-ids or --prefix.")
+    merge([root_dir / repo_id for repo_id in repo_ids], root_dir / args.output, set_grid=args.set_grid)
@@ -0,0 +1,55 @@
+"""
+fix_dataset.episode_cells / compute_grid_positions against the original per-frame loop.
+Run from lecopain/guess_who:
+    python -m pytest tests
+"""
+import numpy as np
+
+from fix_dataset import NUM_COLS, NUM_ROWS, compute_grid_positions, episode_cells
+
+
+def original_fix(episode_index: np.ndarray, repeated_episode: int) -> np.ndarray:
+    """The loop of the first version of the script, which hard-coded one repeated episode."""
+    grid, current_episode, idx, current_grid = [], -1, 0, (0, 0)
+    for episode_id in episode_index:
+        if episode_id != current_episode:
+            current_episode = episode_id
+            if current_episode == repeated_episode:
+                idx -= 1
+            current_grid = ((idx // NUM_COLS) % NUM_ROWS, idx % NUM_COLS)
+            idx += 1
+        grid.append(current_grid)
+    return np.array(grid)
+
+
+def test_cells_follow_the_grid_and_wrap_around():
+    cells = episode_cells(np.arange(30))
+    assert cells.tolist() == list(range(24)) + list(range(6))
+
+
+def test_start_cell_offsets_the_sequence():
+    assert episode_cells(np.arange(3), start_cell=23).tolist() == [23, 0, 1]
+
+
+def test_repeated_episode_stays_on_the_previous_cell():
+    assert episode_cells(np.arange(5), repeat=[2]).tolist() == [0, 1, 1, 2, 3]
+
+
+def test_skipped_positions_have_no_episode():
+    assert episode_cells(np.arange(5), skip=[1, 3]).tolist() == [0, 2, 4, 5, 6]
+
+
+def test_sparse_episode_ids():
+    # Deleted episodes leave gaps in the ids, cells still advance one per episode
+    assert episode_cells(np.array([0, 4, 9])).tolist() == [0, 1, 2]
+
+
+def test_matches_the_original_fix():
+    frames_per_episode = np.random.default_rng(0).integers(1, 5, size=60)
+    episode_index = np.repeat(np.arange(60), frames_per_episode)
+
+    grid, episodes, cells = compute_grid_positions(episode_index, repeat=[45])
+
+    np.testing.assert_array_equal(grid, original_fix(episode_index, repeated_episode=45))
+    assert episodes.tolist() == list(range(60))
+    assert cells.shape == (60,)
@@ -0,0 +1,80 @@
+"""
+Grid-cell index and GridBalancedSampler: every batch holds the same number of samples
+per cell (up to one), whatever the number of episodes recorded per cell.
+Run from lecopain/guess_who:
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from grid_index import (  # noqa: E402
+    NUM_CELLS,
+    NUM_COLS,
+    GridBalancedSampler,
+    build_grid_index,
+    frames_for_cell,
+    save_grid_index,
+)
+
+
+def _dataset(episodes_per_cell: list[int], frames_per_episode: int = 5):
+    """Per-frame episode_index and grid_position columns, cell after cell."""
+    cells = np.repeat(np.arange(len(episodes_per_cell)), episodes_per_cell)
+    episode_index = np.repeat(np.arange(len(cells)), frames_per_episode)
+    frame_cells = np.repeat(cells, frames_per_episode)
+    grid_position = np.stack([frame_cells // NUM_COLS, frame_cells % NUM_COLS], axis=1)
+    return episode_index, grid_position
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    # Very unbalanced: cell 0 has 20 episodes, the others one or two
+    episodes_per_cell = [20] + [1 + i % 2 for i in range(NUM_CELLS - 1)]
+    index = build_grid_index(*_dataset(episodes_per_cell))
+    path = tmp_path / "meta" / "grid_index.npy"
+    save_grid_index(index, path)
+    return path
+
+
+def test_build_grid_index():
+    index = build_grid_index(*_dataset([2, 1, 3]))
+    assert index["cell"].tolist() == [0, 0, 1, 2, 2, 2]
+    assert index["frame_from"].tolist() == [0, 5, 10, 15, 20, 25]
+    assert index["frame_to"].tolist() == [5, 10, 15, 20, 25, 30]
+    assert frames_for_cell(index, 0, 1).tolist() == list(range(10, 15))
+
+
+def test_build_grid_index_rejects_mixed_cells():
+    episode_index, grid_position = _dataset([1, 1])
+    grid_position[3] = (0, 1)
+    with pytest.raises(ValueError):
+        build_grid_index(episode_index, grid_position)
+
+
+@pytest.mark.parametrize("batch_size", [NUM_CELLS, 32, 10])
+def test_batches_are_balanced(index_path, batch_size):
+    sampler = GridBalancedSampler(index_path, batch_size=batch_size, num_samples=batch_size * 20, seed=0)
+    index = np.load(index_path)
+    frames = np.fromiter(iter(sampler), dtype=np.int64)
+    assert len(frames) == len(sampler) == batch_size * 20
+
+    # Cell of each sampled frame
+    episode_rows = np.searchsorted(index["frame_to"], frames, side="right")
+    assert np.all(index["frame_from"][episode_rows] <= frames)
+    frame_cells = index["cell"][episode_rows]
+
+    for batch in frame_cells.reshape(-1, batch_size):
+        counts = np.bincount(batch, minlength=NUM_CELLS)
+        assert counts.max() - counts.min() <= 1
+
+
+def test_sampler_is_reproducible_and_picklable(index_path):
+    import pickle
+
+    sampler = GridBalancedSampler(index_path, batch_size=8, seed=3)
+    copy = pickle.loads(pickle.dumps(sampler))
+    assert copy._index is None
+    assert list(copy) == list(sampler)
+    assert len(sampler) == int(np.load(index_path)["frame_to"][-1])
@@ -0,0 +1,132 @@
+"""
+merge_datasets.merge on two tiny LeRobot v2.1 datasets (parquet and meta files, placeholder videos).
+Run from lecopain/guess_who:
+    python -m pytest tests
+"""
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from merge_datasets import EPISODES_PATH, EPISODES_STATS_PATH, INFO_PATH, TASKS_PATH, merge, read_jsonl, write_jsonl
+
+DATA_PATH = "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet"
+VIDEO_PATH = "videos/chunk-{episode_chunk:03d}/{video_key}/episode_{episode_index:06d}.mp4"
+VIDEO_KEY = "observation.images.front"
+
+
+def make_dataset(root, frames_per_episode: list[int], tasks: list[str], chunks_size: int = 1000):
+    """Writes a v2.1 dataset whose episode i uses task i % len(tasks)."""
+    info = {
+        "codebase_version": "v2.1",
+        "fps": 30,
+        "chunks_size": chunks_size,
+        "data_path": DATA_PATH,
+        "video_path": VIDEO_PATH,
+        "features": {
+            "action": {"dtype": "float32", "shape": [2]},
+            "grid_position": {"dtype": "int64", "shape": [2]},
+            VIDEO_KEY: {"dtype": "video", "shape": [4, 4, 3]},
+            "episode_index": {"dtype": "int64", "shape": [1]},
+            "index": {"dtype": "int64", "shape": [1]},
+            "task_index": {"dtype": "int64", "shape": [1]},
+        },
+    }
+    (root / "meta").mkdir(parents=True)
+    (root / INFO_PATH).write_text(json.dumps(info))
+    write_jsonl(root / TASKS_PATH, [{"task_index": i, "task": task} for i, task in enumerate(tasks)])
+
+    episodes, stats, index = [], [], 0
+    for episode_index, num_frames in enumerate(frames_per_episode):
+        chunk = episode_index // chunks_size
+        table = pa.table({
+            "action": pa.array(np.full((num_frames, 2), episode_index, dtype=np.float32).tolist(), type=pa.list_(pa.float32())),
+            "grid_position": pa.array([[9, 9]] * num_frames, type=pa.list_(pa.int64())),
+            "episode_index": pa.array(np.full(num_frames, episode_index), type=pa.int64()),
+            "index": pa.array(np.arange(index, index + num_frames), type=pa.int64()),
+            "task_index": pa.array(np.full(num_frames, episode_index % len(tasks)), type=pa.int64()),
+        })
+        data_file = root / DATA_PATH.format(episode_chunk=chunk, episode_index=episode_index)
+        data_file.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, data_file)
+        video_file = root / VIDEO_PATH.format(episode_chunk=chunk, video_key=VIDEO_KEY, episode_index=episode_index)
+        video_file.parent.mkdir(parents=True, exist_ok=True)
+        video_file.write_bytes(f"{root.name} episode {episode_index}".encode())
+
+        episodes.append({"episode_index": episode_index, "tasks": [tasks[episode_index % len(tasks)]], "length": num_frames})
+        stats.append({"episode_index": episode_index, "stats": {"index": {"count": [num_frames]}}})
+        index += num_frames
+    write_jsonl(root / EPISODES_PATH, episodes)
+    write_jsonl(root / EPISODES_STATS_PATH, stats)
+    return root
+
+
+@pytest.fixture
+def sources(tmp_path):
+    return [
+        make_dataset(tmp_path / "grid_0", [3, 2], ["pick", "place"]),
+        # Tasks in the other order and one more, small chunks to cross chunk boundaries
+        make_dataset(tmp_path / "grid_1", [4, 1, 2], ["place", "pick", "push"], chunks_size=2),
+    ]
+
+
+def read_data(root, episode_index: int) -> pa.Table:
+    info = json.loads((root / INFO_PATH).read_text())
+    chunk = episode_index // info["chunks_size"]
+    return pq.read_table(root / info["data_path"].format(episode_chunk=chunk, episode_index=episode_index))
+
+
+def test_merge(sources, tmp_path):
+    output = tmp_path / "merged"
+    merge(sources, output, set_grid=True)
+
+    info = json.loads((output / INFO_PATH).read_text())
+    assert info["total_episodes"] == 5
+    assert info["total_frames"] == 12
+    assert info["total_tasks"] == 3
+    assert info["total_videos"] == 5
+    assert info["splits"] == {"train": "0:5"}
+
+    tasks = {task["task"]: task["task_index"] for task in read_jsonl(output / TASKS_PATH)}
+    assert tasks == {"pick": 0, "place": 1, "push": 2}
+    episodes = read_jsonl(output / EPISODES_PATH)
+    assert [e["episode_index"] for e in episodes] == [0, 1, 2, 3, 4]
+    assert [e["length"] for e in episodes] == [3, 2, 4, 1, 2]
+
+    tables = [read_data(output, i) for i in range(5)]
+    for episode_index, table in enumerate(tables):
+        assert set(table.column("episode_index").to_pylist()) == {episode_index}
+    # Global frame index is contiguous across sources
+    np.testing.assert_array_equal(np.concatenate([t.column("index").to_numpy() for t in tables]), np.arange(12))
+    # Task indices point to the merged task list
+    assert [t.column("task_index").to_pylist()[0] for t in tables] == [0, 1, 1, 0, 2]
+    # Source i is grid cell i
+    assert [t.column("grid_position").to_pylist()[0] for t in tables] == [[0, 0], [0, 0], [0, 1], [0, 1], [0, 1]]
+    # Other columns are untouched
+    assert tables[3].column("action").to_pylist() == [[1.0, 1.0]]
+
+    video = output / VIDEO_PATH.format(episode_chunk=0, video_key=VIDEO_KEY, episode_index=4)
+    assert video.read_bytes() == b"grid_1 episode 2"
+
+    stats = read_jsonl(output / EPISODES_STATS_PATH)
+    assert stats[2]["stats"]["index"]["min"] == [5.0]
+    assert stats[2]["stats"]["index"]["count"] == [4]
+
+
+def test_merge_keeps_grid_position_without_set_grid(sources, tmp_path):
+    output = tmp_path / "merged"
+    merge(sources, output)
+    assert read_data(output, 4).column("grid_position").to_pylist()[0] == [9, 9]
+
+
+def test_merge_rejects_existing_output_and_incompatible_sources(sources, tmp_path):
+    with pytest.raises(FileExistsError):
+        merge(sources, sources[0])
+
+    info = json.loads((sources[1] / INFO_PATH).read_text())
+    info["fps"] = 15
+    (sources[1] / INFO_PATH).write_text(json.dumps(info))
+    with pytest.raises(ValueError):
+        merge(sources, tmp_path / "merged")
@@ -0,0 +1,43 @@
+# src/features/tic_tac_toe/router.py
+import logging
+from fastapi import APIRouter, HTTPException, Body
+
+from .engine import NUM_STATES, get_table
+from .schema import MoveRequest, MoveResponse, TableInfoResponse
+from .services import choose_move
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post(
+    "/move",
+    response_model=MoveResponse,
+    summary="Get the Robot's Move",
+    description="Returns the optimal move for the player to move, with its robot grid coordinates.",
+)
+async def http_move(
+    request_data: MoveRequest = Body(...)
+):
+    """
+    Endpoint for the robot's turn: a single lookup in the precomputed perfect-play table.
+    """
+    try:
+        return MoveResponse(**choose_move(request_data.board))
+    except HTTPException as e:
+        # Re-raise HTTP exceptions (400 for invalid or finished boards)
+        raise e
+    except Exception as e:
+        logger.exception("Unexpected error while choosing a move.")
+        return MoveResponse(error=f"An unexpected server error occurred: {type(e).__name__}")
+
+
+@router.get(
+    "/table",
+    response_model=TableInfoResponse,
+    summary="Perfect-Play Table Info",
+    description="Number of reachable states in the precomputed table.",
+)
+async def http_table_info():
+    table = get_table()
+    return TableInfoResponse(reachable_states=table.reachable_states, table_size=NUM_STATES)
@@ -0,0 +1,26 @@
+# src/features/tic_tac_toe/schema.py
+from pydantic import BaseModel, Field
+from typing import List
+
+class MoveRequest(BaseModel):
+    """Request model for asking the robot's move."""
+    board: List[str] = Field(..., description="The 9 cells row by row: 'X', 'O' or '' for empty. X plays first.")
+
+class MoveResponse(BaseModel):
+    """Response model for the robot's move."""
+    player: str = Field("", description="The player the move is for ('X' or 'O').")
+    cell: int = Field(-1, description="The chosen cell (0-8, row by row).")
+    row: int = Field(-1, description="Row of the chosen cell on the board.")
+    col: int = Field(-1, description="Column of the chosen cell on the board.")
+    robot_row: int = Field(-1, description="Row of the chosen cell on the robot grid.")
+    robot_col: int = Field(-1, description="Column of the chosen cell on the robot grid.")
+    expected_outcome: str = Field("", description="Result with perfect play from both sides ('win', 'draw' or 'loss').")
+    board: List[str] = Field(default_factory=list, description="The board after the move.")
+    status: str = Field("", description="'in_progress', 'X_wins', 'O_wins' or 'draw' after the move.")
+    error: str | None = None
+
+class TableInfoResponse(BaseModel):
+    """Response model describing the precomputed table."""
+    reachable_states: int
+    table_size: int
+    error: str | None = None
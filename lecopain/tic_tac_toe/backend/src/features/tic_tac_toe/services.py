@@ -0,0 +1,75 @@
+# src/features/tic_tac_toe/services.py
+import logging
+import os
+from typing import List
+
+from fastapi import HTTPException
+
+from .engine import EMPTY, NO_MOVE, NUM_CELLS, O, SYMBOLS, UNREACHABLE, X, get_table, to_move, winner
+
+logger = logging.getLogger(__name__)
+
+# --- Robot grid mapping ---
+# The 3x3 board is laid on the robot's 3x8 grid (the one its grid-conditioned policy was
+# trained on), starting at this column
+TTT_GRID_COL_OFFSET = int(os.getenv("TTT_GRID_COL_OFFSET", "0"))
+BOARD_SIZE = 3
+
+NAMES = {X: "X", O: "O"}
+
+
+def parse_board(cells: List[str]) -> tuple[int, ...]:
+    """Converts 9 cells ("X", "O" or "" for empty, row by row) to the engine representation."""
+    if len(cells) != NUM_CELLS:
+        raise HTTPException(status_code=400, detail=f"A board has {NUM_CELLS} cells, got {len(cells)}.")
+    try:
+        return tuple(SYMBOLS[cell.strip().upper() if cell.strip() else ""] for cell in cells)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cell value: {e.args[0]!r} (use 'X', 'O' or '').")
+
+
+def game_status(board: tuple[int, ...]) -> str:
+    won = winner(board)
+    if won != EMPTY:
+        return f"{NAMES[won]}_wins"
+    if EMPTY not in board:
+        return "draw"
+    return "in_progress"
+
+
+def cell_to_robot_grid(cell: int) -> tuple[int, int]:
+    """Robot grid (row, col) of a board cell."""
+    row, col = divmod(cell, BOARD_SIZE)
+    return row, col + TTT_GRID_COL_OFFSET
+
+
+def choose_move(cells: List[str]) -> dict:
+    """
+    Returns the optimal move for the player to move (X starts), read from the precomputed table.
+
+    Raises:
+        HTTPException 400 if the board is invalid, cannot occur in a game, or the game is over.
+    """
+    board = parse_board(cells)
+    move, value = get_table().lookup(board)
+    if value == UNREACHABLE:
+        raise HTTPException(status_code=400, detail="This board cannot occur in a game where X starts.")
+    if move == NO_MOVE:
+        raise HTTPException(status_code=400, detail=f"The game is over ({game_status(board)}).")
+
+    player = to_move(board)
+    after = board[:move] + (player,) + board[move + 1:]
+    robot_row, robot_col = cell_to_robot_grid(move)
+    expected = "win" if value > 0 else "loss" if value < 0 else "draw"
+    logger.info("Move for %s: cell %s (robot grid %s, %s), expected %s", NAMES[player], move, robot_row, robot_col, expected)
+    return {
+        "player": NAMES[player],
+        "cell": move,
+        "row": move // BOARD_SIZE,
+        "col": move % BOARD_SIZE,
+        "robot_row": robot_row,
+        "robot_col": robot_col,
+        "expected_outcome": expected,
+        "board": [NAMES.get(cell, "") for cell in after],
+        "status": game_status(after),
+    }
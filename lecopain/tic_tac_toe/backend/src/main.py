@@ -0,0 +1,59 @@
+# src/main.py
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+from src.features.tic_tac_toe.engine import get_table
+from src.features.tic_tac_toe.services import TTT_GRID_COL_OFFSET
+
+
+# --- Perfect-play table ---
+# Solved once at startup (well under a second), so every move request is a single lookup
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start = time.perf_counter()
+    table = get_table()
+    logger.info("Perfect-play table ready: %s reachable states in %.3fs", table.reachable_states, time.perf_counter() - start)
+    yield
+
+
+# --- FastAPI and CORS configuration ---
+app = FastAPI(title="Tic-Tac-Toe API", lifespan=lifespan)
+
+origins = [
+    "http://localhost",
+    "http://localhost:5173",
+    "http://127.0.0.1:5173",
+]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+# --- Include Routers ---
+from src.features.tic_tac_toe.router import router as tic_tac_toe_router
+app.include_router(tic_tac_toe_router, prefix="/api/tic_tac_toe", tags=["Tic-Tac-Toe"])
+
+
+# --- Health Check / Root Endpoint ---
+@app.get("/", tags=["Health Check"])
+async def read_root():
+    return {"message": "Tic-Tac-Toe API is running.", "table_loaded": get_table.cache_info().currsize > 0}
+
+
+# --- Uvicorn Startup (if running directly) ---
+if __name__ == "__main__":
+    print(f"Tic-Tac-Toe API Endpoints available under /api/tic_tac_toe (board columns start at robot grid column {TTT_GRID_COL_OFFSET})")
+    print(f"Allowed Origins: {origins}")
+    print("\nRun with: uvicorn src.main:app --host 0.0.0.0 --port 8001 --reload\n")
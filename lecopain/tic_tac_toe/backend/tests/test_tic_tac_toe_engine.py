@@ -0,0 +1,83 @@
+"""
+PerfectPlayTable: state count, game values and that following it never loses.
+Run from lecopain/tic_tac_toe/backend:
+    python -m pytest tests
+"""
+import pytest
+
+from src.features.tic_tac_toe.engine import (
+    EMPTY,
+    NO_MOVE,
+    NUM_CELLS,
+    O,
+    UNREACHABLE,
+    X,
+    PerfectPlayTable,
+    get_table,
+    to_move,
+    winner,
+)
+
+EMPTY_BOARD = tuple([EMPTY] * NUM_CELLS)
+
+
+@pytest.fixture(scope="module")
+def table() -> PerfectPlayTable:
+    return PerfectPlayTable()
+
+
+def play(board: tuple[int, ...], cell: int) -> tuple[int, ...]:
+    return board[:cell] + (to_move(board),) + board[cell + 1:]
+
+
+def test_reachable_states(table):
+    assert table.reachable_states == 5478
+
+
+def test_empty_board_is_a_draw(table):
+    move, value = table.lookup(EMPTY_BOARD)
+    assert value == 0
+    # All first moves draw, the center comes first in MOVE_ORDER
+    assert move == 4
+
+
+def test_takes_the_immediate_win(table):
+    board = (X, X, EMPTY,
+             O, O, EMPTY,
+             EMPTY, EMPTY, EMPTY)
+    move, value = table.lookup(board)
+    assert move == 2
+    assert value > 0
+
+
+def test_blocks_the_opponent(table):
+    board = (X, X, EMPTY,
+             EMPTY, O, EMPTY,
+             EMPTY, EMPTY, EMPTY)
+    assert table.lookup(board)[0] == 2
+
+
+def test_unreachable_board(table):
+    assert table.lookup((X,) * NUM_CELLS) == (NO_MOVE, UNREACHABLE)
+
+
+@pytest.mark.parametrize("table_player", [X, O])
+def test_never_loses(table, table_player):
+    # Every possible opponent reply, exhaustively
+    boards = [EMPTY_BOARD]
+    while boards:
+        board = boards.pop()
+        result = winner(board)
+        if result != EMPTY:
+            assert result == table_player
+            continue
+        if EMPTY not in board:
+            continue
+        if to_move(board) == table_player:
+            boards.append(play(board, table.lookup(board)[0]))
+        else:
+            boards.extend(play(board, cell) for cell in range(NUM_CELLS) if board[cell] == EMPTY)
+
+
+def test_get_table_is_shared():
+    assert get_table() is get_table()